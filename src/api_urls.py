@@ -9,6 +9,8 @@ from soft_desk_support.views import (
     ContributorViewSet,
     IssueViewSet,
     CommentViewSet,
+    SearchView,
+    MetricsView,
 )
 
 
@@ -39,4 +41,6 @@ urlpatterns = [
     path('', include(router.urls)),
     path('', include(projects_router.urls)),
     path('', include(issues_router.urls)),
+    path("search/", SearchView.as_view(), name="search"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
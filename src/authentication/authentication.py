@@ -0,0 +1,157 @@
+"""
+Stateless JWT authentication.
+
+`ClaimsJWTAuthentication` does not fetch the user row on every
+request: it builds a `ClaimsUser` from the signed token claims
+(id, username, is_staff, is_active) and only loads the full
+`user.models.User` when a view touches another attribute.
+
+Since the claims can outlive a deactivation, a demotion, a rename
+or a deletion, they are overridden by a short-lived status cache
+(`JWT_USER_STATUS_TTL` seconds) that the signals in
+`authentication.signals` keep up to date on every user write.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Model
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from monitoring.metrics import record_cache_lookup
+
+
+User = get_user_model()
+
+USER_STATUS_KEY = "authentication:user-status:{user_id}"
+
+# Cached in place of the status of a deleted user.
+MISSING = "missing"
+
+
+def _status_ttl():
+    return getattr(settings, "JWT_USER_STATUS_TTL", 60)
+
+
+def set_user_status(user):
+    """
+    Stores the `(is_active, is_staff, username)` status of a user.
+    """
+    cache.set(
+        USER_STATUS_KEY.format(user_id=user.pk),
+        (user.is_active, user.is_staff, user.username),
+        _status_ttl()
+    )
+
+
+def forget_user_status(user_id):
+    """
+    Marks a user as deleted.
+    """
+    cache.set(
+        USER_STATUS_KEY.format(user_id=user_id), MISSING, _status_ttl()
+    )
+
+
+def get_user_status(user_id):
+    """
+    Returns the `(is_active, is_staff, username)` status of a user,
+    or None if the user does not exist, reading the database on
+    cache misses only.
+    """
+    key = USER_STATUS_KEY.format(user_id=user_id)
+    status = cache.get(key)
+    record_cache_lookup("user_status", status is not None)
+    if status is None:
+        status = User.objects.filter(
+            pk=user_id
+        ).values_list(
+            "is_active", "is_staff", "username"
+        ).first() or MISSING
+        cache.set(key, status, _status_ttl())
+    if status == MISSING:
+        return None
+    return tuple(status)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Lazy `User` whose id, username, is_staff and is_active are
+    answered from the token claims. Any other attribute loads the
+    user row once, then proxies to it.
+    """
+
+    def __init__(self, claims):
+        user_id = claims["id"]
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__.update(claims)
+        self.__dict__.update(
+            pk=user_id,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, ClaimsUser):
+            return self.pk == other.pk
+        if isinstance(other, Model):
+            return (
+                other._meta.concrete_model is User._meta.concrete_model
+                and self.pk == other.pk
+            )
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication returning a `ClaimsUser` instead of querying
+    the user table on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        status = get_user_status(user_id)
+        if status is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        is_active, is_staff, username = status
+        if api_settings.CHECK_USER_IS_ACTIVE and not (
+            is_active and validated_token.get("is_active", True)
+        ):
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares a hash of the password: it needs
+            # the user row anyway.
+            return super().get_user(validated_token)
+
+        return ClaimsUser({
+            "id": user_id,
+            "username": username,
+            "is_staff": is_staff,
+            "is_active": True,
+        })
@@ -0,0 +1,146 @@
+"""
+Compaction of the `token_blacklist` tables.
+
+Refresh tokens are rotated on every refresh, so the outstanding and
+blacklisted tokens accumulate forever. Once expired, they can no
+longer be used and are safely deleted.
+
+`compact_expired_tokens` deletes them in batches, each one in its own
+short transaction. It starts with a small batch, then sizes each one
+from the per-row cost measured on the previous one, growing at most
+twofold, so that the SQLite write lock is not held much longer than
+`max_lock_ms`, and the other writers get a chance to run between two
+batches.
+
+The periodic compaction (`TOKEN_COMPACTION_INTERVAL`) is started by
+the server process only, from `wsgi.py` and `asgi.py`, and not by the
+management commands or the tests.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken, OutstandingToken
+)
+
+
+logger = logging.getLogger(__name__)
+
+MIN_BATCH_SIZE = 10
+
+
+def compaction_settings():
+    return {
+        "batch_size": getattr(settings, "TOKEN_COMPACTION_BATCH_SIZE", 1000),
+        "max_lock_ms": getattr(settings, "TOKEN_COMPACTION_MAX_LOCK_MS", 50),
+        "pause_ms": getattr(settings, "TOKEN_COMPACTION_PAUSE_MS", 10),
+    }
+
+
+def compact_expired_tokens(batch_size=1000, max_lock_ms=50, pause_ms=10,
+                           max_batches=None, now=None):
+    """
+    Deletes the expired outstanding tokens and their blacklist
+    entries, by batches of at most `batch_size` rows.
+
+    Returns a dict with the number of `outstanding` and `blacklisted`
+    rows purged, the number of `batches`, the total `elapsed_ms` and
+    the longest transaction (`max_lock_ms`).
+    """
+    now = now or timezone.now()
+    max_batch_size = batch_size
+    batch_size = min(MIN_BATCH_SIZE, max_batch_size)
+    report = {
+        "outstanding": 0,
+        "blacklisted": 0,
+        "batches": 0,
+        "elapsed_ms": 0.0,
+        "max_lock_ms": 0.0,
+    }
+    start = time.perf_counter()
+    expired = OutstandingToken.objects.filter(
+        expires_at__lt=now
+    ).order_by().values_list("id", flat=True)
+
+    while max_batches is None or report["batches"] < max_batches:
+        ids = list(expired[:batch_size])
+        if not ids:
+            break
+
+        lock_start = time.perf_counter()
+        with transaction.atomic():
+            _, deleted = OutstandingToken.objects.filter(
+                id__in=ids
+            ).delete()
+        lock_ms = (time.perf_counter() - lock_start) * 1000
+
+        report["batches"] += 1
+        report["outstanding"] += deleted.get(
+            OutstandingToken._meta.label, 0
+        )
+        report["blacklisted"] += deleted.get(
+            BlacklistedToken._meta.label, 0
+        )
+        report["max_lock_ms"] = max(report["max_lock_ms"], lock_ms)
+
+        # Sized from the per-row cost, growing at most twofold.
+        row_ms = lock_ms / len(ids)
+        fitting = int(max_lock_ms / row_ms) if row_ms else max_batch_size
+        batch_size = max(
+            min(MIN_BATCH_SIZE, max_batch_size),
+            min(max_batch_size, batch_size * 2, fitting)
+        )
+        if pause_ms:
+            time.sleep(pause_ms / 1000)
+
+    report["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    logger.info(
+        "Purged %(outstanding)d outstanding and %(blacklisted)d "
+        "blacklisted tokens in %(batches)d batches "
+        "(%(elapsed_ms).1f ms, longest lock %(max_lock_ms).1f ms)",
+        report
+    )
+    return report
+
+
+class TokenCompactionScheduler(threading.Thread):
+    """
+    Daemon thread running `compact_expired_tokens` every `interval`
+    seconds, enabled by the `TOKEN_COMPACTION_INTERVAL` setting.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name="token-compaction", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                compact_expired_tokens(**compaction_settings())
+            except Exception:
+                logger.exception("Token compaction failed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+scheduler = None
+
+
+def start_scheduler():
+    """
+    Starts the periodic compaction if `TOKEN_COMPACTION_INTERVAL`
+    is set.
+    """
+    global scheduler
+    interval = getattr(settings, "TOKEN_COMPACTION_INTERVAL", None)
+    if interval and scheduler is None:
+        scheduler = TokenCompactionScheduler(interval)
+        scheduler.start()
+    return scheduler
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from authentication.compaction import (
+    compact_expired_tokens, compaction_settings
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the expired outstanding and blacklisted tokens in "
+        "bounded batches."
+    )
+
+    def add_arguments(self, parser):
+        defaults = compaction_settings()
+        parser.add_argument(
+            "--batch-size", type=int, default=defaults["batch_size"],
+            help="Maximum number of tokens deleted per transaction."
+        )
+        parser.add_argument(
+            "--max-lock-ms", type=float, default=defaults["max_lock_ms"],
+            help="Target maximum duration of each transaction."
+        )
+        parser.add_argument(
+            "--pause-ms", type=float, default=defaults["pause_ms"],
+            help="Pause between two transactions."
+        )
+        parser.add_argument(
+            "--max-batches", type=int, default=None,
+            help="Stop after this number of batches."
+        )
+
+    def handle(self, *args, **options):
+        report = compact_expired_tokens(
+            batch_size=options["batch_size"],
+            max_lock_ms=options["max_lock_ms"],
+            pause_ms=options["pause_ms"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Purged {outstanding} outstanding and {blacklisted} "
+            "blacklisted tokens in {batches} batches: "
+            "{elapsed_ms:.1f} ms, longest lock {max_lock_ms:.1f} ms."
+            .format(**report)
+        ))
@@ -0,0 +1,192 @@
+"""
+In-memory index of the revoked (blacklisted) refresh tokens.
+
+`simplejwt` checks the blacklist with one query per token
+verification. `RevocationIndex` answers most of those checks from
+memory instead:
+
+- a Bloom filter holds the JTI of every blacklisted token; a
+negative answer means the token is certainly not revoked and no
+query is run;
+- an exact, bounded set holds the JTIs recently confirmed as
+revoked (blacklisted by this process, or found in the table after
+a Bloom hit), so replays of a rotated token are rejected without
+a query either;
+- any other Bloom hit is a *possible* hit and is confirmed against
+the `token_blacklist` tables.
+
+The index is loaded on first use, then kept up to date
+incrementally: the `post_save` signal on `BlacklistedToken` adds
+the tokens blacklisted by this process, and the rows blacklisted
+by other processes are read (by increasing id) at most every
+`TOKEN_REVOCATION_SYNC_INTERVAL` seconds.
+"""
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from threading import RLock
+
+from django.conf import settings
+
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken
+)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, using double hashing on a
+    single blake2b digest.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(
+            8,
+            int(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(
+            1, round(self.size / self.capacity * math.log(2))
+        )
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [
+            (first + i * second) % size for i in range(self.hash_count)
+        ]
+
+    def add(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationIndex:
+    """
+    Thread-safe index of the blacklisted JTIs (see the module
+    docstring).
+    """
+
+    def __init__(self, capacity=None, error_rate=None,
+                 exact_size=None, sync_interval=None):
+        self.capacity = capacity or getattr(
+            settings, "TOKEN_REVOCATION_CAPACITY", 1_000_000
+        )
+        self.error_rate = error_rate or getattr(
+            settings, "TOKEN_REVOCATION_ERROR_RATE", 0.001
+        )
+        self.exact_size = exact_size or getattr(
+            settings, "TOKEN_REVOCATION_EXACT_SIZE", 100_000
+        )
+        self.sync_interval = getattr(
+            settings, "TOKEN_REVOCATION_SYNC_INTERVAL", 1.0
+        ) if sync_interval is None else sync_interval
+        self._lock = RLock()
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the index; it is reloaded on next use.
+        """
+        with self._lock:
+            self._bloom = None
+            self._exact = OrderedDict()
+            self._last_id = 0
+            self._synced_at = 0.0
+
+    def _remember(self, jti):
+        self._exact[jti] = None
+        self._exact.move_to_end(jti)
+        while len(self._exact) > self.exact_size:
+            self._exact.popitem(last=False)
+
+    def load(self):
+        """
+        Builds the Bloom filter from every blacklisted token.
+        """
+        with self._lock:
+            total = BlacklistedToken.objects.count()
+            capacity = self.capacity
+            while capacity < total * 2:
+                capacity *= 2
+            bloom = BloomFilter(capacity, self.error_rate)
+            last_id = 0
+            rows = BlacklistedToken.objects.order_by().values_list(
+                "id", "token__jti"
+            )
+            for row_id, jti in rows.iterator(chunk_size=10_000):
+                bloom.add(jti)
+                last_id = max(last_id, row_id)
+            self._bloom = bloom
+            self._last_id = last_id
+            self._synced_at = time.monotonic()
+
+    def sync(self, force=False):
+        """
+        Adds the tokens blacklisted since the last sync, possibly by
+        another process.
+        """
+        with self._lock:
+            if self._bloom is None:
+                return self.load()
+            if not force and (
+                time.monotonic() - self._synced_at < self.sync_interval
+            ):
+                return
+            rows = BlacklistedToken.objects.filter(
+                id__gt=self._last_id
+            ).order_by("id").values_list("id", "token__jti")
+            for row_id, jti in rows:
+                self._add(jti)
+                self._last_id = row_id
+            self._synced_at = time.monotonic()
+            if self._bloom.count > self._bloom.capacity:
+                self.load()
+
+    def _add(self, jti):
+        self._bloom.add(jti)
+        self._remember(jti)
+
+    def add(self, jti):
+        """
+        Records a token blacklisted by this process.
+        """
+        with self._lock:
+            if self._bloom is not None:
+                self._add(jti)
+
+    def is_revoked(self, jti):
+        """
+        Returns True if the token is blacklisted, querying the
+        database only when the Bloom filter reports a possible hit
+        that is not already known.
+        """
+        self.sync()
+        with self._lock:
+            if jti in self._exact:
+                return True
+            if jti not in self._bloom:
+                return False
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if revoked:
+            with self._lock:
+                self._remember(jti)
+        return revoked
+
+
+revocation_index = RevocationIndex()
@@ -0,0 +1,74 @@
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, TokenError
+)
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer, TokenRefreshSerializer
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from monitoring.metrics import record_token_refresh
+from .authentication import get_user_status
+from .tokens import IndexedRefreshToken
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds the claims read by `ClaimsJWTAuthentication` to the issued
+    tokens (access tokens inherit them from the refresh token).
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.username
+        token["is_staff"] = user.is_staff
+        token["is_active"] = user.is_active
+        return token
+
+
+class IndexedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer using `IndexedRefreshToken`, and the cached
+    user status instead of a user query, to check the token.
+
+    Successful and rejected refreshes are counted in
+    `softdesk_token_refreshes_total` (see `monitoring.metrics`).
+    """
+    token_class = IndexedRefreshToken
+
+    def validate(self, attrs):
+        try:
+            data = self.rotate(attrs)
+        except (AuthenticationFailed, TokenError):
+            record_token_refresh("rejected")
+            raise
+        record_token_refresh("success")
+        return data
+
+    def rotate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None:
+            status = get_user_status(user_id)
+            if status is None or (
+                api_settings.CHECK_USER_IS_ACTIVE and not status[0]
+            ):
+                raise AuthenticationFailed(
+                    self.error_messages["no_active_account"],
+                    "no_active_account",
+                )
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken
+)
+
+from .authentication import set_user_status, forget_user_status
+from .revocation import revocation_index
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def update_user_status(sender, instance, **kwargs):
+    """
+    Keeps the cached flags checked by `ClaimsJWTAuthentication` in
+    sync, so that deactivations apply to tokens already issued.
+    """
+    set_user_status(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_status(sender, instance, **kwargs):
+    forget_user_status(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def index_blacklisted_token(sender, instance, created, **kwargs):
+    """
+    Adds the tokens blacklisted by this process to the revocation
+    index.
+    """
+    if created:
+        revocation_index.add(instance.token.jti)
@@ -1,3 +1,214 @@
-# from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken, OutstandingToken
+)
+
+from user.models import User
+from .authentication import ClaimsUser
+from . import compaction
+from .compaction import compact_expired_tokens
+from .revocation import BloomFilter, revocation_index
+
+
+class TestClaimsJWTAuthentication(APITestCase):
+
+    url = reverse_lazy("user-list")
+    token_url = reverse_lazy("token_obtain_pair")
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            password="testpass123",
+            age=25
+        )
+        response = self.client.post(
+            self.token_url,
+            data={"username": "testuser", "password": "testpass123"}
+        )
+        self.headers = {
+            "Authorization": "Bearer " + response.json()["access"]
+        }
+
+    def get(self):
+        return self.client.get(self.url, headers=self.headers)
+
+    def test_authentication_does_not_query_users(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The only query on the user table is the list itself.
+        self.assertEqual(
+            [query["sql"] for query in context.captured_queries
+             if "user_user" in query["sql"]],
+            [context.captured_queries[-1]["sql"]]
+        )
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(
+            self.get().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        self.assertEqual(
+            self.get().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_claims_user_loads_row_lazily(self):
+        user = ClaimsUser({
+            "id": self.user.pk,
+            "username": self.user.username,
+            "is_staff": False,
+            "is_active": True,
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(user.username, "testuser")
+            self.assertEqual(user, self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.age, 25)
+            self.assertIsInstance(user, User)
+
+
+class TestTokenRevocation(APITestCase):
+
+    token_url = reverse_lazy("token_obtain_pair")
+    refresh_url = reverse_lazy("token_refresh")
+
+    def setUp(self):
+        cache.clear()
+        revocation_index.reset()
+        patcher = mock.patch.object(revocation_index, "sync_interval", 60)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        User.objects.create_user(
+            username="testuser",
+            password="testpass123",
+            age=25
+        )
+        response = self.client.post(
+            self.token_url,
+            data={"username": "testuser", "password": "testpass123"}
+        )
+        self.refresh = response.json()["refresh"]
+
+    def refresh_token(self, token):
+        return self.client.post(self.refresh_url, data={"refresh": token})
+
+    def test_rotated_token_cannot_be_replayed(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.json()["refresh"]
+
+        with self.assertNumQueries(0):
+            response = self.refresh_token(self.refresh)
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        response = self.refresh_token(rotated)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_replay_before_the_index_is_synced(self):
+        with mock.patch.object(
+            revocation_index, "is_revoked", return_value=False
+        ):
+            response = self.refresh_token(self.refresh)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.refresh_token(self.refresh)
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_refresh_queries(self):
+        rotated = self.refresh_token(self.refresh).json()["refresh"]
+        with CaptureQueriesContext(connection) as context:
+            response = self.refresh_token(rotated)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Outstanding lookup, blacklist insert (in a savepoint, not
+        # counted), outstanding insert.
+        self.assertEqual(len([
+            query for query in context.captured_queries
+            if not query["sql"].startswith(("SAVEPOINT", "RELEASE"))
+        ]), 3)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        values = [f"jti-{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(
+            f"other-{i}" in bloom for i in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+
+class TestTokenCompaction(APITestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        tokens = OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                jti=f"jti-{i}",
+                token="-",
+                expires_at=now + timedelta(days=-1 if i < 30 else 1)
+            )
+            for i in range(40)
+        ])
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=token) for token in tokens[20:35]
+        ])
+
+    def test_only_expired_tokens_are_purged(self):
+        report = compact_expired_tokens(batch_size=7, pause_ms=0)
+        self.assertEqual(report["outstanding"], 30)
+        self.assertEqual(report["blacklisted"], 10)
+        self.assertEqual(report["batches"], 5)
+        self.assertEqual(OutstandingToken.objects.count(), 10)
+        self.assertEqual(BlacklistedToken.objects.count(), 5)
+
+    def test_batch_size_starts_small_and_grows(self):
+        report = compact_expired_tokens(
+            batch_size=1000, max_lock_ms=10_000, pause_ms=0
+        )
+        self.assertEqual(report["outstanding"], 30)
+        # 10 (the minimum) + 20, instead of a single batch.
+        self.assertEqual(report["batches"], 2)
+
+    def test_batch_size_is_capped_by_the_row_cost(self):
+        report = compact_expired_tokens(
+            batch_size=16, max_lock_ms=0, pause_ms=0
+        )
+        self.assertEqual(report["outstanding"], 30)
+        # 10 (the minimum) three times, never 16.
+        self.assertEqual(report["batches"], 3)
+
+    @override_settings(TOKEN_COMPACTION_INTERVAL=3600)
+    def test_scheduler_is_not_started_by_the_app(self):
+        apps.get_app_config("authentication").ready()
+        self.assertIsNone(compaction.scheduler)
+
+    def test_command_reports_purged_rows(self):
+        out = StringIO()
+        call_command("compact_tokens", "--pause-ms", "0", stdout=out)
+        self.assertIn(
+            "Purged 30 outstanding and 10 blacklisted tokens",
+            out.getvalue()
+        )
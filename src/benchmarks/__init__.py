@@ -0,0 +1,34 @@
+"""
+Micro-benchmarks, run from the `src` directory, e.g.:
+
+    python -m benchmarks.token_refresh --tokens 1000000
+
+Each benchmark works on its own throwaway SQLite database, so that
+the development database is never touched.
+"""
+import os
+import tempfile
+
+
+def setup_django(db_path=None):
+    """
+    Configures Django on a migrated, throwaway SQLite database and
+    returns its path.
+    """
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "soft_desk_support.settings"
+    )
+    from django.conf import settings
+
+    if db_path is None:
+        db_path = os.path.join(
+            tempfile.mkdtemp(prefix="softdesk-bench-"), "db.sqlite3"
+        )
+    settings.DATABASES["default"]["NAME"] = db_path
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return db_path
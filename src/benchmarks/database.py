@@ -0,0 +1,183 @@
+"""
+Throughput of the SQLite database profiles under concurrent reads
+and writes (see `soft_desk_support.database`).
+
+Seeds a database with a project holding `--issues` issues, then, for
+each profile, runs `--workers` processes on a copy of it for
+`--duration` seconds. Each worker sends a mix of comment creates
+(`--write-ratio` of the requests) and issue list reads through the
+API, and counts the requests served, their latency and the
+"database is locked" failures.
+
+    python -m benchmarks.database --workers 8 --duration 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from . import setup_django
+
+
+def seed(issues):
+    from projects.models import Project, Contributor, Issue
+    from user.models import User
+
+    user = User.objects.create_user(
+        username="bench", password="bench-password", age=30
+    )
+    project = Project.objects.create(
+        name="Bench", type="BACKEND", author=user
+    )
+    Contributor.objects.create(user=user, project=project)
+    Issue.objects.bulk_create([
+        Issue(
+            title=f"Issue {i}", project=project, author=user,
+            priority="LOW", label="BUG"
+        )
+        for i in range(issues)
+    ])
+
+
+def percentile(durations, ratio):
+    if not durations:
+        return 0.0
+    durations = sorted(durations)
+    return durations[min(len(durations) - 1, int(len(durations) * ratio))]
+
+
+def worker(profile, databases, duration, write_ratio, seed):
+    """
+    Sends requests for `duration` seconds, `databases` mapping the
+    database aliases (`default`, then the replicas) to their file.
+    """
+    os.environ["DJANGO_SETTINGS_MODULE"] = "soft_desk_support.settings"
+    os.environ["DJANGO_DATABASE_PROFILE"] = profile
+    os.environ["DJANGO_DATABASE_REPLICAS"] = str(len(databases) - 1)
+    from django.conf import settings
+
+    for alias, path in databases.items():
+        settings.DATABASES[alias]["NAME"] = path
+
+    import django
+    django.setup()
+    logging.disable(logging.WARNING)
+
+    from django.db import OperationalError
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+    from projects.models import Issue
+    from user.models import User
+
+    user = User.objects.get(username="bench")
+    issue = Issue.objects.order_by("id").first()
+    issues_url = reverse(
+        "project_issues-list", kwargs={"project_pk": issue.project_id}
+    )
+    comments_url = reverse("issue_comments-list", kwargs={
+        "project_pk": issue.project_id, "issue_pk": issue.id
+    })
+    client = APIClient(SERVER_NAME="localhost")
+    client.force_authenticate(user)
+
+    rng = random.Random(seed)
+    result = {"reads": [], "writes": [], "locked": 0, "failed": 0}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        write = rng.random() < write_ratio
+        start = time.perf_counter()
+        try:
+            if write:
+                response = client.post(
+                    comments_url, {"content": "Benchmarked"}, format="json"
+                )
+            else:
+                response = client.get(issues_url, {"page_size": 20})
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            result["locked"] += 1
+            continue
+        if response.status_code >= 400:
+            result["failed"] += 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        result["writes" if write else "reads"].append(elapsed)
+    return result
+
+
+def run(profile, databases, args, write_ratios=None, sync=None):
+    """
+    Runs a worker per write ratio (`--write-ratio` for each of the
+    `--workers` by default), calling `sync` every
+    `args.sync_interval` seconds meanwhile if given.
+    """
+    if write_ratios is None:
+        write_ratios = [args.write_ratio] * args.workers
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(len(write_ratios)) as pool:
+        pending = pool.starmap_async(worker, [
+            (profile, databases, args.duration, write_ratio, i)
+            for i, write_ratio in enumerate(write_ratios)
+        ])
+        while not pending.ready():
+            if sync is not None:
+                sync()
+                pending.wait(args.sync_interval)
+            else:
+                pending.wait()
+        results = pending.get()
+    reads = [value for result in results for value in result["reads"]]
+    writes = [value for result in results for value in result["writes"]]
+    return {
+        "reads_per_s": len(reads) / args.duration,
+        "writes_per_s": len(writes) / args.duration,
+        "read_p95_ms": percentile(reads, 0.95),
+        "write_p95_ms": percentile(writes, 0.95),
+        "locked": sum(result["locked"] for result in results),
+        "failed": sum(result["failed"] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--issues", type=int, default=1000)
+    args = parser.parse_args()
+
+    seeded = setup_django()
+    seed(args.issues)
+    from django.db import connections
+    connections.close_all()
+
+    directory = tempfile.mkdtemp(prefix="softdesk-bench-")
+    results = {}
+    for profile in ("default", "production"):
+        db_path = os.path.join(directory, f"{profile}.sqlite3")
+        shutil.copyfile(seeded, db_path)
+        results[profile] = result = run(profile, {"default": db_path}, args)
+        print(
+            f"{profile:>10}: {result['reads_per_s']:8.1f} reads/s "
+            f"(p95 {result['read_p95_ms']:6.1f}ms), "
+            f"{result['writes_per_s']:7.1f} writes/s "
+            f"(p95 {result['write_p95_ms']:6.1f}ms), "
+            f"{result['locked']} locked, {result['failed']} failed"
+        )
+    default, production = results["default"], results["production"]
+    print("production / default: " + ", ".join(
+        f"{kind} x{production[key] / max(default[key], 1e-9):.2f}"
+        for kind, key in [("reads", "reads_per_s"), ("writes", "writes_per_s")]
+    ))
+
+
+if __name__ == "__main__":
+    main()
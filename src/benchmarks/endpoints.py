@@ -0,0 +1,390 @@
+"""
+Latency, query count and peak memory of every route of `api_urls`.
+
+Seeds a throwaway database with `seed_scale` (or uses the one given
+with `--db`, seeded beforehand), then requests each route
+`--requests` times as the author of the largest project, on that
+project, its most commented issue and their most recent rows (the
+issue and the comment being written by their authors, the comment
+deleted by its author as a staff member, `/metrics/` read by a staff
+member). `GET` is measured on every route; `--writes` adds `POST`,
+`PATCH` and `DELETE`, each run in a transaction rolled back
+afterwards. Every response must be a 2xx:
+the run stops otherwise, rather than timing an error.
+
+The results are written as JSON to `--output`, and compared with a
+previous run given with `--compare`: routes whose p95 grew by more
+than `--threshold`, or running more queries, are reported and make
+the command exit with status 1.
+
+    python -m benchmarks.endpoints --issues 200000 --comments 1000000 \\
+        --output baseline.json
+    python -m benchmarks.endpoints --issues 200000 --comments 1000000 \\
+        --compare baseline.json
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from . import setup_django
+
+
+SEED_OPTIONS = [
+    "users", "projects", "max_contributors", "issues", "comments",
+    "skew", "seed",
+]
+
+# Query parameters sent to the routes needing some.
+PARAMS = {
+    "search": {"q": "word10"},
+}
+
+# Bodies of the write requests, built from the request number.
+PAYLOADS = {
+    ("user-list", "post"): lambda i, target: {
+        "username": f"bench-{i}", "password": "bench-password", "age": 30,
+    },
+    ("user-detail", "patch"): lambda i, target: {"first_name": "Bench"},
+    ("project-list", "post"): lambda i, target: {
+        "name": f"Bench project {i}", "type": "BACKEND",
+    },
+    ("project-detail", "patch"): lambda i, target: {
+        "description": "Benchmarked",
+    },
+    ("project_contributors-list", "post"): lambda i, target: {
+        "user": target.outsider_id,
+    },
+    ("project_issues-list", "post"): lambda i, target: {
+        "title": f"Bench issue {i}", "label": "BUG", "priority": "LOW",
+        "status": "TODO",
+    },
+    ("project_issues-detail", "patch"): lambda i, target: {
+        "status": "IN_PROGRESS",
+    },
+    ("issue_comments-list", "post"): lambda i, target: {
+        "content": f"Bench comment {i}",
+    },
+    ("issue_comments-detail", "patch"): lambda i, target: {
+        "content": "Benchmarked",
+    },
+}
+
+# Attributes of `Target` holding the user sending the requests of a
+# route and method, other than the author of the project.
+USERS = {
+    ("project_issues-detail", "patch"): "issue_author",
+    ("project_issues-detail", "delete"): "issue_author",
+    ("issue_comments-detail", "patch"): "comment_author",
+    ("issue_comments-detail", "delete"): "comment_deleter",
+    ("metrics", "get"): "staff",
+}
+
+
+class Target:
+    """
+    Objects the routes are requested on.
+    """
+
+    def __init__(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models import Count
+        from projects.models import Project, Contributor, Issue, Comment
+
+        largest = Issue.objects.values("project_id").annotate(
+            count=Count("id")
+        ).order_by("-count").first()
+        if largest is None:
+            raise SystemExit("The database has no issue: seed it first.")
+        self.project_id = largest["project_id"]
+        self.user = Project.objects.get(pk=self.project_id).author
+
+        # Issues and comments written by the user if any, their
+        # writes being sent by their authors otherwise (see `USERS`).
+        User = get_user_model()
+        issues = Issue.objects.filter(project_id=self.project_id)
+        issues = issues.filter(author=self.user) or issues
+        self.issue_id, issue_author_id = issues.annotate(
+            count=Count("comments")
+        ).order_by("-count").values_list("id", "author_id").first()
+        self.issue_author = User.objects.get(pk=issue_author_id)
+        comments = Comment.objects.filter(issue_id=self.issue_id)
+        comments = comments.filter(author=self.user) or comments
+        self.comment_id, comment_author_id = comments.order_by(
+            "-created_time"
+        ).values_list("id", "author_id").first() or (None, None)
+        self.comment_author = (
+            User.objects.get(pk=comment_author_id)
+            if comment_author_id else self.user
+        )
+        # An existing staff member, or else the author flagged as one
+        # in memory only, for the dataset to stay untouched.
+        self.staff = User.objects.filter(is_staff=True).first()
+        if self.staff is None:
+            self.staff = copy.copy(self.user)
+            self.staff.is_staff = True
+        # Comments are deleted by their authors if staff members.
+        self.comment_deleter = copy.copy(self.comment_author)
+        self.comment_deleter.is_staff = True
+
+        links = Contributor.objects.filter(project_id=self.project_id)
+        self.contributor_id = (
+            links.exclude(user=self.user).values_list("id", flat=True).first()
+            or links.values_list("id", flat=True).first()
+        )
+        self.outsider_id = User.objects.exclude(
+            contribution_links__project_id=self.project_id
+        ).values_list("id", flat=True).first()
+
+    def kwargs(self, name, parameters):
+        values = {
+            "project_pk": self.project_id,
+            "issue_pk": self.issue_id,
+            "pk": {
+                "user": self.user.id,
+                "project": self.project_id,
+                "project_contributors": self.contributor_id,
+                "project_issues": self.issue_id,
+                "issue_comments": self.comment_id,
+            }.get(name.rsplit("-", 1)[0]),
+        }
+        return {parameter: values[parameter] for parameter in parameters}
+
+
+def get_routes():
+    """
+    Yields `(name, parameters, methods)` for each named route of
+    `api_urls`, without the format suffixed variants.
+    """
+    from django.urls import URLResolver
+    import api_urls
+
+    seen = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+                continue
+            parameters = list(pattern.pattern.regex.groupindex)
+            if not pattern.name or "format" in parameters:
+                continue
+            if pattern.name in seen:
+                continue
+            seen.add(pattern.name)
+            actions = getattr(pattern.callback, "actions", None)
+            methods = list(actions) if actions else ["get"]
+            yield pattern.name, parameters, methods
+
+    yield from walk(api_urls.urlpatterns)
+
+
+def percentile(durations, ratio):
+    return durations[min(len(durations) - 1, int(len(durations) * ratio))]
+
+
+def measure(client, method, url, params, repeat, write):
+    """
+    Returns the status, latency percentiles, query count and peak
+    memory of `repeat` requests, each of which must succeed.
+    """
+    from django.db import connection, transaction
+
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    def request(i):
+        data = params(i) if write else params
+        with transaction.atomic():
+            response = getattr(client, method)(
+                url, data, format="json" if write else None
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+        if not 200 <= response.status_code < 300:
+            raise SystemExit(
+                f"{method.upper()} {url} returned "
+                f"{response.status_code}: no timing recorded."
+            )
+        return response
+
+    request(-1)
+    durations = []
+    with connection.execute_wrapper(count_queries):
+        for i in range(repeat):
+            start = time.perf_counter()
+            response = request(i)
+            durations.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    request(repeat)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "url": url,
+        "status": response.status_code,
+        "p50_ms": round(percentile(durations, 0.5), 3),
+        "p95_ms": round(percentile(durations, 0.95), 3),
+        "p99_ms": round(percentile(durations, 0.99), 3),
+        "max_ms": round(durations[-1], 3),
+        "queries": queries / repeat,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    # Failed requests stop the run (see `measure`): the warnings
+    # logged by the middlewares would only clutter the output.
+    logging.disable(logging.WARNING)
+    target = Target()
+    client = APIClient(SERVER_NAME="localhost")
+
+    results = {}
+    for name, parameters, methods in get_routes():
+        url = reverse(name, kwargs=target.kwargs(name, parameters))
+        for method in methods:
+            write = method != "get"
+            if write and not args.writes:
+                continue
+            if method == "put":
+                continue
+            if write and method != "delete":
+                if (name, method) not in PAYLOADS:
+                    continue
+                payload = PAYLOADS[(name, method)]
+                params = (lambda payload: lambda i: payload(i, target))(
+                    payload
+                )
+            else:
+                params = (lambda i: {}) if write else PARAMS.get(name, {})
+            client.force_authenticate(
+                getattr(target, USERS.get((name, method), "user"))
+            )
+            key = f"{method.upper()} {name}"
+            results[key] = measure(
+                client, method, url, params, args.requests, write
+            )
+            result = results[key]
+            print(
+                f"{key:<38} {result['status']} "
+                f"p50 {result['p50_ms']:8.1f}ms "
+                f"p95 {result['p95_ms']:8.1f}ms "
+                f"{result['queries']:5.1f} queries "
+                f"{result['peak_memory_kb']:9.1f} KiB"
+            )
+    return results
+
+
+def dataset():
+    from django.contrib.auth import get_user_model
+    from projects.models import Project, Contributor, Issue, Comment
+
+    return {
+        model.__name__: model.objects.count()
+        for model in [get_user_model(), Project, Contributor, Issue, Comment]
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the routes slower, or running more queries, than in the
+    baseline, and returns their number.
+    """
+    regressions = 0
+    for key, result in results.items():
+        previous = baseline["routes"].get(key)
+        if previous is None:
+            continue
+        slower = (
+            result["p95_ms"] > previous["p95_ms"] * threshold
+            and result["p95_ms"] - previous["p95_ms"] > 1
+        )
+        more_queries = result["queries"] > previous["queries"]
+        if slower or more_queries:
+            regressions += 1
+            print(
+                f"REGRESSION {key}: p95 {previous['p95_ms']:.1f}ms -> "
+                f"{result['p95_ms']:.1f}ms, queries "
+                f"{previous['queries']:g} -> {result['queries']:g}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--db", help="SQLite database to use; seeded if it does not exist."
+    )
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--max-contributors", type=int, default=50)
+    parser.add_argument("--issues", type=int, default=20_000)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--writes", action="store_true")
+    parser.add_argument("--output", help="File the results are written to.")
+    parser.add_argument("--compare", help="Results of a previous run.")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    seed = not (args.db and os.path.exists(args.db))
+    setup_django(args.db)
+    if seed:
+        from django.core.management import call_command
+        call_command("seed_scale", **{
+            option: getattr(args, option) for option in SEED_OPTIONS
+        })
+
+    results = run(args)
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "dataset": dataset(),
+        "requests": args.requests,
+        "routes": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("dataset") != report["dataset"]:
+            print("Warning: the baseline was run on another dataset.")
+        if compare(results, baseline, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
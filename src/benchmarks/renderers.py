@@ -0,0 +1,115 @@
+"""
+Rendering throughput of large issue and comment lists.
+
+Serializes and renders `--rows` issues (`IssueDetailSerializer`) and
+comments (`CommentSerializer`) with DRF's `JSONRenderer` and
+`DateTimeField`, then with `FastJSONRenderer` and `FastDateTimeField`,
+checks that both outputs are identical and prints the time spent in
+each step and the bytes produced per second.
+
+    python -m benchmarks.renderers --rows 100000
+"""
+import argparse
+import datetime
+import statistics
+import time
+
+from . import setup_django
+
+
+def build_rows(rows):
+    from django.utils import timezone
+    from projects.models import Issue, Comment
+
+    start = timezone.now()
+    issues = []
+    comments = []
+    for i in range(rows):
+        created_time = start - datetime.timedelta(seconds=i * 37)
+        issue = Issue(
+            id=i + 1,
+            title=f"Issue {i} — rendering",
+            description="Steps to reproduce:\n1. open\n2. click",
+            project_id=1,
+            author_id=1,
+            assignee_id=None if i % 3 else 1,
+            priority="LOW",
+            label="BUG",
+            created_time=created_time,
+        )
+        issue.comments_count = i % 7
+        issues.append(issue)
+        comments.append(Comment(
+            issue_id=i + 1,
+            author_id=1,
+            content=f"Comment {i}: « ça marche »   😀",
+            created_time=created_time,
+        ))
+    return issues, comments
+
+
+def stock_serializer(serializer_class):
+    """
+    Returns a subclass of `serializer_class` using DRF's field
+    mapping, i.e. its `DateTimeField`.
+    """
+    from rest_framework import serializers
+
+    return type(serializer_class.__name__, (serializer_class,), {
+        "serializer_field_mapping":
+            serializers.ModelSerializer.serializer_field_mapping,
+    })
+
+
+def timed(function, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        durations.append(time.perf_counter() - start)
+    return output, statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from projects.serializers import IssueDetailSerializer, CommentSerializer
+    from rest_framework.renderers import JSONRenderer
+    from soft_desk_support.renderers import FastJSONRenderer
+
+    issues, comments = build_rows(args.rows)
+    for label, serializer_class, instances in [
+        ("issues", IssueDetailSerializer, issues),
+        ("comments", CommentSerializer, comments),
+    ]:
+        results = {}
+        for name, serializer, renderer in [
+            ("JSONRenderer", stock_serializer(serializer_class),
+             JSONRenderer()),
+            ("FastJSONRenderer", serializer_class, FastJSONRenderer()),
+        ]:
+            data, serialize = timed(
+                lambda: serializer(instances, many=True).data, args.repeat
+            )
+            output, render = timed(
+                lambda: renderer.render(data), args.repeat
+            )
+            results[name] = output
+            print(
+                f"{label:>8} {name:>16}: "
+                f"serialize {serialize * 1000:6.0f}ms, "
+                f"render {render * 1000:5.0f}ms "
+                f"({len(output) / render / 2 ** 20:6.1f} MiB/s), "
+                f"total {len(output) / (serialize + render) / 2 ** 20:5.1f}"
+                f" MiB/s"
+            )
+        assert results["JSONRenderer"] == results["FastJSONRenderer"]
+
+
+if __name__ == "__main__":
+    main()
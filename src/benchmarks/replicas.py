@@ -0,0 +1,79 @@
+"""
+Read throughput with 0 to `--replicas` read replicas (see
+`soft_desk_support.routers`).
+
+Seeds a database with a project holding `--issues` issues, then, for
+each replica count, runs `--readers` processes listing the issues
+and `--writers` processes creating comments for `--duration`
+seconds, on copies of it. The replicas are refreshed from the
+primary every `--sync-interval` seconds, like
+`python manage.py sync_replicas --interval` would.
+
+    python -m benchmarks.replicas --replicas 3 --readers 6 --writers 2
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from soft_desk_support.database import copy_database
+
+from . import setup_django
+from .database import run, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--sync-interval", type=float, default=1.0)
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument(
+        "--profile", default="default", choices=["default", "production"]
+    )
+    args = parser.parse_args()
+
+    seeded = setup_django()
+    seed(args.issues)
+    from django.db import connections
+    connections.close_all()
+
+    write_ratios = [0.0] * args.readers + [1.0] * args.writers
+    baseline = None
+    for count in range(args.replicas + 1):
+        directory = tempfile.mkdtemp(prefix="softdesk-bench-")
+        databases = {"default": os.path.join(directory, "primary.sqlite3")}
+        shutil.copyfile(seeded, databases["default"])
+        for index in range(1, count + 1):
+            databases[f"replica{index}"] = os.path.join(
+                directory, f"replica{index}.sqlite3"
+            )
+            copy_database(databases["default"], databases[f"replica{index}"])
+
+        def sync():
+            for alias, path in databases.items():
+                if alias != "default":
+                    copy_database(databases["default"], path)
+
+        result = run(
+            args.profile, databases, args, write_ratios,
+            sync if count else None
+        )
+        baseline = baseline or max(result["reads_per_s"], 1e-9)
+        print(
+            f"{count} replica(s): {result['reads_per_s']:8.1f} reads/s "
+            f"(x{result['reads_per_s'] / baseline:.2f}, "
+            f"p95 {result['read_p95_ms']:6.1f}ms), "
+            f"{result['writes_per_s']:7.1f} writes/s, "
+            f"{result['locked']} locked, {result['failed']} failed"
+        )
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
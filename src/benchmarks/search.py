@@ -0,0 +1,140 @@
+"""
+Full-text search latency on a large number of comments.
+
+Populates `--comments` comments (spread over `--issues` issues of
+`--projects` projects) with text drawn from a Zipf-like vocabulary,
+then times `projects.search.search` and the `?q=` filter of the
+comments list for rare, medium and frequent terms.
+
+    python -m benchmarks.search --comments 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from . import setup_django
+
+
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def sentence(rng, length=12):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=length))
+
+
+def populate(user, projects, issues, comments, batch_size=20_000):
+    from projects.models import Project, Contributor, Issue, Comment
+
+    rng = random.Random(0)
+    project_rows = Project.objects.bulk_create([
+        Project(name=f"Project {i}", type="BACKEND", author=user)
+        for i in range(projects)
+    ])
+    Contributor.objects.bulk_create([
+        Contributor(user=user, project=project)
+        for project in project_rows
+    ])
+    issue_ids = []
+    for start in range(0, issues, batch_size):
+        issue_ids.extend(issue.id for issue in Issue.objects.bulk_create([
+            Issue(
+                title=sentence(rng, 6),
+                description=sentence(rng),
+                project=project_rows[i % projects],
+                author=user,
+                priority="LOW",
+                label="BUG",
+            )
+            for i in range(start, min(issues, start + batch_size))
+        ]))
+    for start in range(0, comments, batch_size):
+        Comment.objects.bulk_create([
+            Comment(
+                issue_id=issue_ids[i % issues],
+                author=user,
+                content=sentence(rng),
+            )
+            for i in range(start, min(comments, start + batch_size))
+        ], batch_size=1000)
+    return project_rows, issue_ids
+
+
+def timed(function, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return (
+        statistics.median(durations),
+        durations[int(len(durations) * 0.95) - 1],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--issues", type=int, default=20_000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--member-of", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from projects.models import Comment
+    from projects.search import FullTextSearchFilter, search
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    user = get_user_model().objects.create_user(
+        username="bench", password="bench-password", age=30
+    )
+    start = time.perf_counter()
+    projects, issue_ids = populate(
+        user, args.projects, args.issues, args.comments
+    )
+    print(
+        f"populated {args.comments} comments on {args.issues} issues "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    project_ids = [project.id for project in projects[:args.member_of]]
+    factory = APIRequestFactory()
+    for label, term in [
+        ("rare", VOCABULARY[-1]),
+        ("medium", VOCABULARY[500]),
+        ("frequent", VOCABULARY[5]),
+        ("two terms", f"{VOCABULARY[50]} {VOCABULARY[60]}"),
+    ]:
+        median, p95 = timed(
+            lambda: search(term, project_ids, limit=11), args.repeat
+        )
+        print(
+            f"{label:>10} /api/search/: "
+            f"median {median:6.1f}ms, p95 {p95:6.1f}ms"
+        )
+        request = Request(factory.get("/", {"q": term}))
+        view = SimpleNamespace(kwargs={"issue_pk": str(issue_ids[0])})
+        queryset = Comment.objects.filter(issue_id=issue_ids[0])
+        median, p95 = timed(
+            lambda: list(
+                FullTextSearchFilter().filter_queryset(
+                    request, queryset, view
+                ).order_by("-created_time", "-id")[:11]
+            ),
+            args.repeat
+        )
+        print(
+            f"{label:>10} ?q= on an issue: "
+            f"median {median:6.1f}ms, p95 {p95:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
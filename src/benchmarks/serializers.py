@@ -0,0 +1,116 @@
+"""
+Serialization time of 1k-row list pages, with the list serializers
+and with their compiled form (see `soft_desk_support.serializers`).
+
+Populates `--rows` issues, comments and users, then times, for each
+list serializer, fetching and serializing `--page-size` rows both
+ways, and checks that the rendered outputs are identical.
+
+    python -m benchmarks.serializers --rows 5000 --page-size 1000
+"""
+import argparse
+import statistics
+import time
+
+from . import setup_django
+
+
+def populate(rows):
+    from django.contrib.auth import get_user_model
+    from projects.models import Project, Contributor, Issue, Comment
+
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(username=f"user{i}", age=30) for i in range(rows)
+    ])
+    author = users[0]
+    projects = Project.objects.bulk_create([
+        Project(
+            name=f"Project {i}", type="BACKEND", author=author,
+            description=f"Description {i}"
+        )
+        for i in range(rows)
+    ])
+    Contributor.objects.bulk_create([
+        Contributor(user=author, project=project) for project in projects
+    ])
+    issues = Issue.objects.bulk_create([
+        Issue(
+            title=f"Issue {i}", project=projects[0], author=author,
+            priority="LOW", label="BUG"
+        )
+        for i in range(rows)
+    ])
+    Comment.objects.bulk_create([
+        Comment(issue=issues[0], author=author, content=f"Comment {i}")
+        for i in range(rows)
+    ])
+    return author, projects[0], issues[0]
+
+
+def timed(function, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return output, statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from projects.models import Project, Issue, Comment
+    from projects.serializers import (
+        ProjectListSerializer, IssueListSerializer, CommentSerializer
+    )
+    from soft_desk_support.renderers import FastJSONRenderer
+    from soft_desk_support.serializers import get_values_serializer
+    from user.models import User
+    from user.serializers import UserListSerializer
+
+    author, project, issue = populate(args.rows)
+    size = args.page_size
+    renderer = FastJSONRenderer()
+    for serializer_class, queryset in [
+        (ProjectListSerializer, Project.objects.filter(
+            contributor_links__user=author
+        ).order_by("id")),
+        (IssueListSerializer, Issue.objects.filter(
+            project=project
+        ).with_comments_count().order_by("id")),
+        (CommentSerializer, Comment.objects.filter(
+            issue=issue
+        ).order_by("-created_time", "-id")),
+        (UserListSerializer, User.objects.order_by("-date_joined", "-id")),
+    ]:
+        values_serializer = get_values_serializer(serializer_class)
+        expected, serializer_time = timed(
+            lambda: serializer_class(
+                list(queryset[:size]), many=True
+            ).data,
+            args.repeat
+        )
+        output, values_time = timed(
+            lambda: values_serializer.serialize(
+                list(values_serializer.values(queryset)[:size])
+            ),
+            args.repeat
+        )
+        assert renderer.render(output) == renderer.render(expected)
+        print(
+            f"{serializer_class.__name__:>22} ({len(output)} rows): "
+            f"serializer {serializer_time:6.1f}ms, "
+            f"compiled {values_time:6.1f}ms "
+            f"(x{serializer_time / values_time:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Refresh throughput with a large token blacklist.
+
+Compares simplejwt's `TokenRefreshSerializer` with
+`authentication.serializers.IndexedTokenRefreshSerializer` on a
+database holding `--tokens` outstanding tokens, `--blacklisted`
+of them (as a ratio) being blacklisted.
+
+    python -m benchmarks.token_refresh --tokens 1000000
+"""
+import argparse
+import time
+import uuid
+from datetime import timedelta
+
+from . import setup_django
+
+
+def populate(user, tokens, blacklisted, batch_size=20_000):
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import (
+        BlacklistedToken, OutstandingToken
+    )
+
+    now = timezone.now()
+    expires_at = now + timedelta(days=7)
+    blacklisted_count = int(tokens * blacklisted)
+    created = 0
+    while created < tokens:
+        count = min(batch_size, tokens - created)
+        rows = OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                user_id=user.id,
+                jti=uuid.uuid4().hex,
+                token="-",
+                created_at=now,
+                expires_at=expires_at,
+            )
+            for _ in range(count)
+        ])
+        to_blacklist = max(0, min(count, blacklisted_count - created))
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token_id=row.id)
+            for row in rows[:to_blacklist]
+        ])
+        created += count
+
+
+def run(serializer_class, user, refreshes):
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    tokens = [str(RefreshToken.for_user(user)) for _ in range(refreshes)]
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        start = time.perf_counter()
+        for token in tokens:
+            serializer = serializer_class(data={"refresh": token})
+            serializer.is_valid(raise_exception=True)
+        elapsed = time.perf_counter() - start
+    return refreshes / elapsed, queries / refreshes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--blacklisted", type=float, default=0.9)
+    parser.add_argument("--refreshes", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+    from authentication.revocation import revocation_index
+    from authentication.serializers import IndexedTokenRefreshSerializer
+
+    user = get_user_model().objects.create_user(
+        username="bench", password="bench-password", age=30
+    )
+
+    start = time.perf_counter()
+    populate(user, args.tokens, args.blacklisted)
+    print(
+        f"populated {args.tokens} outstanding tokens "
+        f"({args.blacklisted:.0%} blacklisted) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    start = time.perf_counter()
+    revocation_index.load()
+    print(f"revocation index loaded in {time.perf_counter() - start:.2f}s")
+
+    for name, serializer_class in [
+        ("simplejwt", TokenRefreshSerializer),
+        ("indexed", IndexedTokenRefreshSerializer),
+    ]:
+        throughput, queries = run(serializer_class, user, args.refreshes)
+        print(
+            f"{name:>10}: {throughput:8.1f} refreshes/s, "
+            f"{queries:.1f} queries/refresh"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from django.contrib import admin
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+
+from .models import SlowQuery
+from .slow_queries import get_threshold, slow_query_log
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """
+    Lists the slow query log of the process serving the page,
+    most recent first; a POST clears it, for the users allowed to
+    delete slow queries.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_clear_permission(self, request):
+        # Not `has_delete_permission`, which would enable the delete
+        # views of the admin on a model without a table.
+        opts = self.opts
+        codename = get_permission_codename("delete", opts)
+        return request.user.has_perm(f"{opts.app_label}.{codename}")
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            return super().changelist_view(request, extra_context)
+        if request.method == "POST" and "clear" in request.POST:
+            if not self.has_clear_permission(request):
+                raise PermissionDenied
+            slow_query_log.clear()
+            return HttpResponseRedirect(request.path)
+
+        threshold = get_threshold()
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Slow queries",
+            "opts": self.model._meta,
+            "entries": slow_query_log.all(),
+            "threshold_ms": None if threshold is None else threshold * 1000,
+            "size": slow_query_log.size,
+            "can_clear": self.has_clear_permission(request),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(
+            request, "admin/monitoring/slowquery/change_list.html", context
+        )
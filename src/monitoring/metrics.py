@@ -0,0 +1,328 @@
+"""
+In-process metrics of the API, exposed in the Prometheus text format.
+
+`registry` holds counters and histograms, each series being
+identified by the metric name and its labels:
+
+- `softdesk_requests_total` and `softdesk_request_duration_seconds`,
+by resolved route name (`user-list`, `project_issues-detail`, ...),
+method and status, recorded by `MetricsMiddleware`;
+- `softdesk_db_queries_total`, the SQL queries run by each route;
+- `softdesk_cache_requests_total`, the hits and misses of the
+response, membership and user status caches;
+- `softdesk_token_refreshes_total`, the successful and rejected
+token refreshes.
+
+Each process counts in memory. When `METRICS_DIR` is set, it also
+writes its series to its own file of that directory, at most every
+`METRICS_FLUSH_INTERVAL` seconds, and `/api/metrics/` adds up the
+files of every process: the directory must be shared by the workers
+and emptied when the server (re)starts, like `prometheus_client`'s
+multiprocess directory. Without it, only the serving process is
+reported.
+"""
+import json
+import os
+import tempfile
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+METRICS = {
+    "softdesk_requests_total": (
+        COUNTER, "HTTP requests, by route, method and status."
+    ),
+    "softdesk_request_duration_seconds": (
+        HISTOGRAM, "Duration of the HTTP requests, by route and method."
+    ),
+    "softdesk_db_queries_total": (
+        COUNTER, "SQL queries run by the requests, by route."
+    ),
+    "softdesk_cache_requests_total": (
+        COUNTER, "Cache lookups, by cache and result (hit or miss)."
+    ),
+    "softdesk_token_refreshes_total": (
+        COUNTER, "Refresh token requests, by result."
+    ),
+}
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def get_buckets():
+    return tuple(
+        getattr(settings, "METRICS_LATENCY_BUCKETS", DEFAULT_BUCKETS)
+    )
+
+
+class Registry:
+    """
+    Counters and histograms of one process, optionally written to a
+    file shared with the other processes (see the module docstring).
+
+    Histograms are stored as the count of each bucket (not
+    cumulative), followed by the sum and count of the observations.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the series of this process, e.g. in a forked worker.
+        """
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.buckets = get_buckets()
+            self.file_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            self.last_flush = time.monotonic()
+
+    @property
+    def directory(self):
+        return getattr(settings, "METRICS_DIR", None)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = (
+                    [0] * (len(self.buckets) + 1) + [0.0, 0]
+                )
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        """
+        Returns the series of this process, in a JSON serializable
+        form.
+        """
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(histogram)]
+                    for (name, labels), histogram
+                    in self.histograms.items()
+                ],
+            }
+
+    def _maybe_flush(self):
+        if (
+            self.directory
+            and time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the series of this process to its file, atomically.
+        """
+        directory = self.directory
+        if not directory:
+            return
+        self.last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path, os.path.join(directory, self.file_name))
+
+    def collect(self):
+        """
+        Returns the snapshots of every process sharing the directory,
+        this one's being read from memory.
+        """
+        snapshots = [self.snapshot()]
+        directory = self.directory
+        if directory and os.path.isdir(directory):
+            for path in Path(directory).glob("*.json"):
+                if path.name == self.file_name:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # Removed, or being replaced, meanwhile.
+                    continue
+        return snapshots
+
+
+def merge(snapshots):
+    """
+    Adds up the series of several snapshots.
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        buckets = tuple(snapshot["buckets"])
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)), buckets)
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(values)
+            else:
+                histograms[key] = [a + b for a, b in zip(total, values)]
+    return counters, histograms
+
+
+def escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{escape(value)}"' for name, value in labels
+    ) + "}"
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render(snapshots):
+    """
+    Returns the merged snapshots in the Prometheus text format.
+    """
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == COUNTER:
+            for (series, labels), value in sorted(counters.items()):
+                if series == name:
+                    lines.append(
+                        f"{name}{format_labels(labels)} "
+                        f"{format_value(value)}"
+                    )
+            continue
+        for (series, labels, buckets), values in sorted(histograms.items()):
+            if series != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(
+                [*map(format_value, buckets), "+Inf"], values
+            ):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket"
+                    f"{format_labels((*labels, ('le', bound)))} {cumulative}"
+                )
+            lines.append(
+                f"{name}_sum{format_labels(labels)} "
+                f"{format_value(values[-2])}"
+            )
+            lines.append(
+                f"{name}_count{format_labels(labels)} {values[-1]}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry.reset)
+
+
+def record_cache_lookup(cache, hit):
+    if getattr(settings, "METRICS_ENABLED", True):
+        registry.inc(
+            "softdesk_cache_requests_total",
+            cache=cache, result="hit" if hit else "miss"
+        )
+
+
+def record_token_refresh(result):
+    if getattr(settings, "METRICS_ENABLED", True):
+        registry.inc("softdesk_token_refreshes_total", result=result)
+
+
+class QueryCounter:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Records the count, duration and SQL queries of every request, by
+    resolved route name (`METRICS_ENABLED`).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        route = match.view_name if match else "unresolved"
+        registry.inc(
+            "softdesk_requests_total",
+            route=route, method=request.method,
+            status=str(response.status_code)
+        )
+        registry.observe(
+            "softdesk_request_duration_seconds", duration,
+            route=route, method=request.method
+        )
+        if queries.count:
+            registry.inc(
+                "softdesk_db_queries_total", queries.count, route=route
+            )
+        return response
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Placeholder model listing the in-memory slow query log
+    (`monitoring.slow_queries`) in the admin; it has no table.
+    """
+
+    class Meta:
+        managed = False
+        verbose_name = "slow query"
+        verbose_name_plural = "slow queries"
+        default_permissions = ("view", "delete")
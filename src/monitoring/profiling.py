@@ -0,0 +1,201 @@
+"""
+Profiling of sampled requests, under real traffic.
+
+`ProfilingMiddleware` profiles:
+
+- a fraction of the requests to the routes of `PROFILING_ROUTES`,
+e.g. `{"project-detail": 0.01}` for 1% of the project retrievals;
+- the requests of staff members sending an `X-Profile` header, whose
+value picks the profiler (`cprofile` or `sampling`, defaulting to
+`PROFILING_MODE`). Their response tells the name of the profile in
+an `X-Profile` header.
+
+Two profilers are available (`PROFILING_MODE`):
+
+- `cprofile` records every call with `cProfile`, and writes a
+`.pstats` file, read with `python -m pstats` or snakeviz;
+- `sampling` records the stack of the request thread every
+`PROFILING_INTERVAL` seconds from another thread, which costs far
+less on deep call trees, and writes a `.collapsed` file (one
+`frame;frame;frame count` line per stack), read with flamegraph.pl
+or speedscope.
+
+Profiles cover the view and the rendering of the response, and are
+written to `PROFILING_DIR`, only the `PROFILING_RETENTION` most
+recent ones being kept.
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+HEADER = "X-Profile"
+MODES = ("cprofile", "sampling")
+
+
+class CProfileProfiler:
+    suffix = ".pstats"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the calling thread from a daemon thread.
+    """
+    suffix = ".collapsed"
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{frame.f_globals.get('__name__', '?')}."
+                    f"{code.co_qualname}"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def save(self, path):
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def profiling_settings():
+    return {
+        "routes": getattr(settings, "PROFILING_ROUTES", {}),
+        "mode": getattr(settings, "PROFILING_MODE", "cprofile"),
+        "directory": getattr(settings, "PROFILING_DIR", None),
+        "retention": getattr(settings, "PROFILING_RETENTION", 100),
+        "interval": getattr(settings, "PROFILING_INTERVAL", 0.005),
+    }
+
+
+def is_staff_request(request):
+    """
+    Authenticates the request like the API views, which happens
+    after the middlewares otherwise.
+    """
+    authenticated = Request(request, authenticators=[
+        authentication()
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return bool(authenticated.user.is_staff)
+    except APIException:
+        return False
+
+
+def apply_retention(directory, retention):
+    """
+    Deletes the oldest profiles beyond the `retention` most recent.
+    """
+    profiles = sorted(
+        (
+            path for path in Path(directory).iterdir()
+            if path.suffix in (".pstats", ".collapsed")
+        ),
+        key=lambda path: path.name
+    )
+    for path in profiles[:max(len(profiles) - retention, 0)]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the sampled requests (see the module docstring).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        profiler = getattr(request, "_profiler", None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        name = self.save(profiler, request.resolver_match.view_name)
+        if request._profile_requested:
+            response[HEADER] = name
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        options = profiling_settings()
+        if not options["directory"]:
+            return None
+        requested = request.headers.get(HEADER)
+        mode = options["mode"]
+        if requested:
+            if not is_staff_request(request):
+                return None
+            if requested in MODES:
+                mode = requested
+        else:
+            rate = options["routes"].get(request.resolver_match.view_name)
+            if not rate or random.random() >= rate:
+                return None
+
+        if mode == "sampling":
+            profiler = SamplingProfiler(options["interval"])
+        else:
+            profiler = CProfileProfiler()
+        request._profiler = profiler
+        request._profile_requested = bool(requested)
+        profiler.start()
+        return None
+
+    def save(self, profiler, route):
+        options = profiling_settings()
+        directory = options["directory"]
+        name = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{route or 'unnamed'}-"
+            f"{os.getpid()}-{uuid.uuid4().hex[:8]}{profiler.suffix}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        profiler.save(os.path.join(directory, name))
+        apply_retention(directory, options["retention"])
+        return name
@@ -0,0 +1,198 @@
+"""
+In-memory log of the slow SQL queries of the API.
+
+`SlowQueryMiddleware` installs, for every request, an execution
+wrapper (`connection.execute_wrapper`) on each database connection,
+timing every query, when `SLOW_QUERY_THRESHOLD_MS` is set (it is
+off by default). The successful queries lasting that long or more
+are kept in `slow_query_log`, a ring buffer of the last
+`SLOW_QUERY_LOG_SIZE` ones, with:
+
+- the SQL and its parameters;
+- the route name and the viewset action of the request;
+- a summary of the stack, limited to the frames of the project;
+- the query plan (`EXPLAIN QUERY PLAN` on SQLite, `EXPLAIN`
+otherwise) of the `SELECT` queries, unless `SLOW_QUERY_EXPLAIN` is
+unset. The plan is computed right after the query, on the same
+connection, so it reflects the indexes the query could use, e.g.
+the ones missing for a `filterset_fields` filter.
+
+The log is kept by each process and listed in the Django admin
+(Monitoring > Slow queries) by the process serving the page; clearing
+it requires the permission to delete slow queries.
+"""
+import time
+import traceback
+from collections import deque
+from contextlib import ExitStack
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+
+PROJECT_DIR = str(Path(__file__).resolve().parent.parent)
+MONITORING_DIR = str(Path(__file__).resolve().parent)
+
+MAX_PARAM_LENGTH = 200
+MAX_STACK_FRAMES = 8
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of the slow queries of this process, most recent
+    last.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.entries = deque(maxlen=self.size)
+
+    @property
+    def size(self):
+        return getattr(settings, "SLOW_QUERY_LOG_SIZE", 200)
+
+    def add(self, entry):
+        with self._lock:
+            if self.entries.maxlen != self.size:
+                self.entries = deque(self.entries, maxlen=self.size)
+            self.entries.append(entry)
+
+    def all(self):
+        """
+        Returns the entries, most recent first.
+        """
+        with self._lock:
+            return list(reversed(self.entries))
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def get_threshold():
+    """
+    Returns the threshold in seconds, or None if disabled.
+    """
+    threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+    return None if threshold is None else threshold / 1000
+
+
+def summarize_stack():
+    """
+    Returns the innermost frames of the project calling the query,
+    as `path:line in function` strings.
+    """
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_DIR)
+        and not frame.filename.startswith(MONITORING_DIR)
+    ]
+    return [
+        f"{frame.filename[len(PROJECT_DIR) + 1:]}:{frame.lineno} "
+        f"in {frame.name}"
+        for frame in frames[-MAX_STACK_FRAMES:]
+    ]
+
+
+def format_params(params):
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        params = params.items()
+    return [repr(param)[:MAX_PARAM_LENGTH] for param in params]
+
+
+class SlowQueryRecorder:
+    """
+    Execution wrapper recording the slow queries of one request.
+    """
+
+    def __init__(self, threshold, route=None, action=None):
+        self.threshold = threshold
+        self.route = route
+        self.action = action
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self.record(sql, params, many, context, duration)
+        return result
+
+    def explain(self, connection, sql, params):
+        if not getattr(settings, "SLOW_QUERY_EXPLAIN", True):
+            return None
+        keyword = sql.lstrip()[:6].upper()
+        if not keyword.startswith(("SELECT", "WITH")):
+            return None
+        prefix = (
+            "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite"
+            else "EXPLAIN"
+        )
+        self.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                return [
+                    " ".join(str(column) for column in row)
+                    for row in cursor.fetchall()
+                ]
+        except DatabaseError as error:
+            return [f"EXPLAIN failed: {error}"]
+        finally:
+            self.explaining = False
+
+    def record(self, sql, params, many, context, duration):
+        connection = context["connection"]
+        slow_query_log.add({
+            "time": timezone.now(),
+            "duration_ms": round(duration * 1000, 3),
+            "alias": connection.alias,
+            "sql": sql,
+            "params": [] if many else format_params(params),
+            "many": many,
+            "route": self.route,
+            "action": self.action,
+            "stack": summarize_stack(),
+            "plan": None if many else self.explain(connection, sql, params),
+        })
+
+
+class SlowQueryMiddleware:
+    """
+    Records the slow queries of every request (see the module
+    docstring).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = get_threshold()
+        if threshold is None:
+            return self.get_response(request)
+
+        recorder = SlowQueryRecorder(threshold)
+        request._slow_query_recorder = recorder
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, "_slow_query_recorder", None)
+        if recorder is not None:
+            recorder.route = request.resolver_match.view_name
+            actions = getattr(view_func, "actions", None) or {}
+            recorder.action = actions.get(request.method.lower())
+        return None
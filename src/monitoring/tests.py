@@ -0,0 +1,399 @@
+import json
+import os
+import pstats
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+from rest_framework import status
+
+from projects.tests import ProjectsAPITestCase
+from user.models import User
+from .metrics import merge, registry, render
+from .profiling import SamplingProfiler
+from .slow_queries import SlowQueryRecorder, slow_query_log
+from .timing import NO_PHASE, RequestTimer, current_timer, phase
+
+
+class TestServerTiming(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_issues(3, comments_per_issue=2)
+        self.url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+
+    def parse(self, header):
+        metrics = {}
+        for metric in header.split(", "):
+            name, *params = metric.split(";")
+            metrics[name] = dict(param.split("=", 1) for param in params)
+        return metrics
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_timed_request(self):
+        with self.assertLogs("monitoring.timing", "INFO") as logs:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        metrics = self.parse(response["Server-Timing"])
+        for name in [
+            "auth", "permission", "queryset", "serialization", "render",
+            "db", "total",
+        ]:
+            self.assertGreaterEqual(float(metrics[name]["dur"]), 0)
+        queries = len(context.captured_queries)
+        self.assertEqual(metrics["db"]["desc"], f'"{queries} queries"')
+
+        timing = logs.records[0].timing
+        self.assertEqual(timing["route"], "project_issues-list")
+        self.assertEqual(timing["status"], 200)
+        self.assertEqual(timing["queries"], queries)
+        self.assertGreater(timing["queryset"], 0)
+        self.assertLessEqual(
+            sum(timing[name] for name in [
+                "auth", "permission", "queryset", "serialization", "render"
+            ]),
+            timing["total"]
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_writes_are_timed(self):
+        response = self.client.post(self.url, {
+            "title": "Timed", "label": "BUG", "priority": "LOW",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        metrics = self.parse(response["Server-Timing"])
+        self.assertGreater(float(metrics["queryset"]["dur"]), 0)
+
+    def test_requests_out_of_the_sample_are_not_timed(self):
+        with self.assertNoLogs("monitoring.timing", "INFO"):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+        self.assertIs(phase("queryset"), NO_PHASE)
+
+
+class TestRequestTimer(SimpleTestCase):
+
+    def test_nested_phases_are_exclusive(self):
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            with phase("serialization"):
+                with phase("queryset"):
+                    pass
+                with phase("permission"):
+                    pass
+        finally:
+            current_timer.reset(token)
+        timer.stop()
+        self.assertEqual(timer.stack, [])
+        timing = timer.as_dict()
+        self.assertAlmostEqual(
+            sum(timing[name] for name in [
+                "serialization", "queryset", "permission"
+            ]),
+            timing["total"],
+            delta=1
+        )
+
+    def test_unbalanced_phases_are_closed_on_stop(self):
+        timer = RequestTimer()
+        timer.enter("render")
+        timer.stop()
+        self.assertEqual(timer.stack, [])
+        self.assertIn("render", timer.header())
+
+
+class TestMetrics(ProjectsAPITestCase):
+
+    metrics_url = reverse_lazy("metrics")
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.create_issues(2)
+        self.url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        self.admin = User.objects.create_user(
+            username="admin", password="testpass123", age=30,
+            is_staff=True
+        )
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def test_requests_are_counted_by_route(self):
+        for _ in range(2):
+            self.client.get(self.url)
+        text = self.scrape()
+        self.assertIn(
+            'softdesk_requests_total{method="GET",'
+            'route="project_issues-list",status="200"} 2', text
+        )
+        self.assertIn(
+            'softdesk_request_duration_seconds_bucket{method="GET",'
+            'route="project_issues-list",le="+Inf"} 2', text
+        )
+        self.assertIn(
+            'softdesk_request_duration_seconds_count{method="GET",'
+            'route="project_issues-list"} 2', text
+        )
+        self.assertIn(
+            'softdesk_db_queries_total{route="project_issues-list"}', text
+        )
+        self.assertIn(
+            'softdesk_cache_requests_total{cache="memberships",'
+            'result="hit"} 1', text
+        )
+
+    def test_staff_only(self):
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_token_refreshes(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            reverse_lazy("token_refresh"), {"refresh": "invalid"},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn(
+            'softdesk_token_refreshes_total{result="rejected"} 1',
+            self.scrape()
+        )
+
+    def test_processes_are_added_up(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS_DIR=directory):
+                self.client.get(self.url)
+                registry.flush()
+                other = registry.snapshot()
+                with open(os.path.join(directory, "other.json"), "w") as file:
+                    json.dump(other, file)
+                text = self.scrape()
+        self.assertIn(
+            'softdesk_requests_total{method="GET",'
+            'route="project_issues-list",status="200"} 2', text
+        )
+
+    def test_render_is_cumulative(self):
+        snapshot = {
+            "buckets": [0.1, 1.0],
+            "counters": [],
+            "histograms": [[
+                "softdesk_request_duration_seconds",
+                [["method", "GET"], ["route", "user-list"]],
+                [1, 2, 3, 10.5, 6],
+            ]],
+        }
+        counters, histograms = merge([snapshot, snapshot])
+        self.assertEqual(list(histograms.values()), [[2, 4, 6, 21.0, 12]])
+        text = render([snapshot])
+        for line in [
+            'le="0.1"} 1', 'le="1.0"} 3', 'le="+Inf"} 6',
+            'softdesk_request_duration_seconds_sum{method="GET",'
+            'route="user-list"} 10.5',
+        ]:
+            self.assertIn(line, text)
+
+
+class TestProfiling(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse_lazy(
+            "project-detail", kwargs={"pk": self.project.pk}
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_override = override_settings(
+            PROFILING_DIR=self.directory.name
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def profiles(self):
+        return sorted(os.listdir(self.directory.name))
+
+    def test_sampled_route(self):
+        with override_settings(PROFILING_ROUTES={"project-detail": 1.0}):
+            response = self.client.get(self.url)
+            self.client.get(reverse_lazy("project-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile", response)
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertIn("-project-detail-", profiles[0])
+        stats = pstats.Stats(os.path.join(self.directory.name, profiles[0]))
+        self.assertTrue(any(
+            function == "retrieve" for _, _, function in stats.stats
+        ))
+
+    def test_staff_header(self):
+        self.author.is_staff = True
+        self.author.save()
+        response = self.client.get(self.url, HTTP_X_PROFILE="sampling")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.profiles(), [response["X-Profile"]])
+        self.assertTrue(response["X-Profile"].endswith(".collapsed"))
+
+    def test_header_is_ignored_for_other_users(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE="cprofile")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile", response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_retention(self):
+        with override_settings(
+            PROFILING_ROUTES={"project-detail": 1.0}, PROFILING_RETENTION=2
+        ):
+            for _ in range(4):
+                self.client.get(self.url)
+        self.assertEqual(len(self.profiles()), 2)
+
+
+class TestSamplingProfiler(SimpleTestCase):
+
+    def test_collapsed_stacks(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        profiler.stop()
+        self.assertTrue(profiler.stacks)
+        self.assertTrue(any(
+            "TestSamplingProfiler.test_collapsed_stacks" in stack
+            for stack in profiler.stacks
+        ))
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class TestSlowQueryLog(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        slow_query_log.clear()
+        self.create_issues(2)
+
+    def test_queries_are_recorded_with_their_plan(self):
+        url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        response = self.client.get(url, {"status": "TODO"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = slow_query_log.all()
+        self.assertTrue(entries)
+        entry = next(
+            entry for entry in entries
+            if '"projects_issue"."status"' in entry["sql"]
+        )
+        self.assertEqual(entry["route"], "project_issues-list")
+        self.assertEqual(entry["action"], "list")
+        self.assertIn("'TODO'", entry["params"])
+        self.assertTrue(entry["plan"])
+        self.assertTrue(any(
+            frame.startswith("projects/") or frame.startswith("soft_desk")
+            for frame in entry["stack"]
+        ))
+
+    def test_writes_have_no_plan(self):
+        url = reverse_lazy(
+            "project-detail", kwargs={"pk": self.project.pk}
+        )
+        response = self.client.patch(
+            url, {"description": "Slow"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update = next(
+            entry for entry in slow_query_log.all()
+            if entry["sql"].startswith("UPDATE")
+        )
+        self.assertEqual(update["action"], "partial_update")
+        self.assertIsNone(update["plan"])
+
+    @override_settings(SLOW_QUERY_LOG_SIZE=3)
+    def test_ring_buffer(self):
+        self.client.get(reverse_lazy("project-list"))
+        self.client.get(reverse_lazy("project-list"))
+        self.assertEqual(len(slow_query_log.all()), 3)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        self.client.get(reverse_lazy("project-list"))
+        self.assertEqual(slow_query_log.all(), [])
+
+    def test_disabled_by_default(self):
+        with self.settings():
+            del settings.SLOW_QUERY_THRESHOLD_MS
+            self.client.get(reverse_lazy("project-list"))
+        self.assertEqual(slow_query_log.all(), [])
+
+    def test_plans_are_explained_by_default(self):
+        with self.settings():
+            del settings.SLOW_QUERY_EXPLAIN
+            self.client.get(reverse_lazy("project-list"))
+        self.assertTrue(any(entry["plan"] for entry in slow_query_log.all()))
+
+    @override_settings(SLOW_QUERY_EXPLAIN=False)
+    def test_plans_can_be_left_out(self):
+        self.client.get(reverse_lazy("project-list"))
+        entries = slow_query_log.all()
+        self.assertTrue(entries)
+        self.assertTrue(all(entry["plan"] is None for entry in entries))
+
+    def test_failed_queries_are_not_recorded(self):
+        with connection.execute_wrapper(SlowQueryRecorder(0)):
+            with self.assertRaises(DatabaseError):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT * FROM missing_table")
+        self.assertEqual(slow_query_log.all(), [])
+
+    def test_admin_clear_requires_the_delete_permission(self):
+        self.client.get(reverse_lazy("project-list"))
+        staff = User.objects.create_user(
+            username="staff", password="testpass123", age=30,
+            is_staff=True
+        )
+        staff.user_permissions.add(
+            Permission.objects.get(codename="view_slowquery")
+        )
+        self.client.force_login(staff)
+        url = reverse_lazy("admin:monitoring_slowquery_changelist")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotContains(response, "Clear the log")
+        response = self.client.post(url, {"clear": "1"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(slow_query_log.all())
+
+    def test_admin(self):
+        self.client.get(reverse_lazy("project-list"))
+        admin = User.objects.create_superuser(
+            username="admin", password="testpass123", age=30
+        )
+        self.client.force_login(admin)
+        url = reverse_lazy("admin:monitoring_slowquery_changelist")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "projects_project")
+        self.assertContains(response, "project-list")
+
+        response = self.client.post(url, {"clear": "1"})
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(slow_query_log.all(), [])
@@ -0,0 +1,193 @@
+"""
+Per-request timing of the API: `Server-Timing` headers and log lines.
+
+`ServerTimingMiddleware` times a sample of the requests
+(`SERVER_TIMING_SAMPLE_RATE`, from 0 to 1). For each of them, the
+time is split between the phases entered with `phase(name)`: the
+viewsets enter `auth`, `permission`, `queryset` and `serialization`
+(see `soft_desk_support.mixins.ServerTimingMixin`), and the
+middleware itself `render`, around the rendering of the response.
+Phases nest, and the time spent in an inner phase is only counted in
+that one. Every SQL query run meanwhile is counted and timed through
+`connection.execute_wrapper`.
+
+The phases are sent back in a `Server-Timing` header:
+
+    Server-Timing: auth;dur=0.4, permission;dur=0.1, queryset;dur=2.3,
+        serialization;dur=1.2, render;dur=0.6,
+        db;dur=2.1;desc="3 queries", total;dur=5.3
+
+and logged on the `monitoring.timing` logger, at the INFO level,
+with the same values in the `timing` attribute of the record.
+
+Requests out of the sample are not timed: `phase()` then returns a
+shared no-op context manager, after a single context variable
+lookup.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("auth", "permission", "queryset", "serialization", "render")
+
+current_timer = ContextVar("current_timer", default=None)
+
+NO_PHASE = nullcontext()
+
+
+class Phase:
+    __slots__ = ("timer", "name")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer.enter(self.name)
+
+    def __exit__(self, *exc_info):
+        self.timer.exit()
+
+
+class RequestTimer:
+    """
+    Time spent in each phase of a request, and number and duration
+    of its SQL queries.
+    """
+
+    def __init__(self):
+        self.start = self.mark = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.stack = []
+        self.queries = 0
+        self.db_time = 0.0
+        self.total = None
+
+    def _switch(self):
+        now = time.perf_counter()
+        if self.stack:
+            name = self.stack[-1]
+            self.durations[name] = (
+                self.durations.get(name, 0.0) + now - self.mark
+            )
+        self.mark = now
+
+    def enter(self, name):
+        self._switch()
+        self.stack.append(name)
+
+    def exit(self):
+        self._switch()
+        if self.stack:
+            self.stack.pop()
+
+    def stop(self):
+        while self.stack:
+            self.exit()
+        self.total = time.perf_counter() - self.start
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def as_dict(self):
+        """
+        Returns the durations, in milliseconds, and the query count.
+        """
+        timing = {
+            name: round(duration * 1000, 3)
+            for name, duration in self.durations.items()
+        }
+        timing["db"] = round(self.db_time * 1000, 3)
+        timing["queries"] = self.queries
+        timing["total"] = round((self.total or 0.0) * 1000, 3)
+        return timing
+
+    def header(self):
+        metrics = [
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.durations.items()
+        ]
+        metrics.append(
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"'
+        )
+        metrics.append(f"total;dur={(self.total or 0.0) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def phase(name):
+    """
+    Returns a context manager counting the time spent in it in the
+    `name` phase of the current request, if it is timed.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return NO_PHASE
+    return Phase(timer, name)
+
+
+def get_sample_rate():
+    return getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0)
+
+
+class ServerTimingMiddleware:
+    """
+    Times a sample of the requests (see the module docstring).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = get_sample_rate()
+        if not rate or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        timer.stop()
+
+        response["Server-Timing"] = timer.header()
+        timing = timer.as_dict()
+        match = request.resolver_match
+        route = match.view_name if match else None
+        logger.info(
+            "%s %s %s %s %.1fms db=%.1fms queries=%d",
+            request.method, request.path, route, response.status_code,
+            timing["total"], timing["db"], timing["queries"],
+            extra={"timing": {
+                "method": request.method,
+                "path": request.path,
+                "route": route,
+                "status": response.status_code,
+                **timing,
+            }}
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returned them.
+        timer = current_timer.get()
+        if timer is not None:
+            timer.enter("render")
+            response.add_post_render_callback(lambda rendered: timer.exit())
+        return response
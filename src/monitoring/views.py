@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .metrics import registry, render
+
+
+class MetricsView(APIView):
+    """
+    Metrics of every process, in the Prometheus text format
+    (see `monitoring.metrics`). Staff members only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            render(registry.collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -0,0 +1,36 @@
+"""
+System checks of the projects app, run by `manage.py check --deploy`.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The invalidations of the cached memberships (see
+    `projects.membership`) reach the other worker processes through
+    the default cache only: it must be shared by all of them.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            "The default cache is local to each process: the other "
+            "worker processes would keep using the project "
+            "memberships of a user after they change.",
+            hint=(
+                "Set CACHES['default'] to a backend shared by every "
+                "process (Redis, Memcached, or a FileBasedCache on a "
+                "single host)."
+            ),
+            id="projects.E001",
+        )
+    ]
@@ -0,0 +1,117 @@
+"""
+Streaming export of the issues (and comments) of a project.
+
+Rows are read with `.iterator(chunk_size=...)`, i.e. fetched from
+the database cursor in chunks instead of being loaded at once, and
+encoded as they are produced: the memory used by an export does not
+depend on the size of the project.
+
+Issues and comments are read with two queries ordered by issue, and
+merged so that each issue is followed by its comments. Every row is
+flat and carries its `type` ("issue" or "comment"), so that both
+NDJSON and CSV outputs have the same content.
+"""
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Issue, Comment
+
+
+ISSUE_FIELDS = [
+    "id", "title", "description", "status", "priority", "label",
+    "author_id", "assignee_id", "created_time",
+]
+COMMENT_FIELDS = [
+    "id", "issue_id", "author_id", "content", "created_time",
+]
+CSV_COLUMNS = [
+    "type", "id", "issue_id", "title", "description", "status",
+    "priority", "label", "author_id", "assignee_id", "content",
+    "created_time",
+]
+
+
+def export_rows(project_id, with_comments=False, chunk_size=None):
+    """
+    Yields the issues of a project as dicts, ordered by id, each one
+    followed by its comments when `with_comments` is set.
+    """
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    issues = Issue.objects.filter(
+        project_id=project_id
+    ).order_by("id").values(*ISSUE_FIELDS).iterator(chunk_size=chunk_size)
+
+    if not with_comments:
+        for issue in issues:
+            yield {"type": "issue", **issue}
+        return
+
+    comments = Comment.objects.filter(
+        issue__project_id=project_id
+    ).order_by(
+        "issue_id", "created_time", "id"
+    ).values(*COMMENT_FIELDS).iterator(chunk_size=chunk_size)
+    comment = next(comments, None)
+    for issue in issues:
+        yield {"type": "issue", **issue}
+        while comment is not None and comment["issue_id"] <= issue["id"]:
+            if comment["issue_id"] == issue["id"]:
+                yield {"type": "comment", **comment}
+            comment = next(comments, None)
+
+
+def batched(lines, size=500):
+    """
+    Joins the lines into chunks of `size` lines, which are written
+    far more efficiently than one line at a time.
+    """
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def to_ndjson(rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    return batched(encoder.encode(row) + "\n" for row in rows)
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, used to get
+    the lines of a `csv.writer` one by one.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def to_csv(rows):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(CSV_COLUMNS)
+        for row in rows:
+            yield writer.writerow(
+                [csv_value(row.get(column)) for column in CSV_COLUMNS]
+            )
+
+    return batched(lines())
+
+
+FORMATS = {
+    "ndjson": (to_ndjson, "application/x-ndjson"),
+    "csv": (to_csv, "text/csv"),
+}
@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from soft_desk_support.views import (
+    UserViewSet,
+    ProjectViewSet,
+    ContributorViewSet,
+    IssueViewSet,
+    CommentViewSet,
+)
+
+
+User = get_user_model()
+
+# Viewsets checked, with the URL kwargs of their nested routes.
+VIEWSETS = [
+    (UserViewSet, {}),
+    (ProjectViewSet, {}),
+    (ContributorViewSet, {"project_pk": 1}),
+    (IssueViewSet, {"project_pk": 1}),
+    (CommentViewSet, {"project_pk": 1, "issue_pk": 1}),
+]
+
+
+def sample_value(model, path):
+    """
+    Returns a value of the right type to filter `model` on the
+    lookup `path` (e.g. "author__username").
+    """
+    *relations, name = path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field, models.DateTimeField):
+        return datetime(2025, 1, 1, tzinfo=timezone.utc)
+    if isinstance(field, (models.CharField, models.TextField)):
+        return "sample"
+    if isinstance(field, models.UUIDField):
+        return "00000000-0000-0000-0000-000000000000"
+    return 1
+
+
+def full_scans(queryset):
+    """
+    Returns the lines of the query plan scanning a whole table.
+    """
+    return [
+        line for line in queryset.explain().splitlines()
+        if "SCAN " in line and "INDEX" not in line
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN QUERY PLAN on the default queries of each "
+        "viewset (list, filters, retrieve) and fails if any of them "
+        "scans a whole table."
+    )
+
+    def get_view(self, viewset, kwargs, action):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = User(pk=1)
+        view = viewset(
+            action=action,
+            kwargs=kwargs,
+            request=request,
+            format_kwarg=None
+        )
+        return view
+
+    def get_queries(self, viewset, kwargs):
+        """
+        Yields `(description, queryset)` for the list page, each
+        filterset field and the detail lookup of a viewset.
+        """
+        view = self.get_view(viewset, kwargs, "list")
+        queryset = view.get_queryset()
+        paginator = view.paginator
+        if isinstance(paginator, CursorPagination):
+            ordering = paginator.get_ordering(view.request, queryset, view)
+            queryset = queryset.order_by(*ordering)
+        page_size = getattr(paginator, "page_size", None) or getattr(
+            paginator, "default_limit", None
+        ) or 1
+
+        yield "list", queryset[:page_size]
+        for field in getattr(viewset, "filterset_fields", []):
+            value = sample_value(queryset.model, field)
+            yield (
+                f"list ?{field}=",
+                queryset.filter(**{field: value})[:page_size]
+            )
+
+        view = self.get_view(viewset, kwargs, "retrieve")
+        yield "retrieve", view.get_queryset().filter(pk=1)
+
+    def handle(self, *args, **options):
+        failures = []
+        for viewset, kwargs in VIEWSETS:
+            for description, queryset in self.get_queries(viewset, kwargs):
+                scans = full_scans(queryset)
+                name = f"{viewset.__name__} {description}"
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"{name}:"))
+                    for line in scans:
+                        self.stdout.write(f"    {line}")
+                elif options["verbosity"] > 1:
+                    self.stdout.write(f"{name}: OK")
+        if failures:
+            raise CommandError(
+                f"{len(failures)} queries scan a whole table."
+            )
+        self.stdout.write(self.style.SUCCESS("No full table scan."))
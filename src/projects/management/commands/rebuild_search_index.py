@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from projects.search import INSTALL_SQL, REBUILD_SQL, run_sql
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-installs the full-text search tables and triggers, then "
+        "re-indexes every issue and comment, should the index be "
+        "out of sync."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "Full-text search requires the SQLite backend."
+            )
+        with transaction.atomic(), connection.cursor() as cursor:
+            run_sql(cursor, INSTALL_SQL + REBUILD_SQL)
+        self.stdout.write("Search index rebuilt.")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from projects.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints the hits and misses of the project response cache, "
+        "counted by every process sharing its backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Resets the statistics after printing them."
+        )
+
+    def handle(self, *args, **options):
+        stats = response_cache.stats()
+        self.stdout.write(
+            f"hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit ratio: {stats['hit_ratio']:.1%}"
+        )
+        if options["reset"]:
+            response_cache.reset_stats()
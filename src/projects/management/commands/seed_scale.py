@@ -0,0 +1,215 @@
+import random
+import time
+import uuid
+from array import array
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from projects.const import (
+    ISSUE_LABELS, ISSUE_PRIORITIES, ISSUE_STATUSES, PROJECT_TYPES
+)
+from projects.models import Project, Contributor, Issue, Comment
+from projects.search import INSTALL_SQL, REBUILD_SQL, UNINSTALL_SQL, run_sql
+
+
+User = get_user_model()
+
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(20_000)))
+
+
+def skewed_index(rng, count, skew):
+    """
+    Returns an index in `range(count)`, low indices being drawn far
+    more often than high ones when `skew` > 1 (1 is uniform).
+    """
+    return min(count - 1, int(count * rng.random() ** skew))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a large, reproducible dataset with bulk_create: "
+        "users, projects, contributors, issues and comments. A few "
+        "projects get most of the contributors and issues, and a few "
+        "issues most of the comments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--projects", type=int, default=200)
+        parser.add_argument(
+            "--max-contributors", type=int, default=50,
+            help="Maximum number of contributors of a project."
+        )
+        parser.add_argument("--issues", type=int, default=20_000)
+        parser.add_argument("--comments", type=int, default=100_000)
+        parser.add_argument(
+            "--skew", type=float, default=2.0,
+            help="Skew of the distributions (1 is uniform)."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--prefix", default="seed",
+            help="Prefix of the generated usernames."
+        )
+        parser.add_argument(
+            "--password", default="seed-password",
+            help="Password of every generated user."
+        )
+
+    def sentence(self, length):
+        return " ".join(
+            self.rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=length)
+        )
+
+    def member(self, project):
+        """
+        Returns the id of a random contributor of a project: the
+        contributors of a project are a block of consecutive users,
+        its author being the first one.
+        """
+        offset = self.rng.randrange(self.project_sizes[project])
+        user = (self.project_bases[project] + offset) % len(self.user_ids)
+        return self.user_ids[user]
+
+    def create(self, model, total, rows):
+        """
+        Creates the `total` unsaved instances yielded by `rows` by
+        batches, and returns their ids.
+        """
+        ids = array("q")
+        start = time.perf_counter()
+        for _ in range(0, total, self.batch_size):
+            created = model.objects.bulk_create(
+                list(islice(rows, self.batch_size))
+            )
+            if model is not Comment:
+                ids.extend(row.pk for row in created)
+        self.stdout.write(
+            f"{model.__name__}: {total} rows "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return ids
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        # The comment ids also depend on the prefix, for datasets of
+        # the same seed to be added to the same database.
+        id_rng = random.Random(f"{options['seed']}:{options['prefix']}")
+        self.batch_size = options["batch_size"]
+        skew = options["skew"]
+        users, projects = options["users"], options["projects"]
+        if users < 1 or projects < 1:
+            raise CommandError("At least one user and one project.")
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users named {prefix}* already exist: use another "
+                f"--prefix."
+            )
+
+        search_index = connection.vendor == "sqlite" and (
+            "projects_issue_fts" in connection.introspection.table_names()
+        )
+        # A single transaction, for a failure not to leave the search
+        # index without its triggers.
+        with transaction.atomic():
+            if search_index:
+                # Filling the index afterwards is far faster than
+                # through the triggers, row by row.
+                with connection.cursor() as cursor:
+                    run_sql(cursor, UNINSTALL_SQL)
+
+            password = make_password(options["password"])
+            self.user_ids = self.create(User, users, (
+                User(
+                    username=f"{prefix}{i}",
+                    password=password,
+                    age=self.rng.randint(15, 99),
+                    can_be_contacted=self.rng.random() < 0.3,
+                    can_data_be_shared=self.rng.random() < 0.2,
+                )
+                for i in range(users)
+            ))
+
+            max_contributors = min(options["max_contributors"], users)
+            self.project_sizes = array("l", (
+                1 + skewed_index(self.rng, max_contributors, skew)
+                for _ in range(projects)
+            ))
+            self.project_bases = array("q", (
+                self.rng.randrange(users) for _ in range(projects)
+            ))
+            project_ids = self.create(Project, projects, (
+                Project(
+                    name=f"{prefix} project {i}",
+                    type=self.rng.choice(PROJECT_TYPES),
+                    description=self.sentence(12),
+                    author_id=self.user_ids[self.project_bases[i]],
+                )
+                for i in range(projects)
+            ))
+
+            self.create(Contributor, sum(self.project_sizes), (
+                Contributor(
+                    project_id=project_ids[project],
+                    user_id=self.user_ids[
+                        (self.project_bases[project] + offset) % users
+                    ],
+                )
+                for project in range(projects)
+                for offset in range(self.project_sizes[project])
+            ))
+
+            issue_projects = array("l")
+
+            def build_issue():
+                project = skewed_index(self.rng, projects, skew)
+                issue_projects.append(project)
+                return Issue(
+                    title=self.sentence(6),
+                    description=self.sentence(20),
+                    project_id=project_ids[project],
+                    author_id=self.member(project),
+                    assignee_id=(
+                        self.member(project) if self.rng.random() < 0.5
+                        else None
+                    ),
+                    label=self.rng.choice(ISSUE_LABELS),
+                    priority=self.rng.choice(ISSUE_PRIORITIES),
+                    status=self.rng.choice(ISSUE_STATUSES),
+                )
+
+            issue_ids = self.create(Issue, options["issues"], (
+                build_issue() for _ in range(options["issues"])
+            ))
+
+            def build_comment():
+                issue = skewed_index(self.rng, len(issue_ids), skew)
+                return Comment(
+                    id=uuid.UUID(int=id_rng.getrandbits(128), version=4),
+                    issue_id=issue_ids[issue],
+                    author_id=self.member(issue_projects[issue]),
+                    content=self.sentence(15),
+                )
+
+            if issue_ids:
+                self.create(Comment, options["comments"], (
+                    build_comment() for _ in range(options["comments"])
+                ))
+
+            if search_index:
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    run_sql(cursor, INSTALL_SQL)
+                    run_sql(cursor, REBUILD_SQL)
+                self.stdout.write(
+                    f"Search index: rebuilt "
+                    f"in {time.perf_counter() - start:.1f}s"
+                )
+        self.stdout.write(self.style.SUCCESS("Dataset created."))
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from soft_desk_support.database import copy_database
+from soft_desk_support.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the primary SQLite database into each read replica "
+        "(DATABASE_REPLICAS), standing in for the replication of a "
+        "local setup. With --interval, copies again every so many "
+        "seconds until interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=None,
+            help="Seconds between two copies; copies once if omitted."
+        )
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError(
+                "No read replica: set DJANGO_DATABASE_REPLICAS."
+            )
+        databases = [settings.DATABASES["default"], *(
+            settings.DATABASES[alias] for alias in replicas
+        )]
+        if any(
+            database["ENGINE"] != "django.db.backends.sqlite3"
+            for database in databases
+        ):
+            raise CommandError("Replicas can only be copied on SQLite.")
+
+        primary = databases[0]["NAME"]
+        while True:
+            start = time.perf_counter()
+            for alias in replicas:
+                copy_database(primary, settings.DATABASES[alias]["NAME"])
+            self.stdout.write(
+                f"{len(replicas)} replica(s) copied "
+                f"in {(time.perf_counter() - start) * 1000:.0f}ms."
+            )
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,204 @@
+"""
+Project membership resolution for the permission classes.
+
+The set of `(project_id, role)` pairs of a user is loaded in a
+single query the first time a permission class needs it during a
+request, then kept on the request so that every later check is an
+in-memory lookup.
+
+Across requests, the memberships are kept in a bounded LRU (see
+`MEMBERSHIP_CACHE_SIZE`) for at most `MEMBERSHIP_CACHE_TTL` seconds.
+Each entry is stamped with the versions stored in Django's cache for
+"all users" and for the user itself; the signals in
+`projects.signals` replace those versions when a `Contributor` or a
+`Project` is written, which makes the stale entries miss. They do
+so right away and again once the write is committed: memberships
+loaded by a concurrent request before the commit, and cached under
+the intermediate version, miss as well.
+
+The versions only reach the other worker processes through a shared
+cache backend, which deployments must therefore configure (checked
+by `manage.py check --deploy`, see `projects.checks`).
+"""
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value, CharField
+
+from monitoring.metrics import record_cache_lookup
+from soft_desk_support.routers import use_primary
+from .models import Project, Contributor
+
+
+AUTHOR = "author"
+CONTRIBUTOR = "contributor"
+
+GLOBAL_VERSION_KEY = "projects:memberships:version"
+USER_VERSION_KEY = "projects:memberships:version:{user_id}"
+
+
+class ProjectMemberships:
+    """
+    Immutable set of `(project_id, role)` pairs of a user.
+    """
+    __slots__ = ("pairs",)
+
+    def __init__(self, pairs=()):
+        self.pairs = frozenset(pairs)
+
+    def __bool__(self):
+        return any(role == CONTRIBUTOR for _, role in self.pairs)
+
+    def is_contributor(self, project_id):
+        return (project_id, CONTRIBUTOR) in self.pairs
+
+    def is_author(self, project_id):
+        return (project_id, AUTHOR) in self.pairs
+
+    def project_ids(self, role=CONTRIBUTOR):
+        return sorted(
+            project_id for project_id, pair_role in self.pairs
+            if pair_role == role
+        )
+
+
+class MembershipCache:
+    """
+    Thread-safe bounded LRU of `ProjectMemberships` keyed by
+    user id, each entry being valid for one version only, and
+    until it expires.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is None
+                or entry[0] != version
+                or entry[2] <= time.monotonic()
+            ):
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, version, memberships):
+        expires = time.monotonic() + getattr(
+            settings, "MEMBERSHIP_CACHE_TTL", 60
+        )
+        with self._lock:
+            self._entries[user_id] = (version, memberships, expires)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+memberships_cache = MembershipCache(
+    getattr(settings, "MEMBERSHIP_CACHE_SIZE", 1024)
+)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _get_version(user_id):
+    keys = [GLOBAL_VERSION_KEY, USER_VERSION_KEY.format(user_id=user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _set_versions(keys):
+    """
+    Replaces the versions of `keys` right away, and again once the
+    current transaction is committed (see the module docstring).
+    """
+    def replace():
+        cache.set_many({key: _new_version() for key in keys}, None)
+
+    replace()
+    transaction.on_commit(replace)
+
+
+def invalidate_user(user_id):
+    """
+    Invalidates the cached memberships of one user.
+    """
+    _set_versions([USER_VERSION_KEY.format(user_id=user_id)])
+
+
+def invalidate_users(user_ids):
+    """
+    Invalidates the cached memberships of several users at once.
+    """
+    _set_versions([
+        USER_VERSION_KEY.format(user_id=user_id) for user_id in user_ids
+    ])
+
+
+def invalidate_all():
+    """
+    Invalidates the cached memberships of every user.
+    """
+    _set_versions([GLOBAL_VERSION_KEY])
+
+
+def load_memberships(user_id):
+    """
+    Loads the memberships of a user from the primary database in a
+    single query: a replica may predate the last invalidation.
+    """
+    contributions = Contributor.objects.filter(
+        user_id=user_id
+    ).values_list(
+        "project_id", Value(CONTRIBUTOR, output_field=CharField())
+    )
+    authorships = Project.objects.filter(
+        author_id=user_id
+    ).order_by().values_list(
+        "id", Value(AUTHOR, output_field=CharField())
+    )
+    with use_primary():
+        return ProjectMemberships(
+            contributions.union(authorships, all=True)
+        )
+
+
+def get_memberships(request):
+    """
+    Returns the `ProjectMemberships` of the authenticated user,
+    resolving them at most once per request.
+    """
+    memberships = getattr(request, "_project_memberships", None)
+    if memberships is not None:
+        return memberships
+
+    user_id = getattr(request.user, "id", None)
+    if user_id is None:
+        memberships = ProjectMemberships()
+    else:
+        version = _get_version(user_id)
+        memberships = memberships_cache.get(user_id, version)
+        record_cache_lookup("memberships", memberships is not None)
+        if memberships is None:
+            memberships = load_memberships(user_id)
+            memberships_cache.set(user_id, version, memberships)
+    request._project_memberships = memberships
+    return memberships
@@ -0,0 +1,172 @@
+from django.db import migrations
+
+
+# The SQL is inlined, rather than imported from `projects.search`, for
+# this migration to keep installing the index it was written for.
+INSTALL_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_issue_fts USING fts5(
+        title, description, scope, project_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS projects_comment_fts_key (
+        id INTEGER PRIMARY KEY,
+        comment_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_comment_fts USING fts5(
+        content, scope, issue_id UNINDEXED, project_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_insert
+    AFTER INSERT ON projects_issue BEGIN
+        INSERT INTO projects_issue_fts(
+            rowid, title, description, scope, project_id
+        ) VALUES (
+            new.id, new.title, new.description,
+            'p' || new.project_id, new.project_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_delete
+    AFTER DELETE ON projects_issue BEGIN
+        DELETE FROM projects_issue_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_update
+    AFTER UPDATE OF title, description, project_id
+    ON projects_issue BEGIN
+        UPDATE projects_issue_fts SET
+            title = new.title,
+            description = new.description,
+            scope = 'p' || new.project_id,
+            project_id = new.project_id
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_move
+    AFTER UPDATE OF project_id ON projects_issue
+    WHEN new.project_id != old.project_id BEGIN
+        UPDATE projects_comment_fts SET
+            scope = 'p' || new.project_id || ' i' || new.id,
+            project_id = new.project_id
+        WHERE rowid IN (
+            SELECT rowid FROM projects_comment_fts
+            WHERE projects_comment_fts MATCH 'scope : i' || new.id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_insert
+    AFTER INSERT ON projects_comment BEGIN
+        INSERT INTO projects_comment_fts_key(comment_id) VALUES (new.id);
+        INSERT INTO projects_comment_fts(
+            rowid, content, scope, issue_id, project_id
+        ) SELECT
+            (SELECT id FROM projects_comment_fts_key
+             WHERE comment_id = new.id),
+            new.content, 'p' || project_id || ' i' || id, id, project_id
+        FROM projects_issue WHERE id = new.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_delete
+    AFTER DELETE ON projects_comment BEGIN
+        DELETE FROM projects_comment_fts WHERE rowid = (
+            SELECT id FROM projects_comment_fts_key
+            WHERE comment_id = old.id
+        );
+        DELETE FROM projects_comment_fts_key WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_update
+    AFTER UPDATE OF content, issue_id ON projects_comment BEGIN
+        UPDATE projects_comment_fts SET
+            content = new.content,
+            scope = (SELECT 'p' || project_id || ' i' || id
+                     FROM projects_issue WHERE id = new.issue_id),
+            issue_id = new.issue_id,
+            project_id = (SELECT project_id FROM projects_issue
+                          WHERE id = new.issue_id)
+        WHERE rowid = (
+            SELECT id FROM projects_comment_fts_key
+            WHERE comment_id = old.id
+        );
+    END
+    """,
+]
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS projects_issue_fts_insert",
+    "DROP TRIGGER IF EXISTS projects_issue_fts_delete",
+    "DROP TRIGGER IF EXISTS projects_issue_fts_update",
+    "DROP TRIGGER IF EXISTS projects_issue_fts_move",
+    "DROP TRIGGER IF EXISTS projects_comment_fts_insert",
+    "DROP TRIGGER IF EXISTS projects_comment_fts_delete",
+    "DROP TRIGGER IF EXISTS projects_comment_fts_update",
+    "DROP TABLE IF EXISTS projects_issue_fts",
+    "DROP TABLE IF EXISTS projects_comment_fts",
+    "DROP TABLE IF EXISTS projects_comment_fts_key",
+]
+
+REBUILD_SQL = [
+    "DELETE FROM projects_issue_fts",
+    """
+    INSERT INTO projects_issue_fts(
+        rowid, title, description, scope, project_id
+    )
+    SELECT id, title, description, 'p' || project_id, project_id
+    FROM projects_issue
+    """,
+    "DELETE FROM projects_comment_fts",
+    "DELETE FROM projects_comment_fts_key",
+    "INSERT INTO projects_comment_fts_key(comment_id) "
+    "SELECT id FROM projects_comment",
+    """
+    INSERT INTO projects_comment_fts(
+        rowid, content, scope, issue_id, project_id
+    )
+    SELECT k.id, c.content, 'p' || i.project_id || ' i' || i.id,
+        i.id, i.project_id
+    FROM projects_comment c
+    JOIN projects_comment_fts_key k ON k.comment_id = c.id
+    JOIN projects_issue i ON i.id = c.issue_id
+    """,
+]
+
+
+def run_sql(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    run_sql(schema_editor, INSTALL_SQL + REBUILD_SQL)
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    run_sql(schema_editor, UNINSTALL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_viewset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_names(apps, schema_editor):
+    """
+    Suffixes the names shared by several projects with their id,
+    except for the oldest one, for the constraint to be created.
+
+    This rewrites user data: it only runs with
+    `RENAME_DUPLICATE_PROJECT_NAMES` set, and the migration fails,
+    listing the names to rename by hand, otherwise.
+    """
+    Project = apps.get_model("projects", "Project")
+    duplicates = list(Project.objects.values("name").annotate(
+        count=Count("id")
+    ).filter(count__gt=1).values_list("name", flat=True))
+    if not duplicates:
+        return
+    if not getattr(settings, "RENAME_DUPLICATE_PROJECT_NAMES", False):
+        raise RuntimeError(
+            "Project names must be unique, but these ones are shared "
+            f"by several projects: {', '.join(map(repr, duplicates))}. "
+            "Rename them, or set DJANGO_RENAME_DUPLICATE_PROJECT_NAMES=1 "
+            "to suffix all but the oldest with their id, then migrate "
+            "again."
+        )
+    for name in duplicates:
+        for project in Project.objects.filter(name=name).order_by("id")[1:]:
+            project.name = f"{name[:128 - 12]} ({project.id})"
+            project.save(update_fields=["name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rename_duplicate_names, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(fields=('name',), name='project_unique_name'),
+        ),
+    ]
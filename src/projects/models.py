@@ -1,7 +1,10 @@
 import uuid
 
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from .const import (
     ISSUE_LABELS as LABELS,
@@ -28,6 +31,63 @@ class TimeStampedModel(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(
+                fields=["author", "created_time"],
+                name="%(class)s_author_ctime_idx"
+            ),
+        ]
+
+
+def count_related(model, field):
+    """
+    Returns a correlated subquery counting the `model` rows whose
+    `field` points to the outer row.
+
+    A subquery is used instead of `Count()` on a join so that the
+    annotation is not affected by other joins or filters on the
+    outer queryset (e.g. `contributor_links__user=user`).
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef("pk")}
+            ).order_by().values(field).annotate(
+                count=Count("pk")
+            ).values("count")
+        ),
+        0
+    )
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_contributors_count(self):
+        """
+        Annotates each project with `contributors_count`.
+        """
+        return self.annotate(
+            contributors_count=count_related(Contributor, "project")
+        )
+
+    def touch(self):
+        """
+        Bumps the `version` and `modified_time` of the projects in a
+        single UPDATE.
+        """
+        return self.update(
+            version=F("version") + 1,
+            modified_time=timezone.now()
+        )
+
+
+class IssueQuerySet(models.QuerySet):
+    def with_comments_count(self):
+        """
+        Annotates each issue with `comments_count`.
+        """
+        return self.annotate(
+            comments_count=count_related(Comment, "issue")
+        )
 
 
 class Project(TimeStampedModel, models.Model):
@@ -35,9 +95,13 @@ class Project(TimeStampedModel, models.Model):
     Project model representing a software development project.
 
     Attributes:
-    - name: name of the project
+    - name: name of the project, unique (enforced by the database
+    only, see `ProjectNameMixin`)
     - type: one of back-end, front-end, ios, or android
     - description: optional text description of the project
+    - version, modified_time: bumped on every write to the project
+    (by its own UPDATE), its contributors, issues or comments (see
+    `projects.signals`); used as HTTP validators
     - author and created_time: inherited from TimeStampedModel
     """
     name = models.CharField(max_length=128)
@@ -48,6 +112,42 @@ class Project(TimeStampedModel, models.Model):
         ],
     )
     description = models.TextField(blank=True, null=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    modified_time = models.DateTimeField(auto_now=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta(TimeStampedModel.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name"],
+                name="project_unique_name"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        project = super().from_db(db, field_names, values)
+        # The author the project was loaded with, for the signals to
+        # tell whether it changed (see `projects.signals`).
+        project._loaded_author_id = project.__dict__.get("author_id")
+        return project
+
+    def save(self, *args, **kwargs):
+        updating = not self._state.adding
+        if updating:
+            # Updates bump the version within their own UPDATE.
+            self.version = F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields, "version", "modified_time"
+                }
+        super().save(*args, **kwargs)
+        if updating:
+            # The new version is only known to the database: it is
+            # read again if accessed.
+            del self.__dict__["version"]
 
 
 class Contributor(models.Model):
@@ -132,6 +232,20 @@ class Issue(TimeStampedModel, models.Model):
         related_name="assigned_issues"
     )
 
+    objects = IssueQuerySet.as_manager()
+
+    class Meta(TimeStampedModel.Meta):
+        indexes = TimeStampedModel.Meta.indexes + [
+            models.Index(
+                fields=["project", "status", "priority"],
+                name="issue_project_status_idx"
+            ),
+            models.Index(
+                fields=["assignee", "status"],
+                name="issue_assignee_status_idx"
+            ),
+        ]
+
 
 class Comment(TimeStampedModel, models.Model):
     """
@@ -155,5 +269,11 @@ class Comment(TimeStampedModel, models.Model):
     )
     content = models.TextField(max_length=250)
 
-    class Meta:
+    class Meta(TimeStampedModel.Meta):
         ordering = ["-created_time"]
+        indexes = TimeStampedModel.Meta.indexes + [
+            models.Index(
+                fields=["issue", "-created_time"],
+                name="comment_issue_ctime_idx"
+            ),
+        ]
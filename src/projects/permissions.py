@@ -1,34 +1,42 @@
 from rest_framework.permissions import BasePermission
 
-from .models import Contributor, Comment, Issue
+from .models import Comment, Issue
+from .membership import get_memberships
+
+
+def get_project_id(obj, view=None):
+    """
+    Returns the id of the project an object belongs to, without
+    loading the project itself: on the nested routes, the project
+    of the URL, which the objects of the view belong to (see
+    `projects.scope`).
+    """
+    scope = getattr(view, "scope", None)
+    if scope is not None:
+        return scope.project.id
+    if hasattr(obj, "project_id"):
+        return obj.project_id
+    elif isinstance(obj, Comment):
+        return obj.issue.project_id
+    return obj.pk
 
 
 class IsAuthorOrIsAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
-        if isinstance(obj, Comment):
-            return obj.author == request.user or request.user.is_staff
-        elif hasattr(obj, "author"):
-            return obj.author == request.user or request.user.is_staff
+        if hasattr(obj, "author_id"):
+            return obj.author_id == request.user.id or request.user.is_staff
         else:
             return request.user.is_staff
 
 
 class IsContributor(BasePermission):
     def has_permission(self, request, view):
-       return Contributor.objects.filter(
-            user__id=request.user.id
-        ).exists()
-    
+        return bool(get_memberships(request))
+
     def has_object_permission(self, request, view, obj):
-        if hasattr(obj, 'project'):
-            project = obj.project
-        elif isinstance(obj, Comment):
-            project = obj.issue.project
-        else:
-            project = obj
-        return Contributor.objects.filter(
-            project_id=project.id, user_id=request.user.id
-        ).exists()
+        return get_memberships(request).is_contributor(
+            get_project_id(obj, view)
+        )
 
 
 class IsContributorOrIsAdmin(IsContributor):
@@ -36,7 +44,7 @@ class IsContributorOrIsAdmin(IsContributor):
         return super().has_permission(
             request, view
         ) or request.user.is_staff
-    
+
     def has_object_permission(self, request, view, obj):
         return super().has_object_permission(
             request, view, obj
@@ -45,8 +53,7 @@ class IsContributorOrIsAdmin(IsContributor):
 
 class IsProjectAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
-        project = obj.project
-        return project.author == request.user
+        return get_memberships(request).is_author(obj.project_id)
 
 
 class IsAssignee(BasePermission):
@@ -56,4 +63,4 @@ class IsAssignee(BasePermission):
                 "Did you try to assign a user to a non-issue object?"
             )
             return False
-        return request.user == obj.assignee
+        return request.user.id == obj.assignee_id
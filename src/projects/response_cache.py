@@ -0,0 +1,151 @@
+"""
+Project-scoped cache of rendered list and retrieve responses.
+
+Issue, comment and contributor responses do not depend on the user
+requesting them, so once rendered they can be served to every
+contributor of the project. Entries are keyed by project, endpoint,
+normalized query parameters (including the page cursor) and
+rendered format, and stored in the `responses` cache alias: a local
+memory LRU by default, or a `FileBasedCache` to share the entries
+between processes (see `CACHES` in the settings).
+
+Each project has a generation counter, held in the same backend and
+part of every key: `projects.signals` bump it once a write under the
+project is committed, which makes every entry of the project miss.
+A generation evicted from the backend restarts from a random value,
+so that old entries are never served again.
+
+The cache is opt-in (`RESPONSE_CACHE_ENABLED`).
+"""
+import hashlib
+import random
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+
+from monitoring.metrics import record_cache_lookup
+
+
+GENERATION_KEY = "projects:responses:generation:{project_id}"
+ENTRY_KEY = "projects:responses:{project_id}:{generation}:{digest}"
+STATS_KEY = "projects:responses:stats:{name}"
+
+
+class ResponseCache:
+    """
+    Entries, generations and hit/miss statistics of the cached
+    responses.
+
+    Statistics are counted in memory and added to the backend every
+    `flush_every` events, so that the hot path does not write to it.
+    """
+
+    def __init__(self, alias="responses", flush_every=100):
+        self.alias = alias
+        self.flush_every = flush_every
+        self._counts = {"hits": 0, "misses": 0}
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, "RESPONSE_CACHE_ENABLED", False)
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def generation(self, project_id):
+        key = GENERATION_KEY.format(project_id=project_id)
+        generation = self.backend.get(key)
+        if generation is None:
+            self.backend.add(key, random.getrandbits(62), None)
+            generation = self.backend.get(key)
+        return generation
+
+    def invalidate(self, project_id):
+        """
+        Makes every cached response of the project miss.
+        """
+        key = GENERATION_KEY.format(project_id=project_id)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            self.backend.set(key, random.getrandbits(62), None)
+
+    def make_key(self, project_id, endpoint, query_params, format):
+        params = sorted(
+            (name, value)
+            for name in query_params
+            for value in query_params.getlist(name)
+        )
+        digest = hashlib.md5(
+            repr((endpoint, params, format)).encode(),
+            usedforsecurity=False
+        ).hexdigest()
+        return ENTRY_KEY.format(
+            project_id=project_id,
+            generation=self.generation(project_id),
+            digest=digest
+        )
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        self._count("hits" if entry is not None else "misses")
+        record_cache_lookup("responses", entry is not None)
+        return entry
+
+    def set(self, key, content, content_type):
+        self.backend.set(key, (content, content_type), self.timeout)
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+            pending = sum(self._counts.values())
+        if pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Adds the statistics counted by this process to the backend.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, {"hits": 0, "misses": 0}
+        for name, count in counts.items():
+            if not count:
+                continue
+            key = STATS_KEY.format(name=name)
+            self.backend.add(key, 0, None)
+            try:
+                self.backend.incr(key, count)
+            except ValueError:
+                self.backend.set(key, count, None)
+
+    def stats(self):
+        """
+        Returns the hits, misses and hit ratio of every process
+        sharing the backend.
+        """
+        self.flush()
+        hits = self.backend.get(STATS_KEY.format(name="hits"), 0)
+        misses = self.backend.get(STATS_KEY.format(name="misses"), 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._counts = {"hits": 0, "misses": 0}
+        self.backend.delete_many([
+            STATS_KEY.format(name=name) for name in ("hits", "misses")
+        ])
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,58 @@
+"""
+Request-scoped resolution of the objects named by the URL of the
+nested routes: the project of `/projects/{project_pk}/...`, and the
+issue of `/projects/{project_pk}/issues/{issue_pk}/...`.
+
+They are loaded once per request, with the author of the project,
+in a single query which also checks that the issue belongs to the
+project, then kept on the request: the views, serializers and
+permission classes read them from there instead of looking them up
+again.
+"""
+from .models import Project, Issue
+
+
+class ProjectScope:
+    """
+    The project (with its author) and, on the comment routes, the
+    issue of a nested URL.
+    """
+    __slots__ = ("project", "issue")
+
+    def __init__(self, project, issue=None):
+        self.project = project
+        self.issue = issue
+
+
+def load_scope(project_pk, issue_pk=None):
+    """
+    Returns the `ProjectScope` of the URL kwargs in a single query,
+    or None if the project does not exist, or the issue is not one
+    of its issues.
+    """
+    try:
+        if issue_pk is None:
+            project = Project.objects.select_related("author").filter(
+                pk=project_pk
+            ).first()
+            return None if project is None else ProjectScope(project)
+        issue = Issue.objects.select_related("project__author").filter(
+            pk=issue_pk, project_id=project_pk
+        ).first()
+    except (TypeError, ValueError):
+        # Malformed ids in the URL.
+        return None
+    return None if issue is None else ProjectScope(issue.project, issue)
+
+
+def get_scope(request, kwargs):
+    """
+    Returns the `ProjectScope` of a nested request, resolving it at
+    most once per request.
+    """
+    key = (kwargs.get("project_pk"), kwargs.get("issue_pk"))
+    cached = getattr(request, "_project_scope", None)
+    if cached is None or cached[0] != key:
+        cached = key, load_scope(*key)
+        request._project_scope = cached
+    return cached[1]
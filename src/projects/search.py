@@ -0,0 +1,363 @@
+"""
+Full-text search over issues and comments, backed by SQLite FTS5.
+
+Two FTS5 tables are kept in sync with the data by triggers, so that
+every write path (including `bulk_create` and queryset `update`) is
+covered:
+
+- `projects_issue_fts` indexes the title and description of the
+issues, under the issue id;
+- `projects_comment_fts` indexes the content of the comments, under
+an integer key given to each comment UUID by
+`projects_comment_fts_key`. Unlike the implicit rowids of
+`projects_comment`, which `VACUUM` may renumber, this key is an
+`INTEGER PRIMARY KEY`, kept as is.
+
+Besides the text, each row has a `scope` column holding the
+`p<project_id>` (and, for comments, `i<issue_id>`) tokens: matching
+them lets FTS5 restrict a search to a project or an issue by merging
+its own doclists, instead of reading the rows of every match.
+
+Ranking every match of a frequent term costs as much as the number
+of matches, so `/api/search/` only ranks the `SEARCH_MAX_CANDIDATES`
+most recent matches of each kind.
+
+Rebuilding a table through a migration drops its triggers: they are
+checked after each `migrate` (see `ensure_search_index`), and
+reinstalled with a re-index if any is missing. The
+`rebuild_search_index` command re-indexes everything.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models.expressions import RawSQL
+
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Issue, Comment
+
+
+logger = logging.getLogger(__name__)
+
+TRIGGERS = (
+    "projects_issue_fts_insert",
+    "projects_issue_fts_delete",
+    "projects_issue_fts_update",
+    "projects_issue_fts_move",
+    "projects_comment_fts_insert",
+    "projects_comment_fts_delete",
+    "projects_comment_fts_update",
+)
+
+INSTALL_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_issue_fts USING fts5(
+        title, description, scope, project_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS projects_comment_fts_key (
+        id INTEGER PRIMARY KEY,
+        comment_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS projects_comment_fts USING fts5(
+        content, scope, issue_id UNINDEXED, project_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_insert
+    AFTER INSERT ON projects_issue BEGIN
+        INSERT INTO projects_issue_fts(
+            rowid, title, description, scope, project_id
+        ) VALUES (
+            new.id, new.title, new.description,
+            'p' || new.project_id, new.project_id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_delete
+    AFTER DELETE ON projects_issue BEGIN
+        DELETE FROM projects_issue_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_update
+    AFTER UPDATE OF title, description, project_id
+    ON projects_issue BEGIN
+        UPDATE projects_issue_fts SET
+            title = new.title,
+            description = new.description,
+            scope = 'p' || new.project_id,
+            project_id = new.project_id
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_issue_fts_move
+    AFTER UPDATE OF project_id ON projects_issue
+    WHEN new.project_id != old.project_id BEGIN
+        UPDATE projects_comment_fts SET
+            scope = 'p' || new.project_id || ' i' || new.id,
+            project_id = new.project_id
+        WHERE rowid IN (
+            SELECT rowid FROM projects_comment_fts
+            WHERE projects_comment_fts MATCH 'scope : i' || new.id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_insert
+    AFTER INSERT ON projects_comment BEGIN
+        INSERT INTO projects_comment_fts_key(comment_id) VALUES (new.id);
+        INSERT INTO projects_comment_fts(
+            rowid, content, scope, issue_id, project_id
+        ) SELECT
+            (SELECT id FROM projects_comment_fts_key
+             WHERE comment_id = new.id),
+            new.content, 'p' || project_id || ' i' || id, id, project_id
+        FROM projects_issue WHERE id = new.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_delete
+    AFTER DELETE ON projects_comment BEGIN
+        DELETE FROM projects_comment_fts WHERE rowid = (
+            SELECT id FROM projects_comment_fts_key
+            WHERE comment_id = old.id
+        );
+        DELETE FROM projects_comment_fts_key WHERE comment_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_comment_fts_update
+    AFTER UPDATE OF content, issue_id ON projects_comment BEGIN
+        UPDATE projects_comment_fts SET
+            content = new.content,
+            scope = (SELECT 'p' || project_id || ' i' || id
+                     FROM projects_issue WHERE id = new.issue_id),
+            issue_id = new.issue_id,
+            project_id = (SELECT project_id FROM projects_issue
+                          WHERE id = new.issue_id)
+        WHERE rowid = (
+            SELECT id FROM projects_comment_fts_key
+            WHERE comment_id = old.id
+        );
+    END
+    """,
+]
+
+UNINSTALL_SQL = [
+    *(f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS),
+    "DROP TABLE IF EXISTS projects_issue_fts",
+    "DROP TABLE IF EXISTS projects_comment_fts",
+    "DROP TABLE IF EXISTS projects_comment_fts_key",
+]
+
+REBUILD_SQL = [
+    "DELETE FROM projects_issue_fts",
+    """
+    INSERT INTO projects_issue_fts(
+        rowid, title, description, scope, project_id
+    )
+    SELECT id, title, description, 'p' || project_id, project_id
+    FROM projects_issue
+    """,
+    "DELETE FROM projects_comment_fts",
+    "DELETE FROM projects_comment_fts_key",
+    "INSERT INTO projects_comment_fts_key(comment_id) "
+    "SELECT id FROM projects_comment",
+    """
+    INSERT INTO projects_comment_fts(
+        rowid, content, scope, issue_id, project_id
+    )
+    SELECT k.id, c.content, 'p' || i.project_id || ' i' || i.id,
+        i.id, i.project_id
+    FROM projects_comment c
+    JOIN projects_comment_fts_key k ON k.comment_id = c.id
+    JOIN projects_issue i ON i.id = c.issue_id
+    """,
+]
+
+ISSUE_MATCH_SQL = (
+    "SELECT rowid FROM projects_issue_fts "
+    "WHERE projects_issue_fts MATCH %s"
+)
+
+COMMENT_MATCH_SQL = (
+    "SELECT comment_id FROM projects_comment_fts_key WHERE id IN ("
+    "SELECT rowid FROM projects_comment_fts "
+    "WHERE projects_comment_fts MATCH %s)"
+)
+
+# Each branch ranks its most recent candidates only; the comment
+# UUIDs are looked up, by their key, for the returned page only.
+SEARCH_SQL = """
+    SELECT r.kind, k.comment_id, r.id, r.project_id, r.issue_id,
+        r.score, r.title, r.snippet
+    FROM (
+        SELECT * FROM (
+            SELECT 'issue' AS kind, rowid AS id, project_id,
+                rowid AS issue_id,
+                bm25(projects_issue_fts, 2.0, 1.0, 0.0) AS score,
+                highlight(projects_issue_fts, 0, '[', ']') AS title,
+                snippet(projects_issue_fts, 1, '[', ']', '...', 12)
+                    AS snippet
+            FROM projects_issue_fts
+            WHERE projects_issue_fts MATCH %s
+                AND project_id IN ({projects})
+            ORDER BY rowid DESC LIMIT %s
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'comment' AS kind, rowid AS id, project_id,
+                issue_id,
+                bm25(projects_comment_fts, 1.0, 0.0) AS score,
+                NULL AS title,
+                snippet(projects_comment_fts, 0, '[', ']', '...', 12)
+                    AS snippet
+            FROM projects_comment_fts
+            WHERE projects_comment_fts MATCH %s
+                AND project_id IN ({projects})
+            ORDER BY rowid DESC LIMIT %s
+        )
+        ORDER BY score, kind, id DESC
+        LIMIT %s OFFSET %s
+    ) r
+    LEFT JOIN projects_comment_fts_key k
+        ON r.kind = 'comment' AND k.id = r.id
+    ORDER BY r.score, r.kind, r.id DESC
+"""
+
+
+def run_sql(schema_editor_or_cursor, statements):
+    for statement in statements:
+        schema_editor_or_cursor.execute(statement)
+
+
+def missing_triggers(cursor):
+    """
+    Returns the names of the full-text search triggers missing from
+    the database of `cursor`.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    existing = {name for name, in cursor.fetchall()}
+    return [name for name in TRIGGERS if name not in existing]
+
+
+def ensure_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    `post_migrate` receiver reinstalling the full-text search triggers,
+    and re-indexing every issue and comment, if a migration dropped
+    any of them. Does nothing before the index is installed.
+    """
+    database = connections[using]
+    if database.vendor != "sqlite":
+        return
+    with database.cursor() as cursor:
+        if "projects_issue_fts" not in (
+            database.introspection.table_names(cursor)
+        ):
+            return
+        missing = missing_triggers(cursor)
+    if not missing:
+        return
+    logger.warning(
+        "Full-text search triggers missing after migrate (%s): "
+        "reinstalling them and rebuilding the index.", ", ".join(missing)
+    )
+    with transaction.atomic(using=using), database.cursor() as cursor:
+        run_sql(cursor, INSTALL_SQL + REBUILD_SQL)
+
+
+def match_expression(query, scopes=()):
+    """
+    Turns a user query into an FTS5 expression matching all its
+    terms, each one quoted so that no FTS5 syntax is interpreted,
+    within any of the given scope tokens (e.g. `p12`).
+    Returns None if the query has no term.
+    """
+    terms = " ".join(
+        '"{}"'.format(term.replace('"', '""'))
+        for term in (query or "").split()
+    )
+    if not terms:
+        return None
+    if scopes:
+        terms = "({}) AND scope : ({})".format(terms, " OR ".join(scopes))
+    return terms
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Narrows issue and comment lists to the rows matching `?q=`,
+    within the project (issues) or issue (comments) of the URL.
+    """
+    search_param = "q"
+    match_sql = {
+        Issue: (ISSUE_MATCH_SQL, "project_pk", "p"),
+        Comment: (COMMENT_MATCH_SQL, "issue_pk", "i"),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        sql, scope_kwarg, prefix = self.match_sql[queryset.model]
+        scope = str(getattr(view, "kwargs", {}).get(scope_kwarg, ""))
+        expression = match_expression(
+            request.query_params.get(self.search_param),
+            [prefix + scope] if scope.isdigit() else ()
+        )
+        if expression is None:
+            return queryset
+        return queryset.filter(pk__in=RawSQL(sql, [expression]))
+
+
+def search(query, project_ids, limit, offset=0):
+    """
+    Returns the issues and comments of the given projects matching
+    `query`, best matches first, as dicts.
+    """
+    project_ids = list(project_ids)
+    scopes = ()
+    if len(project_ids) <= getattr(
+        settings, "SEARCH_SCOPE_MAX_PROJECTS", 50
+    ):
+        scopes = [f"p{project_id}" for project_id in project_ids]
+    expression = match_expression(query, scopes)
+    if expression is None or not project_ids:
+        return []
+
+    candidates = getattr(settings, "SEARCH_MAX_CANDIDATES", 1000)
+    placeholders = ", ".join(["%s"] * len(project_ids))
+    sql = SEARCH_SQL.format(projects=placeholders)
+    params = [
+        expression, *project_ids, candidates,
+        expression, *project_ids, candidates,
+        limit, offset,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for (kind, comment_id, object_id, project_id, issue_id,
+         score, title, snippet) in rows:
+        result = {
+            "type": kind,
+            "id": object_id,
+            "project_id": project_id,
+            "issue_id": issue_id,
+            "score": score,
+            "snippet": snippet,
+        }
+        if kind == "comment":
+            result["id"] = str(uuid.UUID(comment_id))
+        else:
+            result["title"] = title
+        results.append(result)
+    return results
@@ -26,21 +26,33 @@ They are organized in the following way:
     of the issues)
 """
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 
 from rest_framework.serializers import (
     PrimaryKeyRelatedField,
     ValidationError,
-    ModelSerializer,
     SerializerMethodField,
     StringRelatedField,
-    IntegerField
+    IntegerField,
+    ChoiceField,
+    Field,
+    ListField,
+    ListSerializer,
+    Serializer
 )
 
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator
 
+from soft_desk_support.serializers import ModelSerializer
 from .models import Project, Contributor, Issue, Comment
-from .const import ISSUE_LIST_FIELDS
+from .const import (
+    ISSUE_LIST_FIELDS,
+    ISSUE_PRIORITIES,
+    ISSUE_STATUSES,
+)
 
 User = get_user_model()
 
@@ -56,18 +68,19 @@ class ContributorSerializer(ModelSerializer):
         fields = ["id", "user", "project"]
         read_only_fields = ["id", "project"]
 
-    def validate(self, attrs):
-        project_id = self.context["view"].kwargs.get("project_pk")
-        user = attrs.get("user")
-        if Contributor.objects.filter(
-            user=user, 
-            project_id=project_id
-        ).exists():
-            raise ValidationError(
-                "This user is already contributing "
-                "to the project"
-            )
-        return attrs
+    def save(self, **kwargs):
+        # The (user, project) pair is the only constraint the
+        # validated data can break: the duplicates are reported from
+        # it rather than looked up before the save.
+        try:
+            return super().save(**kwargs)
+        except IntegrityError:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    "This user is already contributing "
+                    "to the project"
+                ]
+            })
 
 
 class CommentSerializer(ModelSerializer):
@@ -86,10 +99,19 @@ class IssueSerializerMixin:
     """
     Mixin for issue serializers, providing shared logic such
     as comment count.
+
+    The count is read from the `comments_count` annotation
+    (see `IssueQuerySet.with_comments_count`) when the queryset
+    provides it, so that listing issues does not run one COUNT
+    query per row; lists serialized from `.values()` rows read it
+    directly (see `values_sources`).
     """
     comments_count = SerializerMethodField()
+    values_sources = {"comments_count": "comments_count"}
 
     def get_comments_count(self, instance):
+        if hasattr(instance, "comments_count"):
+            return instance.comments_count
         return instance.comments.count()
 
 
@@ -160,7 +182,165 @@ class IssueDetailSerializer(
         ]
 
 
-class ProjectListSerializer(ModelSerializer):
+def get_bulk_max_size():
+    return getattr(settings, "BULK_MAX_SIZE", 500)
+
+
+def get_unknown_user_ids(user_ids):
+    """
+    Returns the ids, among `user_ids`, of no user, in a single
+    query.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return set()
+    return user_ids - set(
+        User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+    )
+
+
+def unknown_user_error(user_id):
+    return PrimaryKeyRelatedField.default_error_messages[
+        "does_not_exist"
+    ].format(pk_value=user_id)
+
+
+class BulkIssueListSerializer(ListSerializer):
+    """
+    List serializer validating a batch of issues in one pass: the
+    assignees of every issue are checked with a single query,
+    instead of one per issue.
+    """
+
+    def to_internal_value(self, data):
+        issues = super().to_internal_value(data)
+        unknown = get_unknown_user_ids(
+            issue.get("assignee_id") for issue in issues
+        )
+        if unknown:
+            raise ValidationError([
+                {"assignee": [unknown_user_error(issue["assignee_id"])]}
+                if issue.get("assignee_id") in unknown else {}
+                for issue in issues
+            ])
+        return issues
+
+
+class IssueBulkCreateSerializer(IssueDetailSerializer):
+    """
+    Serializer of the issues created by the `bulk` action of the
+    issues: the assignee is read as an id and checked by
+    `BulkIssueListSerializer` for the whole batch.
+    """
+    assignee = IntegerField(
+        source="assignee_id",
+        required=False,
+        allow_null=True
+    )
+
+    class Meta(IssueDetailSerializer.Meta):
+        list_serializer_class = BulkIssueListSerializer
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs.setdefault("max_length", get_bulk_max_size())
+        kwargs.setdefault("allow_empty", False)
+        return super().many_init(*args, **kwargs)
+
+
+class IssueBulkUpdateSerializer(Serializer):
+    """
+    Changes applied by the `bulk_update` action of the issues to
+    every issue of `ids`: at least one of `status`, `priority` and
+    `assignee`.
+    """
+    ids = ListField(child=IntegerField(), allow_empty=False)
+    status = ChoiceField(choices=ISSUE_STATUSES, required=False)
+    priority = ChoiceField(choices=ISSUE_PRIORITIES, required=False)
+    assignee = IntegerField(
+        source="assignee_id",
+        required=False,
+        allow_null=True
+    )
+
+    def validate_ids(self, value):
+        if len(value) > get_bulk_max_size():
+            raise ValidationError(
+                f"Ensure this field has no more than "
+                f"{get_bulk_max_size()} elements."
+            )
+        return value
+
+    def validate_assignee(self, value):
+        if get_unknown_user_ids([value]):
+            raise ValidationError(unknown_user_error(value))
+        return value
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise ValidationError(
+                "Set at least one of status, priority and assignee."
+            )
+        attrs["ids"] = sorted(set(attrs["ids"]))
+        return attrs
+
+
+class UserReferenceField(Field):
+    """
+    A user given by id (an integer) or by username (a string).
+    """
+    default_error_messages = {
+        "invalid": "Must be a user id or a username.",
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            return data
+        if isinstance(data, str) and data.strip():
+            return data.strip()
+        self.fail("invalid")
+
+    def to_representation(self, value):
+        return value
+
+
+class ContributorBulkSerializer(Serializer):
+    """
+    Users added to (`add`) and removed from (`remove`) a project by
+    the `bulk` action of the contributors.
+    """
+    add = ListField(child=UserReferenceField(), default=list)
+    remove = ListField(child=UserReferenceField(), default=list)
+
+    def validate(self, attrs):
+        count = len(attrs["add"]) + len(attrs["remove"])
+        if not count:
+            raise ValidationError("Give the users to add or remove.")
+        if count > get_bulk_max_size():
+            raise ValidationError(
+                f"Ensure no more than {get_bulk_max_size()} users "
+                f"are given."
+            )
+        return attrs
+
+
+class ProjectNameMixin:
+    """
+    Mixin reporting a project name already taken from the unique
+    constraint of `Project.name`, the only one the validated data
+    can break, instead of looking the name up before every save.
+    """
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except IntegrityError:
+            raise ValidationError({
+                "name": ["Project with this name already exists"]
+            })
+
+
+class ProjectListSerializer(ProjectNameMixin, ModelSerializer):
     """
     Serializer for listing basic project details.
     """
@@ -173,19 +353,11 @@ class ProjectListSerializer(ModelSerializer):
             "type",
             "description"
         ]
-
-    def validate_name(self, value):
-        """
-        Validates that the project name is unique.
-        """
-        if Project.objects.filter(name=value).exists():
-            raise ValidationError(
-                "Project with this name already exists"
-            )
-        return value
+        # See `ProjectNameMixin`.
+        extra_kwargs = {"name": {"validators": []}}
 
 
-class ProjectDetailSerializer(ModelSerializer):
+class ProjectDetailSerializer(ProjectNameMixin, ModelSerializer):
     """
     Detailed serializer for projects.
     Includes contributors and associated issues.
@@ -211,20 +383,31 @@ class ProjectDetailSerializer(ModelSerializer):
             "author",
             "created_time"
         ]
+        extra_kwargs = {"name": {"validators": []}}
 
     def get_contributors_count(self, instance):
         """
-        Returns serialized data for all contributors linked
-        to the project.
+        Returns the number of contributors linked to the project,
+        using the `contributors_count` annotation when available.
         """
+        if hasattr(instance, "contributors_count"):
+            return instance.contributors_count
         return instance.contributor_links.count()
 
     def get_issues(self, instance):
         """
         Returns minimal serialized data for all issues linked
         to the project.
+
+        Uses the issues prefetched by the view when available,
+        otherwise fetches them with their comments count in a
+        single query.
         """
-        queryset = instance.issues.all()
+        prefetched = getattr(instance, "_prefetched_objects_cache", {})
+        if "issues" in prefetched:
+            queryset = instance.issues.all()
+        else:
+            queryset = instance.issues.with_comments_count()
         serializer = IssueListSerializer(queryset, many=True)
         return serializer.data
 
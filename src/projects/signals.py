@@ -0,0 +1,230 @@
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from . import membership
+from .models import Project, Contributor, Issue, Comment
+from .response_cache import response_cache
+
+
+User = get_user_model()
+
+# Set within `projects_bumped`, by the bulk writes bumping the
+# projects of the rows they delete themselves.
+bumped_by_caller = ContextVar("bumped_by_caller", default=False)
+
+# Projects (or issues, for comments) already bumped by each
+# queryset deletion in progress.
+queryset_bumps = weakref.WeakKeyDictionary()
+
+
+@receiver([post_save, post_delete], sender=Contributor)
+def invalidate_contributor_memberships(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of the contributor.
+    """
+    membership.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_project_memberships(sender, instance, created=False,
+                                   update_fields=None, **kwargs):
+    """
+    Invalidates the cached memberships affected by a project write:
+    its author on creation, its previous and new authors when the
+    author changes, everyone if the previous author is unknown.
+    """
+    if created:
+        membership.invalidate_user(instance.author_id)
+        return
+    if update_fields is not None and "author" not in update_fields:
+        return
+    loaded_author_id = getattr(instance, "_loaded_author_id", None)
+    if loaded_author_id is None:
+        membership.invalidate_all()
+    elif loaded_author_id != instance.author_id:
+        membership.invalidate_users([loaded_author_id, instance.author_id])
+        instance._loaded_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_deleted_project_memberships(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of every user on deletion,
+    the contributors of the project losing it.
+    """
+    membership.invalidate_all()
+
+
+def invalidate_responses(project_id):
+    """
+    Invalidates the cached responses of a project once the current
+    transaction is committed, so that no response built from the
+    previous state can be cached under the new generation.
+    """
+    if response_cache.enabled and project_id is not None:
+        transaction.on_commit(
+            lambda: response_cache.invalidate(project_id)
+        )
+
+
+def bump_project(project_id):
+    """
+    Bumps the version of a project and invalidates its cached
+    responses; also called by the bulk writes, which send no
+    signal.
+    """
+    Project.objects.filter(pk=project_id).touch()
+    invalidate_responses(project_id)
+
+
+@contextmanager
+def projects_bumped():
+    """
+    Skips the bumps of the rows deleted through a queryset within
+    the block, whose caller bumps their projects once itself.
+    """
+    token = bumped_by_caller.set(True)
+    try:
+        yield
+    finally:
+        bumped_by_caller.reset(token)
+
+
+def is_cascade(instance, origin):
+    """
+    Returns True if the instance is deleted along with a parent
+    object, whose own deletion already bumps (or removes) the
+    project, once for all of its rows (see `touch_user_projects` for
+    users), or through a queryset within `projects_bumped`.
+    """
+    if origin is None or origin is instance:
+        return False
+    if isinstance(origin, QuerySet):
+        return (
+            origin.model is not type(instance) or bumped_by_caller.get()
+        )
+    return type(origin) is not type(instance)
+
+
+def is_bumped(origin, key):
+    """
+    Returns True if the project identified by `key` was already
+    bumped by the queryset deletion `origin`, and records it
+    otherwise: such deletions bump each project once.
+    """
+    if not isinstance(origin, QuerySet):
+        return False
+    bumped = queryset_bumps.setdefault(origin, set())
+    if key in bumped:
+        return True
+    bumped.add(key)
+    return False
+
+
+@receiver(post_save, sender=Project)
+def touch_project(sender, instance, created=False, **kwargs):
+    """
+    Invalidates the cached responses of an updated project, whose
+    version is bumped by `Project.save` itself.
+    """
+    if not created:
+        invalidate_responses(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Contributor)
+@receiver([post_save, post_delete], sender=Issue)
+def touch_parent_project(sender, instance, origin=None, **kwargs):
+    """
+    Bumps the version of the project of a contributor or an issue.
+    """
+    if is_cascade(instance, origin):
+        return
+    if is_bumped(origin, ("project", instance.project_id)):
+        return
+    bump_project(instance.project_id)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def touch_comment_project(sender, instance, origin=None, **kwargs):
+    """
+    Bumps the version of the project of a comment, found through
+    its issue within the UPDATE itself (or beforehand, when its
+    cached responses must be invalidated too, or when deleted by a
+    queryset, once per issue).
+    """
+    if is_cascade(instance, origin):
+        return
+    if is_bumped(origin, ("issue", instance.issue_id)):
+        return
+    if not response_cache.enabled and not isinstance(origin, QuerySet):
+        Project.objects.filter(issues=instance.issue_id).touch()
+        return
+    if Comment.issue.is_cached(instance):
+        project_id = instance.issue.project_id
+    else:
+        project_id = Issue.objects.filter(
+            pk=instance.issue_id
+        ).values_list("project_id", flat=True).first()
+    if not is_bumped(origin, ("project", project_id)):
+        bump_project(project_id)
+
+
+def get_touched_project_ids(user_id):
+    """
+    Returns the ids of the projects showing rows of a user: those
+    they contribute to, and those of the issues they opened or are
+    assigned to, and of the comments they wrote.
+    """
+    return list(Contributor.objects.filter(
+        user_id=user_id
+    ).values_list("project_id", flat=True).union(
+        Issue.objects.filter(
+            Q(author_id=user_id) | Q(assignee_id=user_id)
+        ).order_by().values_list("project_id"),
+        Comment.objects.filter(
+            author_id=user_id
+        ).order_by().values_list("issue__project_id"),
+    ))
+
+
+@receiver(pre_delete, sender=User)
+def collect_user_projects(sender, instance, **kwargs):
+    instance._touched_project_ids = get_touched_project_ids(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def touch_user_projects(sender, instance, **kwargs):
+    """
+    Bumps the version of every project the deleted user had rows in,
+    in a single UPDATE (their cascaded rows are skipped one by one).
+    """
+    project_ids = getattr(instance, "_touched_project_ids", None)
+    if not project_ids:
+        return
+    Project.objects.filter(pk__in=project_ids).touch()
+    for project_id in project_ids:
+        invalidate_responses(project_id)
+
+
+@receiver(post_save, sender=User)
+def touch_authored_projects(sender, instance, created=False,
+                            update_fields=None, **kwargs):
+    """
+    Bumps the version of the projects of a user whose username
+    changed, which their details show.
+    """
+    if created or (
+        update_fields is not None and "username" not in update_fields
+    ):
+        return
+    if getattr(instance, "_loaded_username", None) == instance.username:
+        return
+    Project.objects.filter(author_id=instance.pk).touch()
+    instance._loaded_username = instance.username
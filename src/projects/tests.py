@@ -1,3 +1,1857 @@
-# from django.test import TestCase
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import IntegrityError, connection
+from django.db.backends.sqlite3.base import (
+    DatabaseWrapper as SQLiteDatabaseWrapper
+)
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+from django.utils.timezone import localtime
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from soft_desk_support.database import copy_database, sqlite_database
+from soft_desk_support.fields import get_datetime_formatter
+from soft_desk_support.parsers import FastJSONParser
+from soft_desk_support.renderers import FastJSONRenderer
+from soft_desk_support.routers import (
+    PrimaryReplicaRouter, ReplicaRoutingMiddleware, reads_from_replica,
+    use_primary
+)
+from soft_desk_support.serializers import get_values_serializer
+from user.models import User
+from user.views import UserViewSet
+from .models import Project, Contributor, Issue, Comment
+from . import membership
+from .checks import check_shared_cache
+from .membership import memberships_cache
+from .response_cache import response_cache
+from .search import missing_triggers
+from .serializers import ProjectDetailSerializer, IssueListSerializer
+from .views import (
+    ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet
+)
+
+
+class ProjectsAPITestCase(APITestCase):
+    """
+    Base test case providing a project authored by `self.author`
+    and helpers to populate it.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username="author",
+            password="testpass123",
+            age=25
+        )
+        self.project = Project.objects.create(
+            name="Project",
+            type="BACKEND",
+            author=self.author
+        )
+        self.author_link = Contributor.objects.create(
+            user=self.author,
+            project=self.project
+        )
+        self.client.force_authenticate(self.author)
+
+    def create_issues(self, count, comments_per_issue=0):
+        issues = Issue.objects.bulk_create([
+            Issue(
+                title=f"Issue {i}",
+                project=self.project,
+                author=self.author,
+                priority="LOW",
+                label="BUG"
+            )
+            for i in range(count)
+        ])
+        Comment.objects.bulk_create([
+            Comment(
+                issue=issue,
+                author=self.author,
+                content=f"Comment {i}"
+            )
+            for issue in issues
+            for i in range(comments_per_issue)
+        ])
+        return issues
+
+    def count_queries(self, url, warm_up=False):
+        if warm_up:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+
+class TestAnnotatedCounts(ProjectsAPITestCase):
+
+    def test_issue_list_comments_count(self):
+        self.create_issues(3, comments_per_issue=2)
+        url = reverse_lazy(
+            "project_issues-list",
+            kwargs={"project_pk": self.project.pk}
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            [issue["comments_count"]
+             for issue in response.json()["results"]],
+            [2, 2, 2]
+        )
+
+    def test_project_detail_counts(self):
+        self.create_issues(2, comments_per_issue=3)
+        url = reverse_lazy(
+            "project-detail", kwargs={"pk": self.project.pk}
+        )
+        data = self.client.get(url).json()
+        self.assertEqual(data["contributors_count"], 1)
+        self.assertEqual(
+            [issue["comments_count"] for issue in data["issues"]],
+            [3, 3]
+        )
+
+    def test_project_detail_queries_do_not_grow(self):
+        url = reverse_lazy(
+            "project-detail", kwargs={"pk": self.project.pk}
+        )
+        self.create_issues(1, comments_per_issue=1)
+        few, _ = self.count_queries(url, warm_up=True)
+        self.create_issues(20, comments_per_issue=2)
+        many, response = self.count_queries(url)
+        self.assertEqual(len(response.json()["issues"]), 21)
+        self.assertEqual(few, many)
+
+    def test_issue_list_queries_do_not_grow(self):
+        url = reverse_lazy(
+            "project_issues-list",
+            kwargs={"project_pk": self.project.pk}
+        )
+        self.create_issues(1, comments_per_issue=1)
+        few, _ = self.count_queries(url, warm_up=True)
+        self.create_issues(20, comments_per_issue=2)
+        many, _ = self.count_queries(url)
+        self.assertEqual(few, many)
+
+
+class TestMembershipCache(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(
+            username="other",
+            password="testpass123",
+            age=25
+        )
+        self.issue = self.create_issues(1)[0]
+        self.url = reverse_lazy(
+            "project_issues-detail",
+            kwargs={"project_pk": self.project.pk, "pk": self.issue.pk}
+        )
+
+    def test_memberships_are_cached_across_requests(self):
+        first, _ = self.count_queries(self.url)
+        second, _ = self.count_queries(self.url)
+        self.assertEqual(second, first - 1)
+
+    def test_contributor_changes_invalidate_memberships(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        link = Contributor.objects.create(
+            user=self.other, project=self.project
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        link.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_project_author_change_invalidates_memberships(self):
+        Contributor.objects.create(user=self.other, project=self.project)
+        url = reverse_lazy(
+            "project_contributors-detail",
+            kwargs={
+                "project_pk": self.project.pk,
+                "pk": self.author_link.pk
+            }
+        )
+        self.client.force_authenticate(self.other)
+        self.assertEqual(
+            self.client.get(url).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        self.project.author = self.other
+        self.project.save()
+        self.assertNotEqual(
+            self.client.get(url).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+
+    def test_only_author_changes_invalidate_every_user(self):
+        project = Project.objects.get(pk=self.project.pk)
+        version = cache.get(membership.GLOBAL_VERSION_KEY)
+        project.description = "Updated"
+        project.save()
+        self.assertEqual(cache.get(membership.GLOBAL_VERSION_KEY), version)
+
+        user_key = membership.USER_VERSION_KEY.format(user_id=self.other.id)
+        user_version = cache.get(user_key)
+        project.author = self.other
+        project.save()
+        self.assertEqual(cache.get(membership.GLOBAL_VERSION_KEY), version)
+        self.assertNotEqual(cache.get(user_key), user_version)
+
+    def test_memberships_cached_before_the_commit_miss(self):
+        self.client.force_authenticate(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            Contributor.objects.create(user=self.other, project=self.project)
+            # A concurrent request caching the state before the commit.
+            memberships_cache.set(
+                self.other.id,
+                membership._get_version(self.other.id),
+                membership.ProjectMemberships()
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(MEMBERSHIP_CACHE_TTL=0)
+    def test_memberships_expire(self):
+        first, _ = self.count_queries(self.url)
+        second, _ = self.count_queries(self.url)
+        self.assertEqual(second, first)
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)],
+            ["projects.E001"]
+        )
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://127.0.0.1:6379",
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class TestKeysetPagination(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1, comments_per_issue=12)[0]
+        self.url = reverse_lazy(
+            "issue_comments-list",
+            kwargs={
+                "project_pk": self.project.pk,
+                "issue_pk": self.issue.pk
+            }
+        )
+
+    def test_cursor_walks_every_comment_once(self):
+        seen = []
+        url = self.url
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn("count", data)
+            seen.extend(comment["id"] for comment in data["results"])
+            url = data["next"]
+        expected = Comment.objects.order_by(
+            "-created_time", "-id"
+        ).values_list("id", flat=True)
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    def test_page_size_is_capped(self):
+        with self.settings(MAX_PAGE_SIZE=10):
+            data = self.client.get(self.url, {"page_size": 50}).json()
+        self.assertEqual(len(data["results"]), 10)
+        data = self.client.get(self.url, {"page_size": 8}).json()
+        self.assertEqual(len(data["results"]), 8)
+
+
+class TestQueryPlans(APITestCase):
+
+    def test_viewset_queries_use_indexes(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("No full table scan.", out.getvalue())
+
+
+class TestDatabaseProfiles(SimpleTestCase):
+
+    def connect(self, profile):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = {
+            **connection.settings_dict,
+            **sqlite_database(
+                os.path.join(directory.name, "db.sqlite3"), profile
+            ),
+        }
+        database = SQLiteDatabaseWrapper(settings_dict, alias="profile")
+        self.addCleanup(database.close)
+        return database
+
+    def pragma(self, database, name):
+        with database.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_production_pragmas(self):
+        database = self.connect("production")
+        self.assertEqual(self.pragma(database, "journal_mode"), "wal")
+        # NORMAL
+        self.assertEqual(self.pragma(database, "synchronous"), 1)
+        self.assertEqual(self.pragma(database, "busy_timeout"), 5000)
+        self.assertEqual(self.pragma(database, "cache_size"), -64_000)
+        # MEMORY
+        self.assertEqual(self.pragma(database, "temp_store"), 2)
+        self.assertEqual(database.transaction_mode, "IMMEDIATE")
+        self.assertEqual(database.settings_dict["CONN_MAX_AGE"], 600)
+        self.assertTrue(database.settings_dict["CONN_HEALTH_CHECKS"])
+
+    def test_default_profile(self):
+        database = self.connect("default")
+        self.assertEqual(self.pragma(database, "journal_mode"), "delete")
+        self.assertIsNone(database.transaction_mode)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ImproperlyConfigured):
+            sqlite_database("db.sqlite3", "fast")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class TestReplicaRouting(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.route)
+
+    def route(self, request):
+        # Stands in for the view: tells where its reads would go.
+        request.user = getattr(request, "view_user", None)
+        return self.router.db_for_read(Issue)
+
+    def request(self, method="get", user=None, **extra):
+        if user is not None:
+            extra["HTTP_AUTHORIZATION"] = (
+                f"Bearer {AccessToken.for_user(user)}"
+            )
+        request = getattr(self.factory, method)("/api/projects/", **extra)
+        request.view_user = user
+        return self.middleware(request)
+
+    def test_safe_requests_read_from_the_replicas(self):
+        self.assertIn(self.request(), ["replica1", "replica2"])
+        self.assertIn(
+            self.request(user=self.author), ["replica1", "replica2"]
+        )
+        self.assertIn(
+            self.request("head", user=self.author), ["replica1", "replica2"]
+        )
+
+    def test_requests_read_from_a_single_replica(self):
+        def route(request):
+            return {self.router.db_for_read(Issue) for _ in range(20)}
+
+        middleware = ReplicaRoutingMiddleware(route)
+        for _ in range(10):
+            aliases = middleware(self.factory.get("/api/projects/"))
+            self.assertEqual(len(aliases), 1)
+            self.assertIn(aliases.pop(), ["replica1", "replica2"])
+
+    def test_cached_data_is_read_from_the_primary(self):
+        def route(request):
+            with use_primary():
+                memberships_alias = self.router.db_for_read(Contributor)
+            return memberships_alias, reads_from_replica()
+
+        middleware = ReplicaRoutingMiddleware(route)
+        self.assertEqual(
+            middleware(self.factory.get("/api/projects/")),
+            ("default", True)
+        )
+        self.assertFalse(reads_from_replica())
+
+    def test_other_queries_use_the_primary(self):
+        self.assertEqual(self.request("post", user=self.author), "default")
+        self.assertEqual(self.router.db_for_read(Issue), "default")
+        self.assertEqual(self.router.db_for_write(Issue), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "projects"))
+        self.assertTrue(self.router.allow_migrate("default", "projects"))
+
+    def test_writers_read_their_writes(self):
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=30
+        )
+        self.request("patch", user=self.author)
+        self.assertEqual(self.request(user=self.author), "default")
+        self.assertIn(self.request(user=other), ["replica1", "replica2"])
+
+        cache.clear()
+        self.assertIn(
+            self.request(user=self.author), ["replica1", "replica2"]
+        )
+
+    @override_settings(READ_YOUR_WRITES_WINDOW=0.05)
+    def test_pin_expires(self):
+        self.request("post", user=self.author)
+        self.assertEqual(self.request(user=self.author), "default")
+        time.sleep(0.1)
+        self.assertIn(
+            self.request(user=self.author), ["replica1", "replica2"]
+        )
+
+    def test_session_authenticated_requests(self):
+        # Through the whole middleware stack, the only "replica"
+        # being the test database.
+        self.client.force_login(self.author)
+        with self.settings(DATABASE_REPLICAS=["default"]):
+            response = self.client.get(reverse_lazy("user-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.request(user=self.author), "default")
+
+    def test_replicas_are_copies(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, "primary.sqlite3")
+            replica = os.path.join(directory, "replica.sqlite3")
+            with closing(sqlite3.connect(primary)) as database:
+                database.execute("CREATE TABLE issue (title TEXT)")
+                database.execute("INSERT INTO issue VALUES ('Replicated')")
+                database.commit()
+                copy_database(primary, replica)
+                database.execute("INSERT INTO issue VALUES ('Later')")
+                database.commit()
+            with closing(sqlite3.connect(replica)) as database:
+                self.assertEqual(
+                    database.execute("SELECT title FROM issue").fetchall(),
+                    [("Replicated",)]
+                )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_sync_replicas_requires_replicas(self):
+        with self.assertRaises(CommandError):
+            call_command("sync_replicas")
+
+
+class TestSeedScale(APITestCase):
+
+    def seed(self, **options):
+        call_command(
+            "seed_scale", users=20, projects=5, max_contributors=8,
+            issues=60, comments=200, batch_size=25, stdout=StringIO(),
+            **options
+        )
+
+    def test_volumes_and_consistency(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Issue.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 200)
+        for project in Project.objects.all():
+            self.assertTrue(project.contributor_links.filter(
+                user_id=project.author_id
+            ).exists())
+        self.assertFalse(Issue.objects.exclude(
+            author__contribution_links__project=F("project")
+        ).exists())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM projects_comment_fts")
+            self.assertEqual(cursor.fetchone()[0], 200)
+
+    def test_reproducible(self):
+        self.seed()
+        first = list(Issue.objects.values_list("title", "project__name"))
+        self.seed(prefix="other")
+        second = list(Issue.objects.filter(
+            project__name__startswith="other"
+        ).values_list("title", "project__name"))
+        self.assertEqual(
+            [title for title, _ in first], [title for title, _ in second]
+        )
+
+
+class TestFullTextSearch(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = Issue.objects.create(
+            title="Login page crashes",
+            description="The form fails on Safari",
+            project=self.project,
+            author=self.author,
+            priority="HIGH",
+            label="BUG"
+        )
+        self.other_issue = Issue.objects.create(
+            title="Add dark theme",
+            project=self.project,
+            author=self.author,
+            priority="LOW",
+            label="FEATURE"
+        )
+        self.comment = Comment.objects.create(
+            issue=self.other_issue,
+            author=self.author,
+            content="Safari renders the theme differently"
+        )
+        self.issues_url = reverse_lazy(
+            "project_issues-list",
+            kwargs={"project_pk": self.project.pk}
+        )
+        self.search_url = reverse_lazy("search")
+
+    def test_issue_search(self):
+        data = self.client.get(self.issues_url, {"q": "crash"}).json()
+        self.assertEqual(data["results"], [])
+        data = self.client.get(self.issues_url, {"q": "safari"}).json()
+        self.assertEqual(
+            [issue["issue_id"] for issue in data["results"]],
+            [self.issue.pk]
+        )
+
+    def test_comment_search(self):
+        url = reverse_lazy(
+            "issue_comments-list",
+            kwargs={
+                "project_pk": self.project.pk,
+                "issue_pk": self.other_issue.pk
+            }
+        )
+        data = self.client.get(url, {"q": "theme"}).json()
+        self.assertEqual(
+            [comment["id"] for comment in data["results"]],
+            [str(self.comment.pk)]
+        )
+        data = self.client.get(url, {"q": '"login" OR'}).json()
+        self.assertEqual(data["results"], [])
+
+    def test_comments_are_found_after_their_rowids_change(self):
+        # As `VACUUM` may do for `projects_comment`, whose primary key
+        # is a UUID.
+        other = Comment.objects.create(
+            issue=self.other_issue, author=self.author, content="Other"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE projects_comment SET rowid = rowid + 1000"
+            )
+            cursor.execute(
+                "UPDATE projects_comment SET rowid = 3000 - rowid"
+            )
+        url = reverse_lazy("issue_comments-list", kwargs={
+            "project_pk": self.project.pk, "issue_pk": self.other_issue.pk
+        })
+        data = self.client.get(url, {"q": "theme"}).json()
+        self.assertEqual(
+            [comment["id"] for comment in data["results"]],
+            [str(self.comment.pk)]
+        )
+        data = self.client.get(self.search_url, {"q": "theme"}).json()
+        self.assertIn(
+            {"type": "comment", "id": str(self.comment.pk)},
+            [{key: r[key] for key in ("type", "id")}
+             for r in data["results"]]
+        )
+        other.delete()
+        self.comment.content = "Safari renders the theme in dark"
+        self.comment.save()
+        data = self.client.get(url, {"q": "dark"}).json()
+        self.assertEqual(len(data["results"]), 1)
+
+    def test_index_follows_writes(self):
+        self.issue.title = "Logout button missing"
+        self.issue.save()
+        self.comment.delete()
+        data = self.client.get(self.search_url, {"q": "safari"}).json()
+        self.assertEqual(
+            [(result["type"], result["id"])
+             for result in data["results"]],
+            [("issue", self.issue.pk)]
+        )
+        data = self.client.get(self.search_url, {"q": "logout"}).json()
+        self.assertEqual(len(data["results"]), 1)
+
+    def test_index_follows_issue_moves(self):
+        project = Project.objects.create(
+            name="Other project",
+            type="FRONTEND",
+            author=self.author
+        )
+        Contributor.objects.create(user=self.author, project=project)
+        Issue.objects.filter(pk=self.other_issue.pk).update(
+            project=project
+        )
+        data = self.client.get(self.search_url, {"q": "theme"}).json()
+        self.assertEqual(
+            {result["project_id"] for result in data["results"]},
+            {project.pk}
+        )
+
+    def test_search_is_ranked_and_paginated(self):
+        best = Issue.objects.create(
+            title="Safari",
+            description="Safari safari safari",
+            project=self.project,
+            author=self.author,
+            priority="LOW",
+            label="BUG"
+        )
+        data = self.client.get(
+            self.search_url, {"q": "safari", "page_size": 2}
+        ).json()
+        self.assertEqual(data["results"][0]["id"], best.pk)
+        self.assertEqual(len(data["results"]), 2)
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+
+    def test_search_is_limited_to_contributed_projects(self):
+        other = User.objects.create_user(
+            username="other",
+            password="testpass123",
+            age=25
+        )
+        self.client.force_authenticate(other)
+        data = self.client.get(self.search_url, {"q": "safari"}).json()
+        self.assertEqual(data["results"], [])
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM projects_comment_fts")
+        call_command("rebuild_search_index", stdout=StringIO())
+        data = self.client.get(self.search_url, {"q": "theme"}).json()
+        self.assertEqual(
+            {result["type"] for result in data["results"]},
+            {"issue", "comment"}
+        )
+
+    def test_missing_triggers_are_reinstalled_after_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER projects_comment_fts_insert")
+            cursor.execute("DELETE FROM projects_comment_fts")
+        with self.assertLogs("projects.search", "WARNING"):
+            emit_post_migrate_signal(0, False, "default")
+        with connection.cursor() as cursor:
+            self.assertEqual(missing_triggers(cursor), [])
+        data = self.client.get(self.search_url, {"q": "theme"}).json()
+        self.assertIn("comment", {r["type"] for r in data["results"]})
+        with self.assertNoLogs("projects.search", "WARNING"):
+            emit_post_migrate_signal(0, False, "default")
+
+
+class TestBulkIssues(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse_lazy(
+            "project_issues-bulk",
+            kwargs={"project_pk": self.project.pk}
+        )
+        self.other = User.objects.create_user(
+            username="other",
+            password="testpass123",
+            age=25
+        )
+
+    def issues(self, count, **fields):
+        return [
+            {"title": f"Bulk {i}", "label": "BUG", "priority": "LOW",
+             **fields}
+            for i in range(count)
+        ]
+
+    def test_create(self):
+        version = self.project.version
+        response = self.client.post(
+            self.url, self.issues(3, assignee=self.other.pk), format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(response.json()[0]["comments_count"], 0)
+        issues = Issue.objects.filter(title__startswith="Bulk")
+        self.assertEqual(
+            set(issues.values_list("project", "author", "assignee")),
+            {(self.project.pk, self.author.pk, self.other.pk)}
+        )
+        self.project.refresh_from_db()
+        self.assertGreater(self.project.version, version)
+        data = self.client.get(reverse_lazy("search"), {"q": "bulk"}).json()
+        self.assertEqual(len(data["results"]), 3)
+
+    def test_create_validates_the_whole_batch(self):
+        data = self.issues(3)
+        data[1]["assignee"] = 10 ** 6
+        data[2]["priority"] = "URGENT"
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("priority", errors[2])
+        self.assertFalse(Issue.objects.exists())
+
+        data[2]["priority"] = "LOW"
+        errors = self.client.post(self.url, data, format="json").json()
+        self.assertEqual(list(errors[1]), ["assignee"])
+
+        with override_settings(BULK_MAX_SIZE=2):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_create_queries_do_not_grow(self):
+        counts = []
+        for count in (1, 50):
+            memberships_cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(
+                    self.url,
+                    self.issues(count, assignee=self.author.pk),
+                    format="json"
+                )
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Issue.objects.count(), 51)
+
+    def test_update(self):
+        issues = self.create_issues(3)
+        untouched = self.create_issues(1)[0]
+        version = Project.objects.get(pk=self.project.pk).version
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {
+                "ids": [issue.pk for issue in issues],
+                "status": "FINISHED",
+                "assignee": self.other.pk,
+            }, format="json")
+        self.assertEqual(response.json(), {"updated": 3})
+        self.assertEqual(len([
+            query for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "projects_issue"')
+        ]), 1)
+        self.assertEqual(
+            set(Issue.objects.filter(
+                pk__in=[issue.pk for issue in issues]
+            ).values_list("status", "assignee")),
+            {("FINISHED", self.other.pk)}
+        )
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.status, "TODO")
+        self.assertGreater(
+            Project.objects.get(pk=self.project.pk).version, version
+        )
+
+    def test_update_checks_the_whole_batch(self):
+        issue = self.create_issues(1)[0]
+        foreign = Issue.objects.create(
+            title="Foreign", project=self.project, author=self.other,
+            priority="LOW", label="BUG"
+        )
+        Contributor.objects.create(user=self.other, project=self.project)
+        for ids, changes, expected in [
+            ([issue.pk], {}, status.HTTP_400_BAD_REQUEST),
+            ([issue.pk, 10 ** 6], {"status": "FINISHED"},
+             status.HTTP_404_NOT_FOUND),
+            ([issue.pk, foreign.pk], {"status": "FINISHED"},
+             status.HTTP_403_FORBIDDEN),
+        ]:
+            response = self.client.patch(
+                self.url, {"ids": ids, **changes}, format="json"
+            )
+            self.assertEqual(response.status_code, expected)
+        self.assertFalse(
+            Issue.objects.filter(status="FINISHED").exists()
+        )
+
+    def test_non_contributors_are_forbidden(self):
+        project = Project.objects.create(
+            name="Other", type="IOS", author=self.other
+        )
+        Contributor.objects.create(user=self.other, project=project)
+        url = reverse_lazy(
+            "project_issues-bulk", kwargs={"project_pk": project.pk}
+        )
+        response = self.client.post(url, self.issues(1), format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Issue.objects.exists())
+
+
+class TestBulkContributors(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = User.objects.bulk_create([
+            User(username=f"member-{i}", age=30) for i in range(4)
+        ])
+        Contributor.objects.create(user=self.users[0], project=self.project)
+        self.url = reverse_lazy(
+            "project_contributors-bulk",
+            kwargs={"project_pk": self.project.pk}
+        )
+
+    def results(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (result["user"], result["result"])
+            for result in response.json()["results"]
+        ]
+
+    def test_add_and_remove(self):
+        version = Project.objects.get(pk=self.project.pk).version
+        response = self.client.post(self.url, {
+            "add": [self.users[1].pk, "member-2", "member-1", "nobody"],
+            "remove": [self.users[0].pk, self.users[3].pk, "author"],
+        }, format="json")
+        self.assertEqual(self.results(response), [
+            (self.users[1].pk, "added"),
+            ("member-2", "added"),
+            ("member-1", "already_contributor"),
+            ("nobody", "not_found"),
+            (self.users[0].pk, "removed"),
+            (self.users[3].pk, "not_contributor"),
+            ("author", "is_author"),
+        ])
+        self.assertEqual(
+            set(self.project.contributor_links.values_list(
+                "user", flat=True
+            )),
+            {self.author.pk, self.users[1].pk, self.users[2].pk}
+        )
+        self.assertGreater(
+            Project.objects.get(pk=self.project.pk).version, version
+        )
+
+    def test_memberships_are_invalidated(self):
+        issues_url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        self.client.force_authenticate(self.users[1])
+        self.assertEqual(
+            self.client.get(issues_url).status_code,
+            status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(self.author)
+        self.client.post(self.url, {"add": ["member-1"]}, format="json")
+        self.client.force_authenticate(self.users[1])
+        self.assertEqual(
+            self.client.get(issues_url).status_code, status.HTTP_200_OK
+        )
+
+    def test_queries_do_not_grow(self):
+        users = User.objects.bulk_create([
+            User(username=f"team-{i}", age=30) for i in range(200)
+        ])
+        counts = []
+        for team, leaving in [
+            (users[:1], "member-0"), (users[1:], users[0].username)
+        ]:
+            memberships_cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.url, {
+                    "add": [user.username for user in team],
+                    "remove": [leaving],
+                }, format="json")
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(self.project.contributor_links.count(), 200)
+
+    def test_invalid_requests(self):
+        for data in [
+            {}, {"add": [True]}, {"add": [1], "remove": [1]},
+        ]:
+            response = self.client.post(self.url, data, format="json")
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(
+            self.url, {"add": ["member-1"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestWriteStatements(ProjectsAPITestCase):
+    """
+    Checks the statements of the write endpoints, each of which runs
+    in a single transaction (see `AtomicWriteMixin`), the conflicts
+    being caught by the database constraints.
+    """
+
+    def writes(self, method, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format="json")
+        return response, [
+            query["sql"].split(" (")[0].split(" SET ")[0].split(" WHERE ")[0]
+            for query in context.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def test_project_create(self):
+        response, writes = self.writes(
+            "post", reverse_lazy("project-list"),
+            {"name": "New", "type": "IOS"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(writes, [
+            'INSERT INTO "projects_project"',
+            'INSERT INTO "projects_contributor"',
+        ])
+        self.assertEqual(response.json()["contributors_count"], 1)
+        self.assertEqual(response.json()["issues"], [])
+
+    def test_project_update_bumps_the_version_in_place(self):
+        self.project.refresh_from_db()
+        version = self.project.version
+        response, writes = self.writes(
+            "patch",
+            reverse_lazy("project-detail", kwargs={"pk": self.project.pk}),
+            {"description": "Updated"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(writes, ['UPDATE "projects_project"'])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.version, version + 1)
+
+    def test_issue_create_and_update(self):
+        url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        response, writes = self.writes("post", url, {
+            "title": "New", "label": "BUG", "priority": "LOW",
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["comments_count"], 0)
+        self.assertEqual(writes, [
+            'INSERT INTO "projects_issue"',
+            'UPDATE "projects_project"',
+        ])
+        response, writes = self.writes(
+            "patch",
+            reverse_lazy("project_issues-detail", kwargs={
+                "project_pk": self.project.pk, "pk": response.json()["id"]
+            }),
+            {"status": "FINISHED"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(writes, [
+            'UPDATE "projects_issue"',
+            'UPDATE "projects_project"',
+        ])
+
+    def test_unique_project_name(self):
+        other = Project.objects.create(
+            name="Other", type="IOS", author=self.author
+        )
+        Contributor.objects.create(user=self.author, project=other)
+        response = self.client.post(
+            reverse_lazy("project-list"),
+            {"name": "Project", "type": "IOS"},
+            format="json"
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertIn("name", response.json())
+        self.assertEqual(Project.objects.count(), 2)
+
+        response = self.client.patch(
+            reverse_lazy("project-detail", kwargs={"pk": other.pk}),
+            {"name": "Project"},
+            format="json"
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        other.refresh_from_db()
+        self.assertEqual(other.name, "Other")
+
+    def test_duplicate_contributor(self):
+        response = self.client.post(
+            reverse_lazy(
+                "project_contributors-list",
+                kwargs={"project_pk": self.project.pk}
+            ),
+            {"user": self.author.pk},
+            format="json"
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertIn("non_field_errors", response.json())
+        self.assertEqual(self.project.contributor_links.count(), 1)
+
+    def test_failed_writes_are_rolled_back(self):
+        self.client.raise_request_exception = False
+        with mock.patch.object(
+            Contributor.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            response = self.client.post(
+                reverse_lazy("project-list"),
+                {"name": "New", "type": "IOS"},
+                format="json"
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+        self.assertFalse(Project.objects.filter(name="New").exists())
+
+
+class TestProjectScope(ProjectsAPITestCase):
+    """
+    Checks the nested routes, whose project and issue are resolved
+    once per request (see `projects.scope`).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1, comments_per_issue=2)[0]
+        self.other_project = Project.objects.create(
+            name="Other", type="IOS", author=self.author
+        )
+        Contributor.objects.create(
+            user=self.author, project=self.other_project
+        )
+
+    def comments_url(self, project):
+        return reverse_lazy("issue_comments-list", kwargs={
+            "project_pk": project.pk, "issue_pk": self.issue.pk
+        })
+
+    def test_issue_of_another_project_is_not_found(self):
+        url = self.comments_url(self.other_project)
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+        )
+        response = self.client.post(url, {"content": "Text"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.issue.comments.count(), 2)
+
+    def test_missing_project_is_not_found(self):
+        response = self.client.get(reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": 0}
+        ))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_staff_members_keep_their_access_to_issues(self):
+        staff = User.objects.create_user(
+            username="staff", password="testpass123", age=30,
+            is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 1)
+        response = self.client.post(url, {
+            "title": "Staff", "label": "BUG", "priority": "LOW",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.project.issues.count(), 2)
+
+    def test_hierarchy_is_loaded_once(self):
+        detail_url = reverse_lazy("issue_comments-detail", kwargs={
+            "project_pk": self.project.pk,
+            "issue_pk": self.issue.pk,
+            "pk": self.issue.comments.first().pk,
+        })
+        requests = [
+            ("get", self.comments_url(self.project), None),
+            ("post", self.comments_url(self.project), {"content": "Text"}),
+            ("get", detail_url, None),
+            ("patch", detail_url, {"content": "Updated"}),
+        ]
+        for method, url, data in requests:
+            with self.subTest(method=method, url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = getattr(self.client, method)(
+                        url, data, format="json"
+                    )
+                self.assertLess(response.status_code, 400)
+                lookups = [
+                    query["sql"] for query in context.captured_queries
+                    if query["sql"].startswith("SELECT")
+                    and '"projects_project"."author_id",' in query["sql"]
+                ]
+                self.assertEqual(len(lookups), 1, lookups)
+
+
+class TestConditionalGet(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issues(1, comments_per_issue=1)[0]
+        self.url = reverse_lazy(
+            "project-detail", kwargs={"pk": self.project.pk}
+        )
+
+    def get_etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response["ETag"]
+
+    def test_unchanged_project_is_not_modified(self):
+        etag = self.get_etag(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        response = self.client.get(
+            self.url,
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_change_the_etag(self):
+        urls = [
+            self.url,
+            reverse_lazy("project-list"),
+            reverse_lazy(
+                "project_issues-list",
+                kwargs={"project_pk": self.project.pk}
+            ),
+            reverse_lazy(
+                "issue_comments-list",
+                kwargs={
+                    "project_pk": self.project.pk,
+                    "issue_pk": self.issue.pk
+                }
+            ),
+        ]
+        writes = [
+            lambda: Comment.objects.create(
+                issue=self.issue, author=self.author, content="New"
+            ),
+            lambda: self.issue.comments.first().delete(),
+            lambda: Issue.objects.filter(pk=self.issue.pk).first().save(),
+            lambda: Contributor.objects.create(
+                user=User.objects.create_user(
+                    username="other", password="testpass123", age=25
+                ),
+                project=self.project
+            ),
+            lambda: self.project.save(),
+        ]
+        for write in writes:
+            etags = [self.get_etag(url) for url in urls]
+            write()
+            for url, etag in zip(urls, etags):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, status.HTTP_200_OK, url
+                )
+
+    def test_non_contributors_are_not_answered(self):
+        etag = self.get_etag(self.url)
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        Project.objects.create(name="Other", type="IOS", author=other)
+        Contributor.objects.create(
+            user=other,
+            project=Project.objects.get(name="Other")
+        )
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_a_commenter_changes_the_etag(self):
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        Contributor.objects.create(user=other, project=self.project)
+        Comment.objects.create(issue=self.issue, author=other, content="B")
+        url = reverse_lazy("issue_comments-list", kwargs={
+            "project_pk": self.project.pk, "issue_pk": self.issue.pk
+        })
+        etag = self.get_etag(url)
+        self.client.force_authenticate(other)
+        response = self.client.delete(
+            reverse_lazy("user-detail", kwargs={"pk": other.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.client.force_authenticate(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_username_changes_change_the_etag(self):
+        etag = self.get_etag(self.url)
+        response = self.client.patch(
+            reverse_lazy("user-detail", kwargs={"pk": self.author.pk}),
+            {"username": "renamed"},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["author"], "renamed")
+
+        etag = response["ETag"]
+        self.client.patch(
+            reverse_lazy("user-detail", kwargs={"pk": self.author.pk}),
+            {"first_name": "Unchanged username"},
+            format="json"
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_queryset_deletions_change_the_etag(self):
+        self.create_issues(2, comments_per_issue=3)
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        Contributor.objects.create(user=other, project=self.project)
+        url = reverse_lazy(
+            "project_issues-list", kwargs={"project_pk": self.project.pk}
+        )
+        deletions = [
+            Comment.objects.filter(issue__project=self.project),
+            Issue.objects.filter(project=self.project),
+            Contributor.objects.filter(user=other),
+        ]
+        for queryset in deletions:
+            with self.subTest(model=queryset.model.__name__):
+                etag = self.get_etag(url)
+                version = Project.objects.get(pk=self.project.pk).version
+                queryset.delete()
+                # Once per project, whatever the number of rows.
+                self.assertEqual(
+                    Project.objects.get(pk=self.project.pk).version,
+                    version + 1
+                )
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleting_an_issue_cascades_without_fan_out(self):
+        self.create_issues(1, comments_per_issue=20)
+        issue = Issue.objects.last()
+        version = Project.objects.get(pk=self.project.pk).version
+        with CaptureQueriesContext(connection) as context:
+            issue.delete()
+        touches = [
+            query for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "projects_project"')
+        ]
+        self.assertEqual(len(touches), 1)
+        self.assertEqual(
+            Project.objects.get(pk=self.project.pk).version, version + 1
+        )
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class TestResponseCache(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+        response_cache.reset_stats()
+        self.issue = self.create_issues(3, comments_per_issue=2)[0]
+        self.url = reverse_lazy(
+            "project_issues-list",
+            kwargs={"project_pk": self.project.pk}
+        )
+
+    def test_second_request_is_a_hit(self):
+        first_count, first = self.count_queries(self.url)
+        second_count, second = self.count_queries(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertLess(second_count, first_count)
+        self.assertEqual(
+            response_cache.stats(),
+            {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+        )
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get(self.url, {"priority": "LOW", "page_size": 2})
+        response = self.client.get(
+            self.url, {"page_size": 2, "priority": "LOW"}
+        )
+        self.assertEqual(response["X-Cache"], "HIT")
+        response = self.client.get(self.url, {"page_size": 3})
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_writes_invalidate_the_project(self):
+        url = reverse_lazy(
+            "issue_comments-list",
+            kwargs={
+                "project_pk": self.project.pk,
+                "issue_pk": self.issue.pk
+            }
+        )
+        self.client.get(url)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                issue=self.issue, author=self.author, content="New"
+            )
+        for list_url in (url, self.url):
+            response = self.client.get(list_url)
+            self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(self.client.get(url).json()["results"]), 3)
+
+    def test_other_users_bypass_the_cache(self):
+        self.client.get(self.url)
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        Contributor.objects.create(
+            user=other,
+            project=Project.objects.create(
+                name="Other", type="IOS", author=other
+            )
+        )
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url)
+        self.assertNotIn("X-Cache", response)
+
+        contributor = Contributor.objects.create(
+            user=other, project=self.project
+        )
+        url = reverse_lazy(
+            "project_contributors-detail",
+            kwargs={"project_pk": self.project.pk, "pk": contributor.pk}
+        )
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+
+class TestExport(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(3, comments_per_issue=2)
+        self.url = reverse_lazy(
+            "project-export", kwargs={"pk": self.project.pk}
+        )
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_with_comments(self):
+        rows = [
+            json.loads(line)
+            for line in self.export(comments="true").splitlines()
+        ]
+        self.assertEqual(
+            [(row["type"], row.get("issue_id", row["id"])) for row in rows],
+            [
+                (kind, issue.pk)
+                for issue in self.issues
+                for kind in ("issue", "comment", "comment")
+            ]
+        )
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.export(output="csv"))))
+        self.assertEqual(
+            [(row["type"], row["title"]) for row in rows],
+            [("issue", issue.title) for issue in self.issues]
+        )
+
+    def test_queries_do_not_grow(self):
+        with self.settings(EXPORT_CHUNK_SIZE=2):
+            self.export()
+            with CaptureQueriesContext(connection) as few:
+                self.export(comments="1")
+            self.create_issues(10, comments_per_issue=3)
+            with CaptureQueriesContext(connection) as many:
+                self.export(comments="1")
+        self.assertEqual(
+            len(few.captured_queries), len(many.captured_queries)
+        )
+
+    def test_invalid_output_and_non_contributors(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestFastJSON(ProjectsAPITestCase):
+
+    def test_datetime_formatter_matches_strftime(self):
+        values = [
+            datetime.datetime(2025, 1, 2, 3, 4, 5),
+            datetime.datetime(1000, 12, 31, 23, 59, 59, 999999),
+            datetime.datetime(999, 6, 7, 8, 9, 10),
+            datetime.datetime(1, 1, 1),
+        ]
+        for format in ["%x - %X", "%Y-%m-%d %H:%M:%S.%f", "%I%% {%d}"]:
+            formatter = get_datetime_formatter(format)
+            for value in values:
+                self.assertEqual(formatter(value), value.strftime(format))
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            "text": "caf\u00e9 \u2028 \u2029 \U0001f600 \"\\",
+            "lazy": gettext_lazy("Project"),
+            "decimal": Decimal("1.10"),
+            "datetime": datetime.datetime(2025, 1, 2, 3, 4, 5, 6000),
+            "date": datetime.date(2025, 1, 2),
+            "nested": [{1: None, "float": 0.1, "big": 2 ** 60}],
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2")
+        )
+
+    def test_api_output_is_unchanged(self):
+        self.create_issues(2, comments_per_issue=1)
+        issue = Issue.objects.first()
+        url = reverse_lazy("project_issues-detail", kwargs={
+            "project_pk": self.project.pk, "pk": issue.pk
+        })
+        response = self.client.get(url)
+        self.assertEqual(
+            response.content, JSONRenderer().render(response.data)
+        )
+        self.assertEqual(
+            response.data["created_time"],
+            localtime(issue.created_time).strftime("%x - %X")
+        )
+
+    def test_parser_rejects_invalid_json(self):
+        parser = FastJSONParser()
+        self.assertEqual(
+            parser.parse(BytesIO('{"title": "\u00e9t\u00e9"}'.encode())),
+            {"title": "\u00e9t\u00e9"}
+        )
+        for body in [b'{"value": NaN}', b'{"value": Infinity}', b"{"]:
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(body))
+
+
+class TestValuesSerialization(ProjectsAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.create_issues(5, comments_per_issue=4)
+        Issue.objects.filter(pk=self.issues[0].pk).update(
+            assignee=self.author, description="Described"
+        )
+        Project.objects.create(
+            name="Other", type="IOS", author=self.author,
+            description="Not a contributor"
+        )
+
+    def get_pages(self, url):
+        contents = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            contents.append(response.content)
+            url = response.data["next"]
+        return contents
+
+    def test_same_output_as_serializers(self):
+        issue = self.issues[0]
+        urls = [
+            reverse_lazy("project-list"),
+            reverse_lazy("user-list"),
+            reverse_lazy(
+                "project_issues-list",
+                kwargs={"project_pk": self.project.pk}
+            ) + "?priority=LOW",
+            reverse_lazy("issue_comments-list", kwargs={
+                "project_pk": self.project.pk, "issue_pk": issue.pk
+            }),
+        ]
+        for url in urls:
+            url = f"{url}{'&' if '?' in url else '?'}page_size=3"
+            with self.settings(VALUES_SERIALIZATION_ENABLED=False):
+                expected = self.get_pages(url)
+            self.assertEqual(self.get_pages(url), expected)
+
+    def test_compiled_fields(self):
+        self.assertIsNone(get_values_serializer(ProjectDetailSerializer))
+        values_serializer = get_values_serializer(IssueListSerializer)
+        self.assertTrue(
+            values_serializer.accepts(Issue.objects.with_comments_count())
+        )
+        self.assertFalse(values_serializer.accepts(Issue.objects.all()))
+        self.assertEqual(
+            values_serializer.serialize(values_serializer.values(
+                Issue.objects.with_comments_count().order_by("id")
+            )),
+            IssueListSerializer(
+                Issue.objects.with_comments_count().order_by("id"),
+                many=True
+            ).data
+        )
+
+
+class TestCascadeDeletion(ProjectsAPITestCase):
+
+    def test_project_and_issue(self):
+        first, second = self.create_issues(2, comments_per_issue=3)
+        first.delete()
+        self.assertEqual(Comment.objects.count(), 3)
+        self.project.delete()
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Contributor.objects.exists())
+
+    def test_user(self):
+        other = User.objects.create_user(
+            username="other", password="testpass123", age=25
+        )
+        project = Project.objects.create(
+            name="Other", type="IOS", author=other
+        )
+        Contributor.objects.create(user=self.author, project=project)
+        issue = Issue.objects.create(
+            title="Kept", project=project, author=other,
+            assignee=self.author, priority="LOW", label="BUG"
+        )
+        Comment.objects.create(issue=issue, author=self.author, content="A")
+        Comment.objects.create(issue=issue, author=other, content="B")
+        self.create_issues(2, comments_per_issue=2)
+
+        response = self.client.delete(
+            reverse_lazy("user-detail", kwargs={"pk": self.author.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Project.objects.all()), [project])
+        self.assertEqual(list(Issue.objects.all()), [issue])
+        self.assertIsNone(Issue.objects.get().assignee)
+        self.assertEqual(
+            list(Comment.objects.values_list("content", flat=True)), ["B"]
+        )
+        self.assertEqual(Contributor.objects.count(), 0)
+
+
+class TestQueryBudgets(ProjectsAPITestCase):
+    """
+    Runs every action of the viewsets with 1, 10 and 1000 rows, and
+    fails when its number of queries grows with the number of rows
+    beyond the `query_growth` declared on the viewset (per 100 rows),
+    or exceeds the `query_budgets` declared on the viewset.
+
+    Each request is made with cold caches, so that the counts do
+    not depend on the requests made before.
+    """
+    sizes = (1, 10, 1000)
+
+    def setUp(self):
+        super().setUp()
+        self.names = iter(range(10 ** 9))
+
+    def create_users(self, count):
+        return User.objects.bulk_create([
+            User(username=f"budget-{next(self.names)}", age=30)
+            for _ in range(count)
+        ])
+
+    def create_project(self, issues=0, comments=0, contributors=0):
+        """
+        Returns a project of `self.author` with `contributors` more
+        contributors, `issues` issues and `comments` comments on its
+        first issue.
+        """
+        project = Project.objects.create(
+            name=f"Budget {next(self.names)}",
+            type="BACKEND",
+            author=self.author
+        )
+        Contributor.objects.bulk_create([
+            Contributor(user=user, project=project)
+            for user in [self.author, *self.create_users(contributors)]
+        ])
+        created = Issue.objects.bulk_create([
+            Issue(
+                title=f"Issue {i}", project=project, author=self.author,
+                priority="LOW", label="BUG"
+            )
+            for i in range(max(issues, 1))
+        ])
+        Comment.objects.bulk_create([
+            Comment(issue=created[0], author=self.author, content="Text")
+            for _ in range(comments)
+        ])
+        return project, created[0]
+
+    def count_queries(self, method, url, data=None):
+        cache.clear()
+        memberships_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 400, response.content)
+        # The transactions of the writes are savepoints of the test
+        # transaction: their BEGIN and COMMIT are not counted either.
+        return len([
+            query for query in context.captured_queries
+            if not query["sql"].startswith(("SAVEPOINT", "RELEASE"))
+        ])
+
+    def check(self, viewset, action, run):
+        """
+        `run(size)` makes the request of `action` on `size` rows and
+        returns its number of queries.
+        """
+        sizes = self.sizes
+        counts = {size: run(size) for size in sizes}
+        growth = getattr(viewset, "query_growth", {}).get(action, 0)
+        with self.subTest(viewset=viewset.__name__, action=action):
+            for size, count in counts.items():
+                self.assertTrue(
+                    0 <= count - counts[sizes[0]] <= growth * (size // 100),
+                    f"Queries grow with the number of rows: {counts}"
+                )
+            self.assertLessEqual(
+                counts[sizes[0]], viewset.query_budgets[action],
+                "Over the query budget"
+            )
+
+    def test_users(self):
+        def detail_url():
+            return reverse_lazy("user-detail", kwargs={"pk": self.author.pk})
+
+        def run_list(size):
+            self.create_users(size)
+            return self.count_queries("get", reverse_lazy("user-list"))
+
+        def run_create(size):
+            self.create_users(size)
+            return self.count_queries("post", reverse_lazy("user-list"), {
+                "username": f"new-{size}", "password": "testpass123",
+                "age": 30,
+            })
+
+        def run_destroy(size):
+            self.author = self.create_users(1)[0]
+            self.client.force_authenticate(self.author)
+            self.create_project(issues=size, comments=size)
+            return self.count_queries("delete", detail_url())
+
+        self.check(UserViewSet, "list", run_list)
+        self.check(UserViewSet, "retrieve", lambda size: (
+            self.create_users(size), self.count_queries("get", detail_url())
+        )[1])
+        self.check(UserViewSet, "create", run_create)
+        self.check(UserViewSet, "update", lambda size: (
+            self.create_users(size),
+            self.count_queries("patch", detail_url(), {"first_name": "A"})
+        )[1])
+        self.check(UserViewSet, "destroy", run_destroy)
+
+    def test_projects(self):
+        def detail_url(project):
+            return reverse_lazy("project-detail", kwargs={"pk": project.pk})
+
+        def run_list(size):
+            projects = Project.objects.bulk_create([
+                Project(
+                    name=f"Budget {next(self.names)}", type="IOS",
+                    author=self.author
+                )
+                for _ in range(size)
+            ])
+            Contributor.objects.bulk_create([
+                Contributor(user=self.author, project=project)
+                for project in projects
+            ])
+            return self.count_queries("get", reverse_lazy("project-list"))
+
+        self.check(ProjectViewSet, "list", run_list)
+        self.check(ProjectViewSet, "retrieve", lambda size: (
+            self.count_queries("get", detail_url(
+                self.create_project(issues=size, comments=size)[0]
+            ))
+        ))
+        self.check(ProjectViewSet, "create", lambda size: (
+            self.count_queries("post", reverse_lazy("project-list"), {
+                "name": f"New {size}", "type": "BACKEND",
+            })
+        ))
+        self.check(ProjectViewSet, "update", lambda size: (
+            self.count_queries("patch", detail_url(
+                self.create_project(issues=size, comments=size)[0]
+            ), {"description": "Updated"})
+        ))
+        self.check(ProjectViewSet, "destroy", lambda size: (
+            self.count_queries("delete", detail_url(
+                self.create_project(issues=size, comments=size)[0]
+            ))
+        ))
+
+    def test_contributors(self):
+        def urls(size):
+            project, _ = self.create_project(contributors=size)
+            link = project.contributor_links.exclude(
+                user=self.author
+            ).first()
+            return (
+                reverse_lazy("project_contributors-list", kwargs={
+                    "project_pk": project.pk
+                }),
+                reverse_lazy("project_contributors-detail", kwargs={
+                    "project_pk": project.pk, "pk": link.pk
+                }),
+            )
+
+        self.check(ContributorViewSet, "list", lambda size: (
+            self.count_queries("get", urls(size)[0])
+        ))
+        self.check(ContributorViewSet, "retrieve", lambda size: (
+            self.count_queries("get", urls(size)[1])
+        ))
+        self.check(ContributorViewSet, "create", lambda size: (
+            self.count_queries("post", urls(size)[0], {
+                "user": self.create_users(1)[0].pk
+            })
+        ))
+        self.check(ContributorViewSet, "update", lambda size: (
+            self.count_queries("patch", urls(size)[1], {
+                "user": self.create_users(1)[0].pk
+            })
+        ))
+        self.check(ContributorViewSet, "destroy", lambda size: (
+            self.count_queries("delete", urls(size)[1])
+        ))
+        self.check(ContributorViewSet, "bulk", lambda size: (
+            self.count_queries("post", reverse_lazy(
+                "project_contributors-bulk", kwargs={
+                    "project_pk": self.create_project(contributors=size)[0].pk
+                }
+            ), {
+                "add": [user.pk for user in self.create_users(10)],
+                "remove": [self.create_users(1)[0].username],
+            })
+        ))
+
+    def test_issues(self):
+        def urls(size):
+            project, issue = self.create_project(issues=size, comments=size)
+            return (
+                reverse_lazy("project_issues-list", kwargs={
+                    "project_pk": project.pk
+                }),
+                reverse_lazy("project_issues-detail", kwargs={
+                    "project_pk": project.pk, "pk": issue.pk
+                }),
+                reverse_lazy("project_issues-bulk", kwargs={
+                    "project_pk": project.pk
+                }),
+                issue,
+            )
+
+        self.check(IssueViewSet, "list", lambda size: (
+            self.count_queries("get", urls(size)[0])
+        ))
+        self.check(IssueViewSet, "retrieve", lambda size: (
+            self.count_queries("get", urls(size)[1])
+        ))
+        self.check(IssueViewSet, "create", lambda size: (
+            self.count_queries("post", urls(size)[0], {
+                "title": "New", "label": "BUG", "priority": "LOW",
+                "status": "TODO", "assignee": self.author.pk,
+            })
+        ))
+        self.check(IssueViewSet, "update", lambda size: (
+            self.count_queries("patch", urls(size)[1], {
+                "status": "FINISHED", "assignee": self.author.pk,
+            })
+        ))
+        self.check(IssueViewSet, "destroy", lambda size: (
+            self.count_queries("delete", urls(size)[1])
+        ))
+        self.check(IssueViewSet, "bulk", lambda size: (
+            self.count_queries("post", urls(size)[2], [{
+                "title": "New", "label": "BUG", "priority": "LOW",
+                "assignee": self.author.pk,
+            }] * 10)
+        ))
+
+        def run_bulk_update(size):
+            _, _, url, issue = urls(size)
+            return self.count_queries("patch", url, {
+                "ids": [issue.pk], "status": "FINISHED",
+                "assignee": self.author.pk,
+            })
+
+        self.check(IssueViewSet, "bulk_update", run_bulk_update)
+
+    def test_comments(self):
+        def urls(size):
+            project, issue = self.create_project(comments=size)
+            kwargs = {"project_pk": project.pk, "issue_pk": issue.pk}
+            return (
+                reverse_lazy("issue_comments-list", kwargs=kwargs),
+                reverse_lazy("issue_comments-detail", kwargs={
+                    **kwargs, "pk": issue.comments.first().pk
+                }),
+            )
+
+        self.check(CommentViewSet, "list", lambda size: (
+            self.count_queries("get", urls(size)[0])
+        ))
+        self.check(CommentViewSet, "retrieve", lambda size: (
+            self.count_queries("get", urls(size)[1])
+        ))
+        self.check(CommentViewSet, "create", lambda size: (
+            self.count_queries("post", urls(size)[0], {"content": "New"})
+        ))
+        self.check(CommentViewSet, "update", lambda size: (
+            self.count_queries("patch", urls(size)[1], {"content": "Edit"})
+        ))
+        # Comments are deleted by their authors if staff members.
+        self.author.is_staff = True
+        self.check(CommentViewSet, "destroy", lambda size: (
+            self.count_queries("delete", urls(size)[1])
+        ))
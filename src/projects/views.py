@@ -1,37 +1,58 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Prefetch, Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
-from rest_framework.validators import UniqueTogetherValidator       
+from rest_framework.exceptions import (
+    NotFound, PermissionDenied, ValidationError
+)
+from monitoring.timing import phase
+from soft_desk_support.mixins import (
+    AtomicWriteMixin, ServerTimingMixin, ValuesListMixin
+)
+from soft_desk_support.pagination import KeysetPagination, RankedPagination
+from soft_desk_support.routers import reads_from_replica
 from .models import Project, Contributor, Issue, Comment
 from .serializers import (
     ProjectDetailSerializer,
     ProjectListSerializer,
     ProjectMinimalSerializer,
     ContributorSerializer,
+    ContributorBulkSerializer,
     IssueDetailSerializer,
     IssueListSerializer,
+    IssueBulkCreateSerializer,
+    IssueBulkUpdateSerializer,
     CommentSerializer,
 )
 from .permissions import (  
     IsAuthorOrIsAdmin, 
     IsContributor, 
-    IsAssignee, 
     IsContributorOrIsAdmin,
     IsProjectAuthor
 )
+from . import membership
+from .membership import get_memberships
+from .response_cache import response_cache
+from .scope import get_scope
+from .signals import bump_project, projects_bumped
+from .search import FullTextSearchFilter, search
+from .export import FORMATS as EXPORT_FORMATS, export_rows
 from .const import (
     PROJECT_ERROR_MESSAGE,
     ISSUE_ERROR_MESSAGE,
     COMMENT_ERROR_MESSAGE,
     CONTRIBUTOR_ERROR_MESSAGE,
-    IS_AUTHOR_TRUE_MESSAGE,
-    IS_AUTHOR_FALSE_MESSAGE,
-    CONTRIBUTOR_UNAUTHORIZED_MESSAGE,
-    CONTRIBUTOR_ALREADY_EXISTS_MESSAGE
 )
 
 User = get_user_model()
@@ -115,7 +136,220 @@ class ErrorResponseMixin(ModelViewSet):
         )
 
 
+class ProjectAccessMixin:
+    """
+    Mixin telling, from the in-memory memberships, whether the user
+    may read a project's objects without loading them.
+    """
+
+    def has_project_access(self, project_id):
+        return get_memberships(self.request).is_contributor(
+            project_id
+        ) or self.request.user.is_staff
+
+
+class ProjectScopeMixin:
+    """
+    Mixin for the nested viewsets, resolving the project (and
+    issue) of the URL once per request (see `projects.scope`), once
+    the permission classes passed and before anything else: `404 Not
+    Found` if they do not exist or do not match.
+
+    The views then read them from `scope`, the objects of their
+    querysets belonging to them.
+    """
+
+    @property
+    def scope(self):
+        return get_scope(self.request, self.kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        with phase("queryset"):
+            scope = self.scope
+        if scope is None:
+            raise NotFound()
+
+
+class ConditionalGetMixin(ProjectAccessMixin):
+    """
+    Mixin answering conditional `list` and `retrieve` requests
+    (`If-None-Match`, `If-Modified-Since`) with a
+    `304 Not Modified`, before any object is loaded or serialized.
+
+    The validators are derived from the state returned by
+    `get_conditional_state()`, typically the `version` and
+    `modified_time` of the project, which `projects.signals` bump
+    on every write under the project. An unchanged poll then costs
+    the lookup of that state, the membership check being done in
+    memory. The `ETag` and `Last-Modified` headers are also sent
+    on full responses.
+    """
+    conditional_actions = ("list", "retrieve")
+
+    def get_conditional_state(self):
+        """
+        Returns `(project_id, key, modified_time)`, `key` being a
+        tuple identifying the state of the response, or None if
+        the request cannot be validated (e.g. unknown project).
+        """
+        raise NotImplementedError
+
+    def get_validators(self):
+        state = self.get_conditional_state()
+        if state is None:
+            return None
+        project_id, key, modified_time = state
+        if project_id is not None and not self.has_project_access(
+            project_id
+        ):
+            return None
+        key = (*key, self.request.accepted_renderer.format)
+        etag = '"{}"'.format(hashlib.md5(
+            repr(key).encode(), usedforsecurity=False
+        ).hexdigest())
+        last_modified = (
+            int(modified_time.timestamp()) if modified_time else None
+        )
+        return etag, last_modified
+
+    def get_not_modified_response(self, request):
+        self.validators = None
+        if self.action not in self.conditional_actions:
+            return None
+        try:
+            with phase("queryset"):
+                self.validators = self.get_validators()
+        except (TypeError, ValueError):
+            # Malformed ids in the URL: let the regular lookup 404.
+            return None
+        if self.validators is None:
+            return None
+        etag, last_modified = self.validators
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.get_not_modified_response(request) or super().list(
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_not_modified_response(
+            request
+        ) or super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        validators = getattr(self, "validators", None)
+        if validators and response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            etag, last_modified = validators
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(
+                    last_modified
+                )
+        return response
+
+
+class ResponseCacheMixin(ProjectAccessMixin):
+    """
+    Mixin serving `list` and `retrieve` responses from the
+    project-scoped response cache (see `projects.response_cache`)
+    when `RESPONSE_CACHE_ENABLED` is set.
+
+    - A hit is only served once `has_project_access()` passed, so
+    that it is never returned to a user who could not get it
+    otherwise; the other users simply bypass the cache.
+    - Browsable API pages embed the user and are never cached,
+    neither are the responses read from a replica, which may
+    predate the last invalidation.
+    - Responses carry an `X-Cache: HIT` or `X-Cache: MISS` header.
+    """
+    cached_actions = ("list", "retrieve")
+
+    def get_cache_project_id(self):
+        return int(self.kwargs["project_pk"])
+
+    def can_cache_response(self):
+        """
+        Hook to refuse storing the current response.
+        """
+        return True
+
+    def get_cached_response(self, request):
+        self.cache_key = None
+        if (
+            not response_cache.enabled
+            or self.action not in self.cached_actions
+            or request.accepted_renderer.format == "api"
+        ):
+            return None
+        try:
+            project_id = self.get_cache_project_id()
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not self.has_project_access(project_id):
+            return None
+
+        endpoint = (self.basename, self.action, sorted(self.kwargs.items()))
+        key = response_cache.make_key(
+            project_id,
+            endpoint,
+            request.query_params,
+            request.accepted_renderer.format
+        )
+        with phase("cache"):
+            entry = response_cache.get(key)
+        if entry is None:
+            self.cache_key = key
+            return None
+        content, content_type = entry
+        response = HttpResponse(content, content_type=content_type)
+        response["X-Cache"] = "HIT"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request) or super().list(
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request) or super().retrieve(
+            request, *args, **kwargs
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(self, "cache_key", None)
+        if (
+            key is not None
+            and isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+            and not reads_from_replica()
+            and self.can_cache_response()
+        ):
+            response.add_post_render_callback(
+                lambda rendered: response_cache.set(
+                    key, rendered.content, rendered["Content-Type"]
+                )
+            )
+            response["X-Cache"] = "MISS"
+        return response
+
+
 class ProjectViewSet(
+    ServerTimingMixin,
+    AtomicWriteMixin,
+    ConditionalGetMixin,
+    ValuesListMixin,
     DetailListMixin,
     ErrorResponseMixin,
     ModelViewSet
@@ -129,21 +363,69 @@ class ProjectViewSet(
     author when a project is created.
     - Applies filtering on name, author username, type,
     created_time and id.
+    - Answers unchanged polls with `304 Not Modified`.
+    - Serializes lists from `.values()` rows.
+    - Streams every issue of a project, optionally with their
+    comments, as NDJSON or CSV (`export` action).
     """
     queryset = Project.objects.all()
     serializer_class = ProjectListSerializer
     detail_serializer_class = ProjectDetailSerializer
     minimal_serializer = ProjectMinimalSerializer
     error_message = PROJECT_ERROR_MESSAGE
+    pagination_class = KeysetPagination
+    cursor_ordering = ("id",)
     filterset_fields = [
         "name", "author__username", "type", "id",
         "created_time", "author__id"
     ]
+    # Maximum number of SQL queries of each action, whatever the
+    # number of rows, not counting the BEGIN and COMMIT of the
+    # writes (checked by `TestQueryBudgets`).
+    query_budgets = {
+        "list": 3, "retrieve": 4, "create": 2,
+        "update": 4, "destroy": 8,
+    }
+    # Extra queries per 100 rows: the issues and comments cascaded by
+    # a destroy are deleted by Django 100 at a time, after their
+    # delete signals.
+    query_growth = {"destroy": 2}
+
+    def get_conditional_state(self):
+        user_id = self.request.user.id
+        if self.action == "list":
+            # Every write to a project bumps its modified_time, and
+            # joining or leaving a project changes the count.
+            state = Project.objects.filter(
+                contributor_links__user_id=user_id
+            ).aggregate(
+                count=Count("id"),
+                modified_time=Max("modified_time")
+            )
+            return (
+                None,
+                ("projects", user_id, state["count"],
+                 state["modified_time"]),
+                state["modified_time"]
+            )
+        state = Project.objects.filter(
+            pk=self.kwargs["pk"]
+        ).values_list("id", "version", "modified_time").first()
+        if state is None:
+            return None
+        project_id, version, modified_time = state
+        return project_id, ("project", project_id, version), modified_time
+
+    def has_project_access(self, project_id):
+        # Like `get_queryset`: staff members only see the projects
+        # they contribute to (their access to issues and comments is
+        # unchanged, see `ProjectAccessMixin`).
+        return get_memberships(self.request).is_contributor(project_id)
 
     def get_permissions(self):
         if self.action == "create":
             return [IsAuthenticated()]
-        elif self.action in ["list", "retrieve"]:
+        elif self.action in ["list", "retrieve", "export"]:
             return [IsContributorOrIsAdmin()]
         else:
             return [IsAuthorOrIsAdmin()]
@@ -153,28 +435,73 @@ class ProjectViewSet(
     # is also, everytime : the Project's Author.
     def perform_create(self, serializer):
         project = serializer.save(author=self.request.user)
-        Contributor.objects.create(
-            user=self.request.user,
-            project_id=project.id
+        # Inserted without signals: the memberships of the author
+        # are already invalidated by the creation of the project,
+        # whose version needs no bump.
+        Contributor.objects.bulk_create([
+            Contributor(user_id=self.request.user.id, project_id=project.id)
+        ])
+        # Known counts of a new project, for the response.
+        project.contributors_count = 1
+        project._prefetched_objects_cache = {"issues": Issue.objects.none()}
+
+    @action(detail=True, methods=["get"])
+    def export(self, request, pk=None):
+        """
+        Streams the issues of the project.
+
+        - `?output=ndjson` (default) or `?output=csv`.
+        - `?comments=true` adds the comments of each issue right
+        after it.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({
+                "output": f"Must be one of {', '.join(EXPORT_FORMATS)}."
+            })
+        with_comments = request.query_params.get(
+            "comments", ""
+        ).lower() in ("1", "true", "yes")
+        project = self.get_object()
+
+        encode, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            encode(export_rows(project.id, with_comments)),
+            content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="project-{project.id}.{output}"'
         )
+        return response
 
     def get_queryset(self):
         user = self.request.user
         queryset = self.queryset.filter(
             contributor_links__user=user
         )
-        if self.action == 'retrieve':
+        if self.action in [
+            "retrieve", "update", "partial_update"
+        ]:
+            # The detail serializer only needs the author, the
+            # contributors count and the issues with their
+            # comments count: all of them are loaded here, in
+            # a constant number of queries.
             queryset = queryset.select_related(
                 'author'
-            ).prefetch_related(
-                'contributor_links__user', 
-                'issues__author', 
-                'issues__assignee'
+            ).with_contributors_count().prefetch_related(
+                Prefetch(
+                    'issues',
+                    queryset=Issue.objects.with_comments_count()
+                )
             )
         return queryset
 
 
 class ContributorViewSet(
+    ServerTimingMixin,
+    AtomicWriteMixin,
+    ProjectScopeMixin,
+    ResponseCacheMixin,
     ErrorResponseMixin,
     ModelViewSet
     ):
@@ -184,6 +511,10 @@ class ContributorViewSet(
     - Filters contributors by project_id, user id and username.
     - Assigns project and user explicitly during creation
     based on URL kwargs.
+    - Serves list and retrieve responses from the response cache
+    when enabled.
+    - Adds and removes up to `BULK_MAX_SIZE` contributors at once
+    on `bulk/`.
     """
     permission_classes = [IsAuthenticated, IsContributor, IsAdminUser]
     serializer_class = ContributorSerializer
@@ -193,12 +524,22 @@ class ContributorViewSet(
     filterset_fields = [
         "project_id", "user_id", "id", "user__username"
     ]
+    query_budgets = {
+        "list": 4, "retrieve": 3, "create": 4,
+        "update": 6, "destroy": 5, "bulk": 6,
+    }
 
     def get_permissions(self):
         if self.action in ["list",]:
             return [IsContributor()]
         else:
             return [IsProjectAuthor()]
+
+    def has_project_access(self, project_id):
+        memberships = get_memberships(self.request)
+        if self.action == "retrieve":
+            return memberships.is_author(project_id)
+        return memberships.is_contributor(project_id)
         
     def get_queryset(self):
         project_pk = self.kwargs.get("project_pk")
@@ -206,45 +547,132 @@ class ContributorViewSet(
             project_id=project_pk
         )
 
-        queryset = queryset.select_related(
-            'user', 'project__author'
-        )
+        # The project is the one of the scope.
+        queryset = queryset.select_related('user')
 
         is_author_param = self.request.query_params.get("is_author")
         if is_author_param is not None:
-            try:
-                # We already have project__author prefetched 
-                # if queryset is not empty,
-                # but to be safe and handle empty queryset, 
-                # we fetch the project directly.
-                project = Project.objects.select_related(
-                    'author'
-                ).get(pk=project_pk)
-                queryset = queryset.filter(
-                    user=project.author
-                )
-            except Project.DoesNotExist:
-                return queryset.none()
+            queryset = queryset.filter(
+                user_id=self.scope.project.author_id
+            )
         return queryset
 
     def perform_create(self, serializer):
-        project_pk = self.kwargs["project_pk"]
-        user_id = serializer.validated_data["user"].id
-        if not Contributor.objects.filter(
-            project_id=project_pk,
-            user_id=user_id
-        ).exists():
-            serializer.save(
-                project_id=project_pk,
-                user_id=user_id
-            )
-        else:
-            raise ValidationError(
-                CONTRIBUTOR_ALREADY_EXISTS_MESSAGE
-            )
+        # Duplicates are reported by the serializer from the unique
+        # constraint.
+        serializer.save(project_id=self.scope.project.id)
+
+    @staticmethod
+    def resolve_users(references):
+        """
+        Returns the ids of the users given by id or username, keyed
+        by reference, in a single query.
+        """
+        ids = [ref for ref in references if isinstance(ref, int)]
+        names = [ref for ref in references if isinstance(ref, str)]
+        users = {}
+        for user_id, username in User.objects.filter(
+            Q(pk__in=ids) | Q(username__in=names)
+        ).values_list("id", "username"):
+            users[user_id] = users[username] = user_id
+        return users
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, project_pk=None):
+        """
+        Adds the users of `add` to the project and removes those of
+        `remove`, given by id or username, in a single transaction.
+        Only the author of the project may do so.
+
+        Returns the result of each user: `added` or
+        `already_contributor`, `removed` or `not_contributor`
+        (`is_author` for the author, who cannot be removed), and
+        `not_found` for unknown users.
+        """
+        project = self.scope.project
+        project_id = project.id
+        if not get_memberships(request).is_author(project_id):
+            raise PermissionDenied()
+        serializer = ContributorBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = serializer.validated_data["add"]
+        remove = serializer.validated_data["remove"]
+
+        with phase("queryset"):
+            users = self.resolve_users([*add, *remove])
+            both = (
+                {users.get(ref) for ref in add}
+                & {users.get(ref) for ref in remove}
+            ) - {None}
+            if both:
+                raise ValidationError(
+                    f"Users {sorted(both)} are both added and removed."
+                )
+            contributors = set(Contributor.objects.filter(
+                project_id=project_id, user_id__in=set(users.values())
+            ).values_list("user_id", flat=True))
+
+            added, removed, results = {}, {}, []
+            for operation, references in (("add", add), ("remove", remove)):
+                for ref in references:
+                    user_id = users.get(ref)
+                    if user_id is None:
+                        result = "not_found"
+                    elif operation == "add":
+                        result = (
+                            "already_contributor"
+                            if user_id in contributors or user_id in added
+                            else "added"
+                        )
+                        added[user_id] = None
+                    elif user_id == project.author_id:
+                        result = "is_author"
+                    else:
+                        result = (
+                            "removed"
+                            if user_id in contributors
+                            and user_id not in removed
+                            else "not_contributor"
+                        )
+                        removed[user_id] = None
+                    results.append({
+                        "user": ref,
+                        "user_id": user_id,
+                        "operation": operation,
+                        "result": result,
+                    })
+
+            added = [
+                user_id for user_id in added if user_id not in contributors
+            ]
+            removed = [
+                user_id for user_id in removed if user_id in contributors
+            ]
+            # Concurrent additions are ignored by the unique constraint.
+            Contributor.objects.bulk_create([
+                Contributor(project_id=project_id, user_id=user_id)
+                for user_id in added
+            ], ignore_conflicts=True)
+            # Bulk writes bump the project once themselves (see
+            # `projects.signals.projects_bumped`).
+            if removed:
+                with projects_bumped():
+                    Contributor.objects.filter(
+                        project_id=project_id, user_id__in=removed
+                    ).delete()
+            if added or removed:
+                membership.invalidate_users([*added, *removed])
+                bump_project(project_id)
+        return Response({"results": results})
 
 
 class IssueViewSet(
+    ServerTimingMixin,
+    AtomicWriteMixin,
+    ProjectScopeMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    ValuesListMixin,
     AuthorModelMixin,
     DetailListMixin,
     ErrorResponseMixin,
@@ -256,17 +684,36 @@ class IssueViewSet(
     - Uses context-aware serializers.
     - Filters issues by priority, label, status, assignee_id,
     author_id, created_time and project_id.
+    - Searches titles and descriptions with `?q=`.
+    - Answers unchanged polls with `304 Not Modified`, and serves
+    the other list and retrieve responses from the response cache
+    when enabled.
+    - Serializes lists from `.values()` rows.
     - Automatically assigns author and project
     during creation.
+    - Creates (`POST`) or updates (`PATCH`) up to `BULK_MAX_SIZE`
+    issues at once on `bulk/`, checking the permissions once for
+    the whole batch.
     """
     serializer_class = IssueListSerializer
     detail_serializer_class = IssueDetailSerializer
     minimal_serializer = IssueListSerializer
     error_message = ISSUE_ERROR_MESSAGE
+    pagination_class = KeysetPagination
+    cursor_ordering = ("id",)
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = [
         "priority", "label", "status", "assignee_id",
         "author_id", "id", "created_time", "project__id"
     ]
+    query_budgets = {
+        "list": 3, "retrieve": 3, "create": 5,
+        "update": 6, "destroy": 7,
+        "bulk": 5, "bulk_update": 6,
+    }
+    # Extra queries per 100 rows: the comments cascaded by a destroy
+    # are deleted by Django 100 at a time, after their delete signals.
+    query_growth = {"destroy": 1}
 
     def get_serializer_class(self):
         if self.action in [
@@ -276,31 +723,104 @@ class IssueViewSet(
         else:
             return self.serializer_class
 
+    def get_conditional_state(self):
+        project = self.scope.project
+        return (
+            project.id,
+            ("issues", project.id, project.version),
+            project.modified_time
+        )
+
     def get_queryset(self):
         queryset = Issue.objects.filter(
             project_id=self.kwargs["project_pk"]
-        )
+        ).with_comments_count()
         if self.action in ['list', 'retrieve']:
-            queryset = queryset.select_related(
-                'author', 'assignee', 'project'
-            )
+            queryset = queryset.select_related('author', 'assignee')
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            project=Project.objects.get(
-                id=self.kwargs["project_pk"]
-            )
+        issue = serializer.save(
+            author_id=self.request.user.id,
+            project_id=self.scope.project.id
         )
+        issue.comments_count = 0
 
-    def perform_update(self, serializer):
-        super().perform_update(serializer)
-        assignee = serializer.validated_data.get("assignee")
-        serializer.save()
+    def get_bulk_project_id(self):
+        """
+        Returns the id of the project of the URL, once checked that
+        the user may write its issues in bulk: its contributors and
+        the staff members only.
+        """
+        project_id = self.scope.project.id
+        if not self.has_project_access(project_id):
+            raise PermissionDenied()
+        return project_id
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, project_pk=None):
+        """
+        Creates a list of issues, validated together then inserted
+        with `bulk_create`: all of them or none.
+        """
+        project_id = self.get_bulk_project_id()
+        serializer = IssueBulkCreateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with phase("queryset"):
+            issues = Issue.objects.bulk_create([
+                Issue(
+                    **attrs,
+                    author_id=request.user.id,
+                    project_id=project_id
+                )
+                for attrs in serializer.validated_data
+            ])
+            # Bulk writes send no signal.
+            bump_project(project_id)
+        for issue in issues:
+            issue.comments_count = 0
+        return Response(
+            IssueDetailSerializer(issues, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @bulk.mapping.patch
+    def bulk_update(self, request, project_pk=None):
+        """
+        Sets the status, priority and/or assignee of a list of issues
+        (`ids`) with a single UPDATE. The user must be the author of
+        every one of them, or a staff member.
+        """
+        project_id = self.get_bulk_project_id()
+        serializer = IssueBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        ids = changes.pop("ids")
+        with phase("queryset"):
+            issues = Issue.objects.filter(project_id=project_id, pk__in=ids)
+            authors = dict(issues.values_list("id", "author_id"))
+            missing = [pk for pk in ids if pk not in authors]
+            if missing:
+                raise NotFound(
+                    f"No issues {missing} in this project."
+                )
+            if not request.user.is_staff and any(
+                author_id != request.user.id
+                for author_id in authors.values()
+            ):
+                raise PermissionDenied()
+            issues.update(**changes)
+            bump_project(project_id)
+        return Response({"updated": len(ids)})
 
 
 class CommentViewSet(
+    ServerTimingMixin,
+    AtomicWriteMixin,
+    ProjectScopeMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    ValuesListMixin,
     AuthorModelMixin,
     ErrorResponseMixin,
     ModelViewSet
@@ -311,31 +831,49 @@ class CommentViewSet(
     - Uses context-aware serializers.
     - Filters comments by issue_pk, author_id, id 
     and created_time.
+    - Searches comments content with `?q=`.
+    - Answers unchanged polls with `304 Not Modified`, and serves
+    the other list and retrieve responses from the response cache
+    when enabled.
+    - Serializes lists from `.values()` rows.
     - Automatically assigns author and issue
     during creation.
     """
     serializer_class = CommentSerializer
 
     error_message = COMMENT_ERROR_MESSAGE
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-created_time", "-id")
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
 
     filterset_fields = [
         "issue_id", "author_id", "id", "created_time"
     ]
+    query_budgets = {
+        "list": 3, "retrieve": 3, "create": 4,
+        "update": 5, "destroy": 5,
+    }
+
+    def get_conditional_state(self):
+        project = self.scope.project
+        return (
+            project.id,
+            ("comments", self.scope.issue.id, project.version),
+            project.modified_time
+        )
 
     def get_queryset(self):
         queryset = Comment.objects.filter(
             issue_id=self.kwargs["issue_pk"],
         )
         if self.action in ['list', 'retrieve']:
-            queryset = queryset.select_related(
-                'author', 'issue__project', 'issue__author'
-            )
+            queryset = queryset.select_related('author')
         return queryset
 
     def perform_create(self, serializer):
-        comment = serializer.save(  
-            author=self.request.user,
-            issue_id=self.kwargs["issue_pk"]
+        serializer.save(
+            author_id=self.request.user.id,
+            issue=self.scope.issue
         )
 
     def destroy(self, request, *args, **kwargs):
@@ -346,7 +884,7 @@ class CommentViewSet(
         """
         instance = self.get_object()
         
-        if instance.author != request.user or not request.user.is_staff:
+        if instance.author_id != request.user.id or not request.user.is_staff:
             return Response(
                 {"detail": "You are not authorized to delete this comment."},
                 status=status.HTTP_403_FORBIDDEN
@@ -356,4 +894,31 @@ class CommentViewSet(
         return Response(
             {"detail": "Comment deleted successfully."},
             status=status.HTTP_204_NO_CONTENT
-        )
\ No newline at end of file
+        )
+
+
+class SearchView(APIView):
+    """
+    Full-text search across the issues and comments of every
+    project the user contributes to.
+
+    - `?q=` holds the searched terms, all of which must match.
+    - Results are ranked by relevance (bm25), best first, and
+    paginated with `?page_size=` and `?offset=`.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = RankedPagination
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "This parameter is required."})
+        project_ids = get_memberships(request).project_ids()
+        paginator = self.pagination_class()
+        results = paginator.paginate(
+            request,
+            lambda limit, offset: search(
+                query, project_ids, limit, offset
+            )
+        )
+        return paginator.get_paginated_response(results)
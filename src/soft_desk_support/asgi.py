@@ -17,3 +17,8 @@ os.environ.setdefault(
 )
 
 application = get_asgi_application()
+
+# Only the server process compacts the tokens periodically.
+from authentication.compaction import start_scheduler  # noqa: E402
+
+start_scheduler()
@@ -0,0 +1,93 @@
+"""
+SQLite database profiles, selected by `DATABASE_PROFILE`.
+
+- `default` is Django's plain configuration: rollback journal, full
+fsync on every commit, a new connection for every request.
+- `production` tunes SQLite for concurrent readers and writers:
+    - every connection runs the `PRODUCTION_PRAGMAS`: WAL journaling
+    (readers no longer block the writer nor the other way round),
+    `synchronous=NORMAL` (no fsync on commit in WAL mode, only on
+    checkpoints; durable across application crashes, not power
+    losses), a `busy_timeout` to wait for the write lock instead of
+    failing with "database is locked", a larger page cache, memory
+    mapped reads and in-memory temporary tables;
+    - transactions are started with `BEGIN IMMEDIATE`, so that a
+    transaction reading before writing takes the write lock first
+    and waits for it, instead of failing when it is held;
+    - connections are kept `CONN_MAX_AGE` seconds, and checked
+    before being reused (`CONN_HEALTH_CHECKS`).
+
+`python -m benchmarks.database` compares both profiles.
+
+`sqlite_replica()` declares a local copy of the primary, used as a
+read replica (see `soft_desk_support.routers`), and
+`copy_database()` refreshes it.
+"""
+import sqlite3
+from contextlib import closing
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+PROFILES = ("default", "production")
+
+PRODUCTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -64_000,
+    "mmap_size": 256 * 2 ** 20,
+    "temp_store": "MEMORY",
+}
+
+PRODUCTION_CONN_MAX_AGE = 600
+
+
+def sqlite_database(name, profile="default"):
+    """
+    Returns the `DATABASES` entry of a SQLite database with the
+    given profile.
+    """
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(
+            f"Unknown database profile {profile!r}: use one of "
+            f"{', '.join(PROFILES)}."
+        )
+    database = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+    }
+    if profile == "production":
+        database.update({
+            "CONN_MAX_AGE": PRODUCTION_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "init_command": ";".join(
+                    f"PRAGMA {pragma}={value}"
+                    for pragma, value in PRODUCTION_PRAGMAS.items()
+                ),
+                "transaction_mode": "IMMEDIATE",
+            },
+        })
+    return database
+
+
+def sqlite_replica(name, profile="default"):
+    """
+    Returns the `DATABASES` entry of a local SQLite replica; the
+    tests use the primary instead.
+    """
+    return {
+        **sqlite_database(name, profile),
+        "TEST": {"MIRROR": "default"},
+    }
+
+
+def copy_database(source, target):
+    """
+    Copies a SQLite database into another one with the online backup
+    API: the copy is consistent even while the source is written.
+    """
+    with closing(sqlite3.connect(source)) as source_connection:
+        with closing(sqlite3.connect(target)) as target_connection:
+            source_connection.backup(target_connection)
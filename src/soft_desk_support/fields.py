@@ -0,0 +1,175 @@
+"""
+Serializer fields shared by the apps.
+
+`FastDateTimeField` renders datetimes with the `DATETIME_FORMAT`
+setting ("%x - %X") like DRF's `DateTimeField`, but without calling
+`strftime` for every value: the format is compiled once into a
+function building the string from the datetime attributes.
+
+Locale-dependent directives (`%x`, `%X`) are expanded by probing
+`strftime` itself, and every compiled format is checked against
+`strftime` on sample datetimes before being used; formats that
+cannot be compiled, or give a different result, keep using
+`strftime`.
+"""
+import datetime
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework.fields import DateTimeField
+from rest_framework.settings import api_settings
+
+
+PROBE = datetime.datetime(2001, 2, 3, 4, 5, 6, 7008)
+
+# Expansions of the locale-dependent directives, tried in turn.
+LOCALE_DIRECTIVES = {
+    "x": ["%m/%d/%y", "%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d", "%d.%m.%Y"],
+    "X": ["%H:%M:%S"],
+}
+
+# Zero-padded numbers, looked up instead of formatted.
+PADDED = tuple(f"{i:02d}" for i in range(100))
+
+DIRECTIVES = {
+    "Y": "{d.year}",
+    "y": "{P[d.year % 100]}",
+    "m": "{P[d.month]}",
+    "d": "{P[d.day]}",
+    "H": "{P[d.hour]}",
+    "I": "{P[(d.hour - 1) % 12 + 1]}",
+    "M": "{P[d.minute]}",
+    "S": "{P[d.second]}",
+    "f": "{d.microsecond:06d}",
+    "%": "%",
+}
+
+SAMPLES = [
+    PROBE,
+    datetime.datetime(1999, 12, 31, 23, 59, 59),
+    datetime.datetime(2024, 2, 29, 0, 0, 0, 999999),
+    datetime.datetime(2030, 7, 14, 12, 30, 1),
+    datetime.datetime(2026, 10, 9, 13, 7, 45, 120),
+]
+
+
+def expand_locale_directives(format):
+    """
+    Replaces `%x` and `%X` by the explicit directives giving the
+    same result in the current locale, or returns None.
+    """
+    for directive, candidates in LOCALE_DIRECTIVES.items():
+        token = "%" + directive
+        if token not in format:
+            continue
+        expected = PROBE.strftime(token)
+        for candidate in candidates:
+            if PROBE.strftime(candidate) == expected:
+                format = format.replace(token, candidate)
+                break
+        else:
+            return None
+    return format
+
+
+def compile_format(format):
+    """
+    Returns the source of an f-string equivalent to `strftime`
+    with the given format, or None if it uses an unsupported
+    directive.
+    """
+    parts = []
+    chars = iter(format)
+    for char in chars:
+        if char != "%":
+            parts.append(char.replace("{", "{{").replace("}", "}}"))
+            continue
+        directive = next(chars, None)
+        if directive not in DIRECTIVES:
+            return None
+        parts.append(DIRECTIVES[directive])
+    return "f" + repr("".join(parts))
+
+
+@lru_cache(maxsize=32)
+def get_datetime_formatter(format):
+    """
+    Returns a function formatting a datetime like
+    `value.strftime(format)`.
+    """
+    def strftime(value):
+        return value.strftime(format)
+
+    expanded = expand_locale_directives(format)
+    source = compile_format(expanded) if expanded is not None else None
+    if source is None:
+        return strftime
+
+    # strftime's rendering of years before 1000 is platform dependent,
+    # so it is kept for them.
+    formatter = eval(
+        f"lambda d, P=P, format=format: {source} "
+        f"if d.year >= 1000 else d.strftime(format)",
+        {"P": PADDED, "format": format}
+    )
+    if any(formatter(sample) != sample.strftime(format)
+           for sample in SAMPLES):
+        return strftime
+    return formatter
+
+
+class FastDateTimeField(DateTimeField):
+    """
+    `DateTimeField` rendering its values with a compiled formatter
+    (see the module docstring); the output is the same.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        output_format = getattr(self, "format", api_settings.DATETIME_FORMAT)
+        if (
+            output_format is None
+            or isinstance(value, str)
+            or output_format.lower() == ISO_8601
+        ):
+            return super().to_representation(value)
+
+        value = self.enforce_timezone(value)
+        return get_datetime_formatter(output_format)(value)
+
+    def get_representer(self):
+        """
+        Returns a function equivalent to `to_representation`, with
+        the output format and the timezone resolved once: used to
+        render many values at once.
+        """
+        output_format = getattr(self, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = (
+            self.timezone if hasattr(self, "timezone")
+            else self.default_timezone()
+        )
+        if (
+            output_format is None
+            or output_format.lower() == ISO_8601
+            or field_timezone is None
+        ):
+            return self.to_representation
+
+        formatter = get_datetime_formatter(output_format)
+        to_representation = self.to_representation
+
+        def represent(value):
+            if (
+                isinstance(value, datetime.datetime)
+                and timezone.is_aware(value)
+            ):
+                try:
+                    return formatter(value.astimezone(field_timezone))
+                except OverflowError:
+                    pass
+            return to_representation(value)
+
+        return represent
@@ -0,0 +1,148 @@
+"""
+Mixins shared by the viewsets of the apps.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from monitoring.timing import phase
+
+from .serializers import get_values_serializer
+
+
+class ServerTimingMixin:
+    """
+    Mixin splitting the requests timed by
+    `monitoring.timing.ServerTimingMiddleware` into the `auth`,
+    `permission`, `queryset` and `serialization` phases.
+
+    The actions are counted as serialization (validation included),
+    except for their lookups, pagination and deletions, counted as
+    queryset, like the saves of the serializers
+    (`soft_desk_support.serializers.ModelSerializer.save`). Outside
+    of the timed requests, each hook costs a context variable
+    lookup.
+    """
+
+    def perform_authentication(self, request):
+        with phase("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase("permission"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase("permission"):
+            super().check_object_permissions(request, obj)
+
+    def get_object(self):
+        with phase("queryset"):
+            return super().get_object()
+
+    def paginate_queryset(self, queryset):
+        with phase("queryset"):
+            return super().paginate_queryset(queryset)
+
+    def perform_destroy(self, instance):
+        with phase("queryset"):
+            super().perform_destroy(instance)
+
+    def list(self, request, *args, **kwargs):
+        with phase("serialization"):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with phase("serialization"):
+            return super().retrieve(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        with phase("serialization"):
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with phase("serialization"):
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with phase("serialization"):
+            return super().destroy(request, *args, **kwargs)
+
+
+class AtomicWriteMixin:
+    """
+    Mixin running each write request (any method but `GET`, `HEAD`
+    and `OPTIONS`) in a single transaction, rolled back when the
+    response is an error: its statements are committed together,
+    or not at all. Reads stay in autocommit mode.
+
+    The saves can therefore rely on the database constraints instead
+    of looking for conflicts beforehand: once the `IntegrityError`
+    is turned into a `ValidationError`, the `400` response rolls the
+    transaction back.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code >= 400:
+                transaction.set_rollback(True)
+            return response
+
+
+class ValuesListMixin:
+    """
+    Mixin serializing `list` responses from `.values()` rows, with
+    the compiled form of the list serializer (see
+    `soft_desk_support.serializers.get_values_serializer`).
+
+    The columns of the pagination keyset are fetched along with the
+    ones read by the serializer, for the cursor to be built from the
+    rows. The regular serializer is used when it cannot be compiled,
+    when the queryset is not one of model instances, or when
+    `VALUES_SERIALIZATION_ENABLED` is off; the output is the same
+    either way.
+    """
+
+    def get_values_serializer(self, queryset):
+        if not getattr(settings, "VALUES_SERIALIZATION_ENABLED", True):
+            return None
+        values_serializer = get_values_serializer(
+            self.get_serializer_class()
+        )
+        if values_serializer is None or not values_serializer.accepts(
+            queryset
+        ):
+            return None
+        return values_serializer
+
+    def get_ordering_columns(self, queryset):
+        get_ordering = getattr(self.paginator, "get_ordering", None)
+        if get_ordering is None:
+            return ()
+        return [
+            field.lstrip("-")
+            for field in get_ordering(self.request, queryset, self)
+        ]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.get_values_serializer(queryset)
+        if values_serializer is not None:
+            queryset = values_serializer.values(
+                queryset, *self.get_ordering_columns(queryset)
+            )
+
+        def serialize(rows):
+            if values_serializer is not None:
+                return values_serializer.serialize(rows)
+            return self.get_serializer(rows, many=True).data
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize(page))
+        return Response(serialize(queryset))
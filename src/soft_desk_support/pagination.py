@@ -0,0 +1,111 @@
+from django.conf import settings
+
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor-based pagination over a keyset such as
+    `(created_time, id)`.
+
+    Pages are fetched with a `WHERE key < cursor` condition instead
+    of an `OFFSET`, and no total count is computed, so fetching a
+    page costs the same whatever its depth and the table size.
+
+    - The keyset is read from the view's `cursor_ordering`
+    attribute (falls back to `ordering`); its first field is used
+    for the cursor position, the other ones break ties.
+    - Clients can ask for larger pages with `?page_size=<n>`,
+    up to the `MAX_PAGE_SIZE` setting.
+    """
+    ordering = "-pk"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, "MAX_PAGE_SIZE", 100)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class RankedPagination(BasePagination):
+    """
+    Offset-based pagination for results sorted by relevance, which
+    have no stable keyset to build a cursor from.
+
+    No total count is computed: one extra row is fetched to know
+    whether a next page exists. `?page_size=<n>` is capped by the
+    `MAX_PAGE_SIZE` setting.
+    """
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = "page_size"
+    offset_query_param = "offset"
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, "MAX_PAGE_SIZE", 100)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_offset(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.offset_query_param]
+            )
+        except (KeyError, ValueError):
+            return 0
+
+    def paginate(self, request, fetch):
+        """
+        Returns one page of `fetch(limit, offset)`.
+        """
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.offset = self.get_offset(request)
+        rows = list(fetch(self.limit + 1, self.offset))
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.offset_query_param,
+            self.offset + self.limit
+        )
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        offset = self.offset - self.limit
+        if offset <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
@@ -0,0 +1,35 @@
+"""
+JSON parser using `orjson` when it is installed, and decoding the
+request body at once instead of through a stream reader otherwise.
+"""
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import json
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    Drop-in replacement for `JSONParser`: NaN and infinite values
+    are rejected as well in strict mode.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            body = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body, parse_constant=json.strict_constant)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
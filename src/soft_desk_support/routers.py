@@ -0,0 +1,168 @@
+"""
+Routing of the queries between the primary database and its read
+replicas (`DATABASE_REPLICAS`, aliases of `DATABASES`).
+
+`ReplicaRoutingMiddleware` lets the reads of the safe requests
+(`GET`, `HEAD`, `OPTIONS`) go to a replica, picked at random for
+each request: all of its reads see the same state. Everything else
+uses the primary (`default`): the writes, the reads of the other
+requests, the reads run within `use_primary()`, and the queries run
+outside of a request (commands, shell, tests).
+
+A replica lags behind the primary, so once a user sent a write
+request, their reads stay on the primary for
+`READ_YOUR_WRITES_WINDOW` seconds, for them to read their own
+writes. The deadline is kept in the default cache, shared by the
+processes when the cache is. The user of a safe request is read,
+before the view authenticates it, from the claims of its bearer
+token (without checking its signature: it only picks a database)
+or from its session.
+
+Data cached beyond the request must not be read from a replica,
+which may still hold the state preceding a write whose invalidation
+already happened: the project memberships are read within
+`use_primary()`, and `reads_from_replica()` tells whether the
+response of the request may be cached.
+
+Replicas are not migrated: they are copies of the primary. Locally,
+`DJANGO_DATABASE_REPLICAS=<n>` declares `n` SQLite copies of the
+primary, refreshed by `python manage.py sync_replicas`, which
+stands in for the replication.
+"""
+import base64
+import binascii
+import json
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from rest_framework_simplejwt.settings import api_settings
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+PIN_KEY = "routing:primary:{user_id}"
+
+# Replica serving the reads of the current request, if any.
+read_replica = ContextVar("read_replica", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_window():
+    return getattr(settings, "READ_YOUR_WRITES_WINDOW", 5)
+
+
+def reads_from_replica():
+    """
+    Returns True if the reads of the current request go to a
+    replica.
+    """
+    return read_replica.get() is not None
+
+
+@contextmanager
+def use_primary():
+    """
+    Sends the reads run within the block to the primary.
+    """
+    token = read_replica.set(None)
+    try:
+        yield
+    finally:
+        read_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads to the replica picked by
+    `ReplicaRoutingMiddleware`, if any, and everything else to the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
+
+
+def get_token_user_id(request):
+    """
+    Returns the user id claimed by the bearer token of a request,
+    without validating the token, or None.
+    """
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) != 2 or parts[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        payload = parts[1].split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return claims.get(api_settings.USER_ID_CLAIM)
+    except (IndexError, ValueError, binascii.Error, AttributeError):
+        return None
+
+
+def get_request_user_id(request):
+    user_id = get_token_user_id(request)
+    session = getattr(request, "session", None)
+    if user_id is None and session is not None:
+        user_id = session.get(SESSION_KEY)
+    return user_id
+
+
+def pin_to_primary(user_id):
+    cache.set(PIN_KEY.format(user_id=user_id), True, get_window())
+
+
+def is_pinned_to_primary(user_id):
+    return cache.get(PIN_KEY.format(user_id=user_id)) is not None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of the safe requests to one of the replicas, and
+    pins the users who write to the primary (see the module
+    docstring).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        token = read_replica.set(None)
+        try:
+            if safe:
+                user_id = get_request_user_id(request)
+                if user_id is None or not is_pinned_to_primary(user_id):
+                    read_replica.set(random.choice(get_replicas()))
+            response = self.get_response(request)
+        finally:
+            read_replica.reset(token)
+
+        if not safe:
+            # Set by the authentication of the view, if any.
+            user_id = getattr(getattr(request, "user", None), "id", None)
+            if user_id is not None:
+                pin_to_primary(user_id)
+        return response
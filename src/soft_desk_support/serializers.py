@@ -0,0 +1,212 @@
+"""
+Serializers shared by the apps.
+
+`ModelSerializer` is the base model serializer of the apps.
+
+`get_values_serializer()` compiles the readable fields of a model
+serializer, once per class, into a function turning `.values()`
+rows straight into the dicts the serializer would return for the
+model instances: list pages are then serialized without building
+model instances nor going through every field's `get_attribute`.
+
+Only the fields whose output is known to be the same are compiled:
+model fields and foreign keys read as their column, and the
+`SerializerMethodField`s the serializer maps to an annotation in its
+`values_sources` attribute. Serializers with any other field (nested
+serializers, hyperlinks, dotted sources, ...) or overriding
+`to_representation` are not compiled.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models.query import ModelIterable, QuerySet
+
+from rest_framework import fields, relations, serializers
+
+from monitoring.timing import phase
+
+from .fields import FastDateTimeField
+
+
+class ModelSerializer(serializers.ModelSerializer):
+    """
+    Base model serializer of the apps: model datetimes are rendered
+    by `FastDateTimeField`, and saves are counted in the `queryset`
+    phase of the timed requests (see `monitoring.timing`).
+
+    `values_sources` maps the name of a `SerializerMethodField` to
+    the annotation holding its value, for the field to be read from
+    `.values()` rows (see `get_values_serializer`).
+    """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.DateTimeField: FastDateTimeField,
+    }
+    values_sources = {}
+
+    def save(self, **kwargs):
+        with phase("queryset"):
+            return super().save(**kwargs)
+
+
+class ValuesSerializer:
+    """
+    Compiled, read-only form of a model serializer.
+    """
+
+    def __init__(self, model, columns, annotations, serialize, converters):
+        self.model = model
+        self.columns = columns
+        self.annotations = annotations
+        self._serialize = serialize
+        self.converters = converters
+
+    def accepts(self, queryset):
+        """
+        Tells whether the rows of `queryset` can be serialized, i.e.
+        whether it is a queryset of model instances of the
+        serializer's model, with the annotations it reads.
+        """
+        return (
+            isinstance(queryset, QuerySet)
+            and queryset.model is self.model
+            and queryset._iterable_class is ModelIterable
+            and all(
+                name in queryset.query.annotations
+                for name in self.annotations
+            )
+        )
+
+    def serialize(self, rows):
+        """
+        Returns the representations of `.values()` rows.
+        """
+        return self._serialize(rows, *[
+            get_converter() for get_converter in self.converters
+        ])
+
+    def values(self, queryset, *extra):
+        """
+        Returns `queryset.values()` with the columns read by the
+        serializer, plus the `extra` ones.
+        """
+        return queryset.values(*dict.fromkeys([*self.columns, *extra]))
+
+
+def is_identity(field, model_field):
+    """
+    Tells whether `field.to_representation` returns the values read
+    from `model_field` unchanged.
+    """
+    representation = type(field).to_representation
+    if representation is fields.IntegerField.to_representation:
+        return isinstance(model_field, models.IntegerField)
+    if representation is fields.CharField.to_representation:
+        return isinstance(model_field, (models.CharField, models.TextField))
+    if representation is fields.ChoiceField.to_representation:
+        return isinstance(model_field, models.CharField) and all(
+            isinstance(choice, str) for choice in field.choices
+        )
+    if representation is fields.BooleanField.to_representation:
+        return isinstance(model_field, models.BooleanField)
+    return False
+
+
+def compile_field(model, field):
+    """
+    Returns `(column, get_converter, nullable)` for a readable field,
+    or None if it cannot be compiled. `get_converter` is None when
+    the column is used as is, otherwise it returns the function
+    converting the values of a page.
+    """
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not (model_field.many_to_one or model_field.one_to_one):
+            return None
+        if not model_field.concrete:
+            return None
+        return model_field.attname, None, model_field.null
+
+    if isinstance(field, (
+        relations.RelatedField,
+        relations.ManyRelatedField,
+        serializers.BaseSerializer,
+        fields.SerializerMethodField,
+    )) or "." in field.source or field.source == "*":
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+
+    column = model_field.attname
+    if model_field.is_relation:
+        model_field = model_field.target_field
+    if is_identity(field, model_field):
+        return column, None, model_field.null
+    if (
+        type(field).to_representation is fields.UUIDField.to_representation
+        and field.uuid_format == "hex_verbose"
+    ):
+        return column, lambda: str, model_field.null
+    if hasattr(field, "get_representer"):
+        return column, field.get_representer, model_field.null
+    return column, lambda: field.to_representation, model_field.null
+
+
+@lru_cache(maxsize=None)
+def get_values_serializer(serializer_class):
+    """
+    Returns the `ValuesSerializer` of a model serializer class, or
+    None if it cannot be compiled.
+    """
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    if (
+        serializer_class.to_representation
+        is not serializers.Serializer.to_representation
+    ):
+        return None
+
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    values_sources = getattr(serializer_class, "values_sources", {})
+    columns, annotations, items, converters = [], [], [], []
+    for field in serializer._readable_fields:
+        if field.field_name in values_sources:
+            column = values_sources[field.field_name]
+            annotations.append(column)
+            get_converter, nullable = None, False
+        else:
+            compiled = compile_field(model, field)
+            if compiled is None:
+                return None
+            column, get_converter, nullable = compiled
+        columns.append(column)
+
+        value = f"r[{column!r}]"
+        if get_converter is not None:
+            name = f"c{len(converters)}"
+            converters.append(get_converter)
+            value = (
+                f"(None if {value} is None else {name}({value}))"
+                if nullable else f"{name}({value})"
+            )
+        items.append(f"{field.field_name!r}: {value}")
+
+    serialize = eval("lambda rows, {}: [{{{}}} for r in rows]".format(
+        "".join(f"c{i}, " for i in range(len(converters))),
+        ", ".join(items)
+    ))
+    return ValuesSerializer(
+        model, list(dict.fromkeys(columns)), annotations, serialize,
+        converters
+    )
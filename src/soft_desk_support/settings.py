@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from .database import sqlite_database, sqlite_replica
+
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
@@ -51,17 +53,24 @@ INSTALLED_APPS = [
     "django_filters",
     "authentication.apps.AuthenticationConfig",
     "user.apps.UserConfig",
-    "projects.apps.ProjectsConfig"
+    "projects.apps.ProjectsConfig",
+    "monitoring.apps.MonitoringConfig",
 ]
 
 MIDDLEWARE = [
+    "monitoring.metrics.MetricsMiddleware",
+    "monitoring.timing.ServerTimingMiddleware",
+    "monitoring.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Reads the session of the request, hence after SessionMiddleware.
+    "soft_desk_support.routers.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "monitoring.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "soft_desk_support.urls"
@@ -87,13 +96,41 @@ WSGI_APPLICATION = "soft_desk_support.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# "default", or "production" to tune SQLite for concurrent readers
+# and writers (see soft_desk_support.database).
+DATABASE_PROFILE = os.environ.get("DJANGO_DATABASE_PROFILE", "default")
+
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": sqlite_database(BASE_DIR / "db.sqlite3", DATABASE_PROFILE),
 }
 
+# Lets the migration making project names unique rename the projects
+# sharing a name, all but the oldest one being suffixed with their id
+# (see projects/migrations/0008_project_unique_name.py). It fails,
+# listing them, otherwise.
+RENAME_DUPLICATE_PROJECT_NAMES = (
+    os.environ.get("DJANGO_RENAME_DUPLICATE_PROJECT_NAMES") == "1"
+)
+
+# Read replicas: aliases of DATABASES serving the reads of the safe
+# requests (see soft_desk_support.routers). DJANGO_DATABASE_REPLICAS=<n>
+# declares n local SQLite copies of the primary, refreshed by
+# `python manage.py sync_replicas`.
+DATABASE_REPLICA_COUNT = int(os.environ.get("DJANGO_DATABASE_REPLICAS", 0))
+DATABASES.update({
+    f"replica{index}": sqlite_replica(
+        BASE_DIR / f"db.replica{index}.sqlite3", DATABASE_PROFILE
+    )
+    for index in range(1, DATABASE_REPLICA_COUNT + 1)
+})
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+
+DATABASE_ROUTERS = ["soft_desk_support.routers.PrimaryReplicaRouter"]
+
+# Seconds during which the reads of a user who wrote stay on the
+# primary, for them to read their own writes.
+READ_YOUR_WRITES_WINDOW = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,7 +181,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -153,12 +190,112 @@ REST_FRAMEWORK = {
         "rest_framework.pagination.LimitOffsetPagination"
     ),
     "PAGE_SIZE": 5,
+    "DEFAULT_RENDERER_CLASSES": [
+        "soft_desk_support.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "soft_desk_support.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     "DATETIME_FORMAT": "%x - %X"
 }
 
+# Largest page clients can request with `?page_size=` on the
+# cursor-paginated endpoints (see soft_desk_support.pagination).
+MAX_PAGE_SIZE = 100
+
+# Full-text search (see projects.search): number of most recent
+# matches of each kind ranked by `/api/search/`, and largest number
+# of projects a search is restricted to through the FTS5 index
+# itself (beyond it, matches are filtered row by row).
+SEARCH_MAX_CANDIDATES = 1000
+SEARCH_SCOPE_MAX_PROJECTS = 50
+
+# Number of rows fetched at a time by the streaming export of a
+# project (see projects.export).
+EXPORT_CHUNK_SIZE = 2000
+
+# Serialize list pages from `.values()` rows with the compiled form
+# of the list serializers (see soft_desk_support.serializers).
+VALUES_SERIALIZATION_ENABLED = True
+
+# Fraction (0 to 1) of the requests timed by
+# monitoring.timing.ServerTimingMiddleware: their phases are sent in a
+# `Server-Timing` header and logged on "monitoring.timing" (INFO).
+SERVER_TIMING_SAMPLE_RATE = 0.0
+
+# Request, query, cache and token refresh metrics served at
+# /api/metrics/ to staff members (see monitoring.metrics). Set
+# METRICS_DIR to a directory shared by the worker processes, and
+# emptied when the server starts, to report all of them.
+METRICS_ENABLED = True
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Profiling of sampled requests (see monitoring.profiling): fraction
+# of the requests profiled by route name, e.g. {"project-detail": 0.01}.
+# Staff members can also profile a request with an `X-Profile` header.
+# PROFILING_MODE is "cprofile" (.pstats files) or "sampling"
+# (.collapsed stacks, sampled every PROFILING_INTERVAL seconds); only
+# the PROFILING_RETENTION most recent profiles are kept.
+PROFILING_ROUTES = {}
+PROFILING_MODE = "cprofile"
+PROFILING_DIR = BASE_DIR / "profiles"
+PROFILING_RETENTION = 100
+PROFILING_INTERVAL = 0.005
+
+# Queries of the requests lasting SLOW_QUERY_THRESHOLD_MS or more
+# (None, the default, to disable) are kept, with their query plan
+# unless SLOW_QUERY_EXPLAIN is unset, in an in-memory log of the
+# SLOW_QUERY_LOG_SIZE most recent ones, listed in the admin
+# (see monitoring.slow_queries). Each slow SELECT then runs an extra
+# EXPLAIN: enable the log while investigating only.
+SLOW_QUERY_THRESHOLD_MS = None
+SLOW_QUERY_LOG_SIZE = 200
+SLOW_QUERY_EXPLAIN = True
+
+# Maximum number of users whose project memberships are kept in
+# memory between requests, and for how many seconds at most (see
+# projects.membership).
+MEMBERSHIP_CACHE_SIZE = 1024
+MEMBERSHIP_CACHE_TTL = 60
+
+# Opt-in cache of the issue, comment and contributor responses
+# (see projects.response_cache), stored in the "responses" cache.
+# To share it between processes, use instead:
+#   "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+#   "LOCATION": "/var/tmp/softdesk-responses",
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Largest number of objects created or updated by one request to a
+# bulk endpoint (e.g. /api/projects/<id>/issues/bulk/).
+BULK_MAX_SIZE = 500
+
+# The default cache must be shared by the worker processes in
+# production (`manage.py check --deploy` fails otherwise): it holds the
+# versions of the cached memberships, e.g.
+#   "BACKEND": "django.core.cache.backends.redis.RedisCache",
+#   "LOCATION": "redis://127.0.0.1:6379",
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+    },
+}
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -171,4 +308,31 @@ SIMPLE_JWT = {
 
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "authentication.serializers.ClaimsTokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "authentication.serializers.IndexedTokenRefreshSerializer"
+    ),
 }
+
+# Lifetime, in seconds, of the cached user status checked by
+# authentication.authentication.ClaimsJWTAuthentication.
+JWT_USER_STATUS_TTL = 60
+
+# In-memory index of the blacklisted refresh tokens
+# (see authentication.revocation).
+TOKEN_REVOCATION_CAPACITY = 1_000_000
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_EXACT_SIZE = 100_000
+TOKEN_REVOCATION_SYNC_INTERVAL = 1.0
+
+# Purge of the expired tokens (see authentication.compaction and the
+# `compact_tokens` command). Set TOKEN_COMPACTION_INTERVAL to a
+# number of seconds to also run it periodically in the server process
+# (started from wsgi.py and asgi.py, not by the management commands).
+TOKEN_COMPACTION_INTERVAL = None
+TOKEN_COMPACTION_BATCH_SIZE = 1000
+TOKEN_COMPACTION_MAX_LOCK_MS = 50
+TOKEN_COMPACTION_PAUSE_MS = 10
@@ -6,7 +6,9 @@ from projects.views import (
     ContributorViewSet,
     IssueViewSet,
     CommentViewSet,
+    SearchView,
 )
+from monitoring.views import MetricsView
 
 
 class RootRedirectView(RedirectView):
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'soft_desk_support.settings')
 
 application = get_wsgi_application()
+
+# Only the server process compacts the tokens periodically.
+from authentication.compaction import start_scheduler  # noqa: E402
+
+start_scheduler()
@@ -82,6 +82,14 @@ class User(AbstractUser):
     )
     objects = CustomUserManager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # The username the user was loaded with, for the signals to
+        # tell whether it changed (see `projects.signals`).
+        user._loaded_username = user.__dict__.get("username")
+        return user
+
     def save(self, *args, **kwargs):
         """
         Overrides save to allow future extensions; currently just 
@@ -113,5 +121,11 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ["-date_joined"]
+        indexes = [
+            models.Index(
+                fields=["-date_joined"],
+                name="user_date_joined_idx"
+            ),
+        ]
         verbose_name = "user"
         verbose_name_plural = "users"
@@ -1,9 +1,10 @@
 from rest_framework import serializers
 
+from soft_desk_support.serializers import ModelSerializer
 from .models import User
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(ModelSerializer):
     """
     Minimal serializer for listing users.
 
@@ -17,7 +18,7 @@ class UserListSerializer(serializers.ModelSerializer):
         fields = ["id", "username"]
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(ModelSerializer):
     """
     Detailed serializer for user profiles.
 
@@ -3,12 +3,14 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 
+from soft_desk_support.mixins import ServerTimingMixin, ValuesListMixin
+from soft_desk_support.pagination import KeysetPagination
 from .models import User
 from .serializers import UserDetailSerializer, UserListSerializer
 from .permissions import IsAdminOrIsSelf, IsSelf
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ServerTimingMixin, ValuesListMixin, ModelViewSet):
     """
     ViewSet for managing user accounts.
 
@@ -23,9 +25,24 @@ class UserViewSet(ModelViewSet):
     - ?id=
     - ?contact_ok=true|false
     - ?data_shared_ok=true|false
+
+    Lists are serialized from `.values()` rows with
+    `UserListSerializer`.
     """
     queryset = User.objects.all()
     serializer_class = UserDetailSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ("-date_joined", "-id")
+    # Maximum number of SQL queries of each action, whatever the
+    # number of rows (checked by `TestQueryBudgets`).
+    query_budgets = {
+        "list": 1, "retrieve": 1, "create": 3,
+        "update": 2, "destroy": 20,
+    }
+    # Extra queries per 100 rows: the issues and comments cascaded by
+    # a destroy are deleted by Django 100 at a time, after their
+    # delete signals.
+    query_growth = {"destroy": 2}
 
     def get_serializer_class(self):
             if self.action == 'list':
@@ -84,20 +101,6 @@ class UserViewSet(ModelViewSet):
             )
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        """
-        Returns a list of users using UserListSerializer.
-        """
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-
     def destroy(self, request, *args, **kwargs):
         """
         Allows a user to delete their own profile.
@@ -105,7 +108,7 @@ class UserViewSet(ModelViewSet):
         """
         instance = self.get_object()
         
-        if instance != request.user:
+        if instance.pk != request.user.id:
             return Response(
                 {"detail": "You are not authorized to delete this profile."},
                 status=status.HTTP_403_FORBIDDEN